@@ -1,15 +1,16 @@
 import typing
 
 from aclimatise.converter import WrapperGenerator
+from aclimatise.converter.binary import BinaryGenerator
 from aclimatise.converter.cwl import CwlGenerator
 from aclimatise.converter.janis import JanisGenerator
 from aclimatise.converter.wdl import WdlGenerator
 from aclimatise.converter.yml import YmlGenerator
 from aclimatise.execution import Executor
 from aclimatise.execution.docker import DockerExecutor
-from aclimatise.execution.local import LocalExecutor
+from aclimatise.execution.local import AsyncLocalExecutor, LocalExecutor
 from aclimatise.execution.man import ManPageExecutor
-from aclimatise.integration import parse_help
+from aclimatise.integration import parse_help, parse_help_batch
 from aclimatise.model import Command, Flag
 from deprecated import deprecated
 
@@ -41,8 +42,10 @@ __all__ = [
     YmlGenerator,
     JanisGenerator,
     LocalExecutor,
+    AsyncLocalExecutor,
     DockerExecutor,
     ManPageExecutor,
     explore_command,
     parse_help,
+    parse_help_batch,
 ]
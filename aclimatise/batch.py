@@ -0,0 +1,278 @@
+"""
+Converts many commands at once, spreading the work across a pool of processes that each load the language models only
+once. This is much faster than running ``aclimatise explore`` or ``aclimatise pipe`` once per command, which spends
+most of its time starting the interpreter and loading models
+"""
+import json
+import os
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from os import PathLike
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
+
+import attr
+
+from aclimatise.converter import WrapperGenerator, generate_trees
+from aclimatise.execution.local import LocalExecutor
+from aclimatise.flag_parser.parser import CliParser
+from aclimatise.integration import parse_help
+from aclimatise.nlp import SentenceBackend, SentenceClassifier, get_nlp, get_wordsegment
+from aclimatise.usage_parser.parser import UsageParser
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class BatchItem:
+    """
+    A single command to convert
+    """
+
+    #: The command, e.g. ``["samtools", "sort"]``
+    command: Tuple[str, ...]
+
+    #: A file containing the help text of the command. If this isn't set, the command is run to find its help text,
+    #: and its subcommands
+    help_file: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """
+        A unique name for this item, which identifies it in the batch log
+        """
+        return " ".join(self.command)
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class BatchOptions:
+    """
+    Settings that apply to every item in the batch
+    """
+
+    #: The directory in which to write the wrappers
+    out_dir: str
+    #: The output formats, e.g. ``("cwl", "wdl")``
+    formats: Tuple[str, ...] = ("yml", "wdl", "cwl")
+    #: See :py:attr:`aclimatise.converter.WrapperGenerator.case`
+    case: str = "snake"
+    #: See :py:attr:`aclimatise.converter.WrapperGenerator.generate_names`
+    generate_names: bool = False
+    #: The name of the sentence backend, see :py:meth:`aclimatise.nlp.SentenceBackend.choose_backend`
+    sentences: str = "spacy"
+    #: How many levels of subcommands to explore, for commands that are run rather than read from a file
+    depth: int = 1
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class BatchResult:
+    """
+    The outcome of converting a single :py:class:`BatchItem`
+    """
+
+    item: BatchItem
+    #: The paths of the files that were written
+    files: List[str] = attr.ib(factory=list)
+    #: If the conversion failed, a description of the error
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "command": self.item.key,
+                "status": "ok" if self.ok else "error",
+                "files": self.files,
+                "error": self.error,
+            }
+        )
+
+
+def find_items(source: PathLike) -> List[BatchItem]:
+    """
+    Lists the commands to convert. The source is either a directory of help text files or a manifest file
+    :param source: If this is a directory, every ``.txt`` file inside it is the help text for a command, named after its
+        path within the directory. For example, ``bwa.txt`` contains the help for ``bwa``, and ``bwa/mem.txt`` for
+        ``bwa mem``. Otherwise, this is a manifest file, where each line is a command to run, for example
+        ``samtools sort``. Blank lines, and lines starting with ``#``, are ignored
+    """
+    source = Path(source)
+    if source.is_dir():
+        items = [
+            BatchItem(
+                command=path.relative_to(source).with_suffix("").parts,
+                help_file=str(path),
+            )
+            for path in source.glob("**/*.txt")
+        ]
+        return sorted(items, key=lambda item: item.command)
+
+    items = []
+    with source.open() as fp:
+        for line in fp:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                items.append(BatchItem(command=tuple(line.split())))
+    return items
+
+
+def read_log(log: PathLike) -> Dict[str, bool]:
+    """
+    Reads the log of a previous batch, and returns whether each command succeeded, by its key
+    """
+    done = {}
+    try:
+        with open(log) as fp:
+            for line in fp:
+                try:
+                    entry = json.loads(line)
+                    done[entry["command"]] = entry["status"] == "ok"
+                except (ValueError, KeyError, TypeError):
+                    # A batch that was killed while writing can leave a partial line at the end
+                    continue
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def preload():
+    """
+    Loads the models and grammars that every item needs, so that they're only loaded once per process
+    """
+    get_wordsegment()
+    get_nlp()
+    CliParser.shared()
+    UsageParser.shared()
+
+
+def convert_item(item: BatchItem, options: BatchOptions) -> BatchResult:
+    """
+    Parses a single command and writes its wrappers. Any error is caught and returned in the result, so that one bad
+    command doesn't stop the batch
+    """
+    try:
+        backend = SentenceBackend.choose_backend(options.sentences)()
+        if item.help_file is not None:
+            with open(item.help_file, encoding="utf-8", errors="replace") as fp:
+                command = parse_help(
+                    item.command, fp.read(), sentences=SentenceClassifier(backend)
+                )
+        else:
+            command = LocalExecutor(sentence_backend=backend).explore(
+                list(item.command), max_depth=options.depth
+            )
+
+        converters = [
+            WrapperGenerator.choose_converter(format)(
+                generate_names=options.generate_names, case=options.case
+            )
+            for format in options.formats
+        ]
+        files = [
+            str(path)
+            for path, cmd in generate_trees(command, options.out_dir, converters)
+        ]
+        return BatchResult(item=item, files=files)
+    except Exception:
+        return BatchResult(item=item, error=traceback.format_exc())
+
+
+def pending_items(
+    items: Iterable[BatchItem], log: PathLike, retry_failed: bool = True
+) -> List[BatchItem]:
+    """
+    Removes the items that a previous batch has already converted, so that an interrupted batch can be resumed
+    :param log: The log written by :py:func:`run_batch`
+    :param retry_failed: If false, items that the log records as failed are also removed
+    """
+    done = read_log(log)
+    return [
+        item
+        for item in items
+        if item.key not in done or (retry_failed and not done[item.key])
+    ]
+
+
+def run_batch(
+    items: Iterable[BatchItem],
+    options: BatchOptions,
+    max_workers: Optional[int] = None,
+    log: Optional[PathLike] = None,
+) -> Generator[BatchResult, None, None]:
+    """
+    Converts every item using a pool of processes, yielding the results in the order they finish. If a worker dies,
+    e.g. because it runs out of memory, only the item that it died on fails
+    :param max_workers: The number of processes. Defaults to the number of CPUs
+    :param log: A file to which the result of each item is appended, as a line of JSON, as soon as it finishes. Use
+        :py:func:`pending_items` to skip the items that it records
+    """
+    items = list(items)
+    if not items:
+        return
+    os.makedirs(options.out_dir, exist_ok=True)
+
+    # Loading the models here means that forked worker processes share them, rather than each loading their own
+    preload()
+    log_fp = open(log, "a") if log is not None else None
+    try:
+        for result in _convert_items(items, options, max_workers or os.cpu_count()):
+            if log_fp is not None:
+                log_fp.write(result.to_json() + "\n")
+                log_fp.flush()
+            yield result
+    finally:
+        if log_fp is not None:
+            log_fp.close()
+
+
+def _convert_items(
+    items: List[BatchItem], options: BatchOptions, max_workers: int
+) -> Generator[BatchResult, None, None]:
+    """
+    Converts every item using a pool of processes, yielding the results in the order they finish. If a worker dies
+    without raising an exception, e.g. because it ran out of memory, the pool breaks, and every item it was converting
+    fails with it. Those items are retried one at a time, so that only the item that killed the worker fails, and the
+    rest of the batch is converted by a new pool
+    """
+    queue = deque(items)
+    while queue:
+        suspects = []
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=preload) as pool:
+            running: Dict[Future, BatchItem] = {}
+            while queue or running:
+                # Only submit as many items as there are workers, so that few items are lost if the pool breaks
+                while queue and len(running) < max_workers:
+                    item = queue.popleft()
+                    running[pool.submit(convert_item, item, options)] = item
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        suspects.append(item)
+                if suspects:
+                    # The pool can't be used again, and every other item it was converting has failed too
+                    for future, item in running.items():
+                        try:
+                            yield future.result()
+                        except BrokenProcessPool:
+                            suspects.append(item)
+                    break
+
+        for item in suspects:
+            yield _convert_alone(item, options)
+
+
+def _convert_alone(item: BatchItem, options: BatchOptions) -> BatchResult:
+    """
+    Converts a single item in a new worker process, so that if the worker dies, we know this item caused it
+    """
+    with ProcessPoolExecutor(max_workers=1, initializer=preload) as pool:
+        try:
+            return pool.submit(convert_item, item, options).result()
+        except BrokenProcessPool as e:
+            return BatchResult(item=item, error="Worker process died: {}".format(e))
@@ -0,0 +1,255 @@
+"""
+A compact binary serialization of Command trees, based on MessagePack, which is much faster to load and dump than YAML.
+Each model object is stored as a MessagePack extension, containing its class code and a list of its field values. The
+names of those fields are stored at the start of the file, so that files written before a field was added to the model
+can still be loaded
+"""
+import enum
+import sys
+from functools import partial
+from typing import IO, Any, Dict, List, Tuple, Type
+
+import attr
+import msgpack
+
+from aclimatise import cli_types
+from aclimatise.help_store import HelpRef, current_help_store
+from aclimatise.model import (
+    ChoiceFlagArg,
+    Command,
+    EmptyFlagArg,
+    Flag,
+    FlagSynonym,
+    OptionalFlagArg,
+    Positional,
+    RepeatFlagArg,
+    SimpleFlagArg,
+)
+from aclimatise.usage_parser.model import UsageElement, UsageInstance
+
+#: Identifies the format, followed by a version number byte
+MAGIC = b"ACLIMATISE"
+VERSION = 2
+
+# Extension codes for values that MessagePack doesn't support. These are stored in files, so they must never change
+SET = 0
+ENUM = 1
+HELP_REF = 2
+
+#: The extension code of each model class. These are stored in files, so they must never change, and new classes must
+#: be given new codes
+class_codes: Dict[Type, int] = {
+    Command: 10,
+    Positional: 11,
+    Flag: 12,
+    FlagSynonym: 13,
+    EmptyFlagArg: 20,
+    OptionalFlagArg: 21,
+    SimpleFlagArg: 22,
+    RepeatFlagArg: 23,
+    ChoiceFlagArg: 24,
+    UsageInstance: 30,
+    UsageElement: 31,
+    cli_types.CliType: 40,
+    cli_types.CliEnum: 41,
+    cli_types.CliFloat: 42,
+    cli_types.CliInteger: 43,
+    cli_types.CliString: 44,
+    cli_types.CliBoolean: 45,
+    cli_types.CliFileSystemType: 46,
+    cli_types.CliDir: 47,
+    cli_types.CliFile: 48,
+    cli_types.CliDict: 49,
+    cli_types.CliList: 50,
+    cli_types.CliTuple: 51,
+}
+code_classes: Dict[int, Type] = {code: cls for cls, code in class_codes.items()}
+
+#: The names of the fields stored for each class, in order. Command.parent isn't stored, since it would make the tree
+#: cyclic. Instead, it is restored from the subcommands when loading
+class_fields: Dict[Type, Tuple[str, ...]] = {
+    cls: tuple(
+        field.name
+        for field in attr.fields(cls)
+        if not (cls is Command and field.name == "parent")
+    )
+    for cls in class_codes
+}
+
+#: The layout of each class in a file: the names of the fields it stores, in order, and the fields that it doesn't
+#: store, along with their defaults
+Layouts = Dict[Type, Tuple[Tuple[str, ...], Dict[str, Any]]]
+
+#: The layouts of the files written by this version of the model
+current_layouts: Layouts = {cls: (fields, {}) for cls, fields in class_fields.items()}
+
+#: The field names of each class code, which are written at the start of each file
+schema_fields: Dict[int, List[str]] = {
+    class_codes[cls]: list(fields) for cls, fields in class_fields.items()
+}
+schema = msgpack.packb(schema_fields)
+
+
+def _pack(value: Any) -> bytes:
+    return msgpack.packb(value, default=_encode, use_bin_type=True)
+
+
+def _unpack(data: bytes, layouts: Layouts = current_layouts) -> Any:
+    return msgpack.unpackb(
+        data, ext_hook=partial(_decode, layouts), raw=False, strict_map_key=False
+    )
+
+
+def _layouts(stored: Dict[int, List[str]]) -> Layouts:
+    """
+    Works out how to restore each class from the fields stored in a file
+    :param stored: The field names of each class code, as written at the start of the file
+    :raises ValueError: If the file stores a field that the model no longer has, or doesn't store a field that has no
+        default
+    """
+    layouts = {}
+    for code, names in stored.items():
+        cls = code_classes.get(code)
+        if cls is None:
+            # Objects of an unknown class raise an error if the file actually contains any
+            continue
+        unknown = set(names) - set(class_fields[cls])
+        if unknown:
+            raise ValueError(
+                "This file stores fields of {} that no longer exist: {}".format(
+                    cls.__name__, ", ".join(sorted(unknown))
+                )
+            )
+        missing = {}
+        for field in attr.fields(cls):
+            if field.name in names or field.name not in class_fields[cls]:
+                continue
+            if field.default is attr.NOTHING:
+                raise ValueError(
+                    "This file doesn't store the field {}.{}, which has no default".format(
+                        cls.__name__, field.name
+                    )
+                )
+            missing[field.name] = field.default
+        layouts[cls] = (tuple(names), missing)
+    return layouts
+
+
+def _encode(obj: Any) -> msgpack.ExtType:
+    """
+    Converts a value that MessagePack doesn't support into an extension
+    """
+    cls = type(obj)
+    if cls in class_codes:
+        return msgpack.ExtType(
+            class_codes[cls],
+            _pack([getattr(obj, name) for name in class_fields[cls]]),
+        )
+    if cls in (set, frozenset):
+        return msgpack.ExtType(SET, _pack(list(obj)))
+    if cls is HelpRef:
+        return msgpack.ExtType(HELP_REF, _pack(obj.digest))
+    if isinstance(obj, enum.EnumMeta):
+        # CliEnum contains a dynamically created Enum class, which we re-create from its members
+        return msgpack.ExtType(
+            ENUM,
+            _pack([obj.__name__, [[member.name, member.value] for member in obj]]),
+        )
+    raise TypeError("Can't serialize object of type {}".format(cls.__name__))
+
+
+def _decode(layouts: Layouts, code: int, data: bytes) -> Any:
+    value = _unpack(data, layouts)
+    if code in code_classes:
+        cls = code_classes[code]
+        names, missing = layouts[cls]
+        # Bypass __init__, so that the object is restored exactly, without re-running __attrs_post_init__
+        obj = cls.__new__(cls)
+        for name, field in zip(names, value):
+            if type(field) is list:
+                # Intern strings in lists, such as flag synonyms, which appear throughout a tree
+                field = [
+                    sys.intern(item) if type(item) is str else item for item in field
+                ]
+            object.__setattr__(obj, name, field)
+        for name, default in missing.items():
+            if isinstance(default, attr.Factory):
+                default = default.factory()
+            object.__setattr__(obj, name, default)
+        if cls is Command:
+            obj.parent = None
+            for subcommand in obj.subcommands:
+                subcommand.parent = obj
+        return obj
+    if code == SET:
+        return set(value)
+    if code == HELP_REF:
+        return HelpRef(digest=value, store=current_help_store())
+    if code == ENUM:
+        name, members = value
+        return enum.Enum(name, [tuple(member) for member in members])
+    raise ValueError("Unknown extension code {}".format(code))
+
+
+def dumps(cmd: Command) -> bytes:
+    """
+    Serializes a command. Like the YAML format, this includes the command's ancestors, and therefore the entire command
+    tree that it belongs to
+    """
+    # Store the root of the tree, and the path from the root to this command
+    path: List[int] = []
+    root = cmd
+    while root.parent is not None:
+        # Compare by identity, since comparing commands compares their entire trees
+        path.append(
+            next(
+                i
+                for i, subcommand in enumerate(root.parent.subcommands)
+                if subcommand is root
+            )
+        )
+        root = root.parent
+    path.reverse()
+    return MAGIC + bytes([VERSION]) + schema + _pack([root, path])
+
+
+def loads(data: bytes) -> Command:
+    """
+    Loads a command serialized by :py:func:`dumps`
+    """
+    header = len(MAGIC) + 1
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("This is not a serialized aCLImatise command")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(
+            "Unsupported serialization version {}".format(data[len(MAGIC)])
+        )
+
+    # The schema is followed by the tree, so find where it ends
+    unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+    unpacker.feed(data[header:])
+    stored = unpacker.unpack()
+    if stored == schema_fields:
+        layouts = current_layouts
+    else:
+        layouts = _layouts(stored)
+
+    root, path = _unpack(data[header + unpacker.tell() :], layouts)
+    cmd = root
+    for index in path:
+        cmd = cmd.subcommands[index]
+    return cmd
+
+
+def dump(cmd: Command, fp: IO[bytes]):
+    """
+    Serializes a command into a binary file
+    """
+    fp.write(dumps(cmd))
+
+
+def load(fp: IO[bytes]) -> Command:
+    """
+    Loads a command from a binary file written by :py:func:`dump`
+    """
+    return loads(fp.read())
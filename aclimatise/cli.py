@@ -2,15 +2,26 @@
 Code relating to the command line interface to aCLImatise
 """
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Iterable, Optional, Tuple
 
 import click
 
 from aclimatise import WrapperGenerator, explore_command, parse_help
+from aclimatise.batch import BatchOptions, find_items, pending_items, run_batch
+from aclimatise.converter import generate_trees
+from aclimatise.converter.yml import YmlGenerator
+from aclimatise.corpus import corpus_entries, reanalyse_corpus, write_corpus
+from aclimatise.execution.cache import ExecutionCache, default_cache_dir
 from aclimatise.execution.local import LocalExecutor
 from aclimatise.execution.man import ManPageExecutor
 from aclimatise.flag_parser.parser import CliParser
+from aclimatise.help_store import HelpStore
+from aclimatise.memo import load_memos, save_memos
+from aclimatise.nlp import SentenceBackend, SentenceClassifier
+from aclimatise.server import make_server
+from aclimatise.stream import convert_record, convert_stream
 
 # Some common options
 opt_generate_names = click.option(
@@ -33,6 +44,16 @@ opt_case = click.option(
     default="snake",
 )
 opt_cmd = click.argument("cmd", nargs=-1, required=True)
+opt_sentences = click.option(
+    "--sentences",
+    "-s",
+    type=click.Choice([backend.name() for backend in SentenceBackend.__subclasses__()]),
+    default="spacy",
+    help=(
+        "How to decide which flag descriptions are real sentences. 'spacy' is the most accurate, and 'heuristic' is "
+        "much faster"
+    ),
+)
 
 
 @click.group()
@@ -44,6 +65,7 @@ def main():
 @opt_cmd
 @opt_case
 @opt_generate_names
+@opt_sentences
 @click.option(
     "--man",
     "-m",
@@ -62,7 +84,7 @@ def main():
     "--format",
     "-f",
     "formats",
-    type=click.Choice(["wdl", "cwl", "yml"]),
+    type=click.Choice(["wdl", "cwl", "yml", "msgpack"]),
     multiple=True,
     default=("yml", "wdl", "cwl"),
     help="The language in which to output the CLI wrapper",
@@ -83,6 +105,32 @@ def main():
 @click.option(
     "--subcommands/--no-subcommands", default=True, help="Look for subcommands"
 )
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=1,
+    help="How many help commands to run at the same time while exploring, and how many files to write at the same "
+    "time",
+)
+@click.option(
+    "--timeout",
+    "-t",
+    type=float,
+    help="The maximum number of seconds to spend exploring the command and all its subcommands",
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    help="Store the output of each help command, and re-use it in future runs for as long as the executable hasn't "
+    "changed. This also stores the segmentation of flag names into words",
+)
+@click.option(
+    "--help-store",
+    type=Path,
+    help="Move the help texts out of the YAML output into this directory, where each distinct text is stored once, "
+    "compressed. The YAML only refers to them by their digest",
+)
 def explore(
     cmd: Iterable[str],
     out_dir: Path,
@@ -92,37 +140,65 @@ def explore(
     generate_names: bool,
     man: bool,
     help_flag: str,
+    workers: int,
+    cache: bool,
+    sentences: str,
+    timeout: float = None,
     depth: int = None,
+    help_store: Path = None,
 ):
     # We only support these two executors via CLI because the docker executor would require some additional config
+    exec_cache = ExecutionCache() if cache else None
+    memo_path = default_cache_dir().parent / "memos.json"
+    if cache:
+        load_memos(memo_path)
+    sentence_backend = SentenceBackend.choose_backend(sentences)()
     if man:
-        exec = ManPageExecutor()
+        exec = ManPageExecutor(cache=exec_cache, sentence_backend=sentence_backend)
     else:
         kwargs = {}
         if help_flag is not None:
             kwargs["flags"] = [[help_flag]]
-        exec = LocalExecutor(**kwargs)
+        exec = LocalExecutor(
+            max_workers=workers,
+            explore_timeout=timeout,
+            cache=exec_cache,
+            sentence_backend=sentence_backend,
+            **kwargs
+        )
 
     if subcommands:
         command = exec.explore(list(cmd), max_depth=depth)
     else:
         command = exec.convert(list(cmd))
 
-    for format in formats:
-        converter_cls = WrapperGenerator.choose_converter(format)
-        converter = converter_cls(
+    # Convert into every format in a single pass, so that they can share variable names and types
+    converters = [
+        WrapperGenerator.choose_converter(format)(
             generate_names=generate_names,
             case=case,
         )
-        list(converter.generate_tree(command, out_dir))
+        for format in formats
+    ]
+    if help_store is not None:
+        for converter in converters:
+            if isinstance(converter, YmlGenerator):
+                converter.help_store = HelpStore(help_store)
+    list(generate_trees(command, out_dir, converters, max_workers=workers))
+
+    if cache:
+        save_memos(memo_path)
 
 
 @main.command(
-    help="Read a command help from stdin and output a tool definition to stdout"
+    help="Read a command help from stdin and output a tool definition to stdout. With --jsonl, read any number of "
+    'commands from stdin, one JSON object per line such as {"cmd": ["bwa", "mem"], "help": "..."}, and output one '
+    'JSON object per line such as {"cmd": ["bwa", "mem"], "output": "..."}, in the same order'
 )
-@opt_cmd
+@click.argument("cmd", nargs=-1)
 @opt_generate_names
 @opt_case
+@opt_sentences
 @click.option(
     "--format",
     "-f",
@@ -130,9 +206,40 @@ def explore(
     default="cwl",
     help="The language in which to output the CLI wrapper",
 )
-def pipe(cmd, generate_names, case, format):
+@click.option(
+    "--jsonl",
+    is_flag=True,
+    help="Stream JSON-lines records from stdin, rather than reading the help for a single command",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=1,
+    help="With --jsonl, the number of processes that convert records in parallel",
+)
+def pipe(cmd, generate_names, case, format, sentences, jsonl, workers):
+    if jsonl:
+        convert = partial(
+            convert_record,
+            format=format,
+            generate_names=generate_names,
+            case=case,
+            sentences=sentences,
+        )
+        for output in convert_stream(sys.stdin, convert, max_workers=workers):
+            # Flush each record, so that consumers can use it before the next one is ready
+            print(output, flush=True)
+        return
+
+    if not cmd:
+        raise click.UsageError(
+            "Missing argument 'CMD...'. This is required unless --jsonl is set"
+        )
+
     stdin = "".join(sys.stdin.readlines())
-    command = parse_help(cmd, stdin)
+    classifier = SentenceClassifier(SentenceBackend.choose_backend(sentences)())
+    command = parse_help(cmd, stdin, sentences=classifier)
 
     converter_cls = WrapperGenerator.choose_converter(format)
     converter = converter_cls(
@@ -143,6 +250,280 @@ def pipe(cmd, generate_names, case, format):
     print(output)
 
 
+@main.command(
+    help="Convert many commands at once, using a pool of processes. SOURCE is either a directory of help text files, "
+    "where bwa/mem.txt contains the help for `bwa mem`, or a manifest file with one command to run on each line"
+)
+@click.argument("source", type=click.Path(exists=True))
+@opt_case
+@opt_generate_names
+@opt_sentences
+@click.option(
+    "--format",
+    "-f",
+    "formats",
+    type=click.Choice(["wdl", "cwl", "yml", "janis", "msgpack"]),
+    multiple=True,
+    default=("yml", "wdl", "cwl"),
+    help="The language in which to output the CLI wrapper",
+)
+@click.option(
+    "--out-dir",
+    "-o",
+    type=Path,
+    help="Directory in which to put the output files",
+    default=Path(),
+)
+@click.option(
+    "--depth",
+    "-d",
+    type=int,
+    default=1,
+    help="How many levels of subcommands to look for, for commands in a manifest",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    help="How many processes to use. Defaults to the number of CPUs",
+)
+@click.option(
+    "--log",
+    type=Path,
+    help="File that records the result of each command, which defaults to batch.jsonl in the output directory. "
+    "Commands that it records as converted are skipped, so an interrupted batch can be resumed",
+)
+@click.option(
+    "--retry-failed/--no-retry-failed",
+    default=True,
+    help="Whether to retry commands that the log records as failed",
+)
+def batch(
+    source: str,
+    out_dir: Path,
+    formats: Tuple[str],
+    case: str,
+    generate_names: bool,
+    sentences: str,
+    depth: int,
+    workers: int,
+    log: Path,
+    retry_failed: bool,
+):
+    if log is None:
+        log = out_dir / "batch.jsonl"
+    all_items = find_items(source)
+    items = pending_items(all_items, log, retry_failed=retry_failed)
+    options = BatchOptions(
+        out_dir=str(out_dir),
+        formats=tuple(formats),
+        case=case,
+        generate_names=generate_names,
+        sentences=sentences,
+        depth=depth,
+    )
+
+    failed = []
+    results = run_batch(items, options, max_workers=workers, log=log)
+    with click.progressbar(
+        results,
+        length=len(items),
+        label="Converting {} of {} commands".format(len(items), len(all_items)),
+        item_show_func=lambda result: result.item.key if result else None,
+        file=sys.stderr,
+    ) as bar:
+        for result in bar:
+            if not result.ok:
+                failed.append(result.item.key)
+
+    click.echo(
+        "Converted {} commands, {} failed. See {} for details".format(
+            len(items) - len(failed), len(failed), log
+        ),
+        err=True,
+    )
+
+
+@main.command(
+    name="corpus",
+    help="Pack many help texts into a single corpus file, which `aclimatise reanalyse` can parse quickly. Each SOURCE "
+    "is either a directory of help text files, laid out as for `aclimatise batch`, or a YAML or MessagePack command "
+    "tree, whose help texts are all added",
+)
+@click.argument("sources", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--output",
+    "-o",
+    type=Path,
+    required=True,
+    help="The corpus file to write. Its index is written alongside it, with an .idx suffix",
+)
+@click.option(
+    "--help-store",
+    type=click.Path(exists=True, file_okay=False),
+    help="The directory that the help texts of the command trees were moved to, by `aclimatise explore --help-store`",
+)
+def build_corpus(sources: Tuple[str], output: Path, help_store: Optional[str]):
+    count = write_corpus(
+        output,
+        (
+            entry
+            for source in sources
+            for entry in corpus_entries(source, help_store=help_store)
+        ),
+    )
+    click.echo("Wrote {} help texts to {}".format(count, output), err=True)
+
+
+@main.command(
+    help="Parse every help text in a corpus written by `aclimatise corpus` again, for example after upgrading "
+    "aCLImatise, and write the wrappers. The corpus is memory-mapped by a pool of processes, which each parse a chunk "
+    "of it at a time"
+)
+@click.argument("corpus", type=click.Path(exists=True))
+@opt_case
+@opt_generate_names
+@opt_sentences
+@click.option(
+    "--format",
+    "-f",
+    "formats",
+    type=click.Choice(["wdl", "cwl", "yml", "janis", "msgpack"]),
+    multiple=True,
+    default=("yml", "wdl", "cwl"),
+    help="The language in which to output the CLI wrapper",
+)
+@click.option(
+    "--out-dir",
+    "-o",
+    type=Path,
+    help="Directory in which to put the output files",
+    default=Path(),
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    help="How many processes to use. Defaults to the number of CPUs",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=64,
+    help="How many help texts each process parses at once",
+)
+def reanalyse(
+    corpus: str,
+    out_dir: Path,
+    formats: Tuple[str],
+    case: str,
+    generate_names: bool,
+    sentences: str,
+    workers: int,
+    chunk_size: int,
+):
+    converters = [
+        WrapperGenerator.choose_converter(format)(
+            generate_names=generate_names, case=case
+        )
+        for format in formats
+    ]
+    total = failed = 0
+    results = reanalyse_corpus(
+        corpus,
+        sentences=sentences,
+        out_dir=out_dir,
+        converters=converters,
+        max_workers=workers,
+        chunk_size=chunk_size,
+    )
+    for result in results:
+        total += 1
+        if not result.ok:
+            failed += 1
+            click.echo(
+                "Failed to parse {}: {}".format(
+                    " ".join(result.cmd), result.error.strip().splitlines()[-1]
+                ),
+                err=True,
+            )
+
+    click.echo("Reanalysed {} commands, {} failed".format(total, failed), err=True)
+
+
+@main.command(
+    help="Run a server that keeps the parsers and language models loaded, and converts commands sent as JSON. POST "
+    "to /parse_help, /explore or /save_to_string, with the same fields as `aclimatise pipe --jsonl`"
+)
+@click.option("--host", default="127.0.0.1", help="The address to listen on")
+@click.option("--port", "-p", type=int, default=8000, help="The port to listen on")
+@click.option(
+    "--socket",
+    type=click.Path(),
+    help="Listen on this Unix socket, rather than a TCP port",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    help="The number of processes that handle requests. Defaults to the number of CPUs",
+)
+@click.option(
+    "--queue-size",
+    type=int,
+    default=100,
+    help="The maximum number of requests in progress. Any more are rejected with a 503 status",
+)
+@click.option(
+    "--allow-explore",
+    is_flag=True,
+    help="Enable the /explore endpoint, which runs commands chosen by the client on this machine. Only use this if "
+    "you trust every client",
+)
+@click.option(
+    "--max-request-size",
+    type=int,
+    default=10 * 2 ** 20,
+    help="The largest request body, in bytes. Larger requests are rejected with a 413 status",
+)
+@click.option(
+    "--max-depth",
+    type=int,
+    default=2,
+    help="The deepest that /explore requests can explore subcommands. Deeper requests are reduced to this",
+)
+def serve(
+    host,
+    port,
+    socket,
+    workers,
+    queue_size,
+    allow_explore,
+    max_request_size,
+    max_depth,
+):
+    server = make_server(
+        host=host,
+        port=port,
+        socket=socket,
+        workers=workers,
+        queue_size=queue_size,
+        allow_explore=allow_explore,
+        max_request_size=max_request_size,
+        max_depth=max_depth,
+    )
+    click.echo(
+        "Listening on {}".format(socket or "http://{}:{}".format(host, port)),
+        err=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 @main.command(help="Output a representation of the internal grammar")
 def railroad():
     try:
@@ -1,23 +1,60 @@
 from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from itertools import groupby, zip_longest
 from os import PathLike
 from pathlib import Path
-from typing import Generator, Iterable, List, Set, TextIO, Tuple, Type
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Type,
+)
 
 import attr
 
+from aclimatise.cli_types import CliType
 from aclimatise.model import CliArgument, Command, Flag
 from aclimatise.name_generation import (
     NameGenerationError,
     choose_unique_name,
     generate_name,
-    generate_names_nlp,
+    generate_names_preprocessed,
     generate_names_segment,
     name_to_camel,
     name_to_snake,
+    preprocess_batch,
 )
 from aclimatise.yaml import AttrYamlMixin
 
+if TYPE_CHECKING:
+    from spacy.tokens import Token
+
+
+@contextmanager
+def naming_errors(cmd: Command):
+    """
+    Adds the command to the message of any :py:class:`NameGenerationError` raised while converting it
+    """
+    try:
+        yield
+    except NameGenerationError as e:
+        raise NameGenerationError(
+            'Name generation error for command "{}". {}'.format(
+                " ".join(cmd.command), e.message
+            )
+        )
+
 
 @attr.s(
     auto_attribs=True,
@@ -27,6 +64,105 @@ class NamedArgument(AttrYamlMixin):
     name: str
 
 
+class NameCache:
+    """
+    Stores the variable names chosen by :py:class:`WrapperGenerator`, so that several generators, such as one for each
+    output format, only need to name each command once. Names are keyed by everything that can change them: the
+    flags, and the reserved keywords of the language. The spaCy pre-processing is also kept, because it's the slowest
+    part of naming, and doesn't depend on the reserved keywords at all. Finally, since every format needs the type of
+    each argument, these are also inferred only once
+    """
+
+    def __init__(self):
+        #: The pre-processed tokens of each flag description
+        self._tokens: Dict[str, List["Token"]] = {}
+        #: The output of :py:func:`generate_names_preprocessed`, keyed by the descriptions and reserved keywords
+        self._nlp_names: Dict[
+            Tuple[Tuple[str, ...], FrozenSet[Tuple[str, ...]]], List[List[str]]
+        ] = {}
+        #: The words chosen for each flag, keyed by the flags and the reserved keywords
+        self._choices: Dict[Hashable, List[List[str]]] = {}
+        #: The type of each argument, keyed by its id. The argument is kept alongside its type, so that its id can't be
+        #: re-used by another object
+        self._types: Dict[int, Tuple[CliArgument, CliType]] = {}
+
+    def nlp_names(
+        self,
+        description_lists: List[List[str]],
+        reserved: Set[Tuple[str, ...]] = set(),
+    ) -> List[List[List[str]]]:
+        """
+        Like :py:func:`generate_names_nlp_batch`, but only generates names for the commands that aren't already cached,
+        and only pre-processes descriptions that haven't been seen before
+        :param description_lists: A list of flag descriptions for each command
+        :param reserved: Keywords that are not permitted to be used as the entire name
+        """
+        reserved_key = frozenset(reserved)
+        missing = [
+            descriptions
+            for descriptions in description_lists
+            if (tuple(descriptions), reserved_key) not in self._nlp_names
+        ]
+
+        # Pre-process every new description in a single batch
+        new_descriptions = list(
+            dict.fromkeys(
+                description
+                for descriptions in missing
+                for description in descriptions
+                if description not in self._tokens
+            )
+        )
+        if new_descriptions:
+            for description, tokens in zip(
+                new_descriptions, preprocess_batch(new_descriptions)
+            ):
+                self._tokens[description] = tokens
+
+        for descriptions in missing:
+            self._nlp_names[
+                tuple(descriptions), reserved_key
+            ] = generate_names_preprocessed(
+                [self._tokens[description] for description in descriptions],
+                reserved=reserved,
+            )
+
+        return [
+            self._nlp_names[tuple(descriptions), reserved_key]
+            for descriptions in description_lists
+        ]
+
+    def choices(
+        self, key: Hashable, choose: Callable[[], List[List[str]]]
+    ) -> List[List[str]]:
+        """
+        Returns the words chosen for a list of flags, calling ``choose`` to choose them if they aren't already cached
+        :param key: Everything that the choice depends on
+        """
+        if key not in self._choices:
+            self._choices[key] = choose()
+        return self._choices[key]
+
+    def arg_type(self, arg: CliArgument) -> CliType:
+        """
+        Returns the type of this argument, inferring it if this is the first time it's needed
+        """
+        cached = self._types.get(id(arg))
+        if cached is None or cached[0] is not arg:
+            cached = (arg, arg.get_type())
+            self._types[id(arg)] = cached
+        return cached[1]
+
+    def clear(self):
+        """
+        Removes every cached name and type
+        """
+        self._tokens.clear()
+        self._nlp_names.clear()
+        self._choices.clear()
+        self._types.clear()
+
+
 @attr.s(
     auto_attribs=True,
 )
@@ -69,6 +205,13 @@ class WrapperGenerator(AttrYamlMixin):
         """
         pass
 
+    def save_to_bytes(self, cmd: Command) -> bytes:
+        """
+        Convert the command into the contents of a file. By default this is the string from :py:meth:`save_to_string`,
+        encoded as UTF-8, but binary formats can override this
+        """
+        return self.save_to_string(cmd).encode("utf-8")
+
     def save_to_file(self, cmd: Command, path: Path) -> None:
         """
         Write the command into a file
@@ -80,18 +223,50 @@ class WrapperGenerator(AttrYamlMixin):
         self, cmd: Command, out_dir: PathLike
     ) -> Generator[Tuple[Path, Command], None, None]:
         out_dir = Path(out_dir)
-        for cmd in cmd.command_tree():
-            path = out_dir / (cmd.as_filename + self.suffix)
-            try:
-                self.save_to_file(cmd, path)
-            except NameGenerationError as e:
-                raise NameGenerationError(
-                    'Name generation error for command "{}". {}'.format(
-                        " ".join(cmd.command), e.message
-                    )
-                )
+        commands = list(cmd.command_tree())
+        # Without a shared cache, use a copy of this generator with a cache of its own, so that several trees can be
+        # generated at once
+        converter = (
+            self
+            if self.name_cache is not None
+            else attr.evolve(self, name_cache=NameCache())
+        )
+        converter.prepare_names(commands)
+        for cmd in commands:
+            path = out_dir / (cmd.as_filename + converter.suffix)
+            with naming_errors(cmd):
+                converter.save_to_file(cmd, path)
             yield path, cmd
 
+    @property
+    def names(self) -> NameCache:
+        """
+        The cache of variable names that this generator uses. If there's no :py:attr:`name_cache`, names aren't cached
+        at all
+        """
+        if self.name_cache is not None:
+            return self.name_cache
+        return NameCache()
+
+    def prepare_names(self, commands: Iterable[Command]):
+        """
+        Generates names for the arguments of many commands at once, which is much faster than naming them one command
+        at a time. These names are then used by :py:meth:`choose_variable_names`
+        """
+        self.names.nlp_names(
+            [
+                [flag.description for flag in self.command_arguments(cmd)]
+                for cmd in commands
+            ],
+            reserved=self.reserved,
+        )
+
+    def command_arguments(self, cmd: Command) -> List[CliArgument]:
+        """
+        Returns the arguments of this command that should be included in the wrapper
+        """
+        return [*cmd.named] + ([] if self.ignore_positionals else [*cmd.positional])
+
     @property
     def reserved(self) -> Set[Tuple[str, ...]]:
         """
@@ -106,6 +281,12 @@ class WrapperGenerator(AttrYamlMixin):
         Returns a suffix for files generated using this converter
         """
 
+    def arg_type(self, arg: CliArgument) -> CliType:
+        """
+        Returns the type of an argument, which is only inferred once if the name cache is shared
+        """
+        return self.names.arg_type(arg)
+
     def words_to_name(self, words: Iterable[str]):
         """
         Converts a list of tokens, such as ["a", "variable", "name"] to a language-appropriate name, such as
@@ -124,25 +305,36 @@ class WrapperGenerator(AttrYamlMixin):
         variable names otherwise
         :param length: See :py:func:`from aclimatise.name_generation.generate_name`
         """
-        options = list(
-            zip_longest(
-                generate_names_segment([flag.full_name() for flag in flags]),
-                generate_names_nlp(
-                    [flag.description for flag in flags], reserved=self.reserved
-                ),
-                [flag.argument_name() for flag in flags if isinstance(flag, Flag)],
+        reserved = self.reserved
+        descriptions = [flag.description for flag in flags]
+        full_names = [flag.full_name() for flag in flags]
+        argument_names = [
+            flag.argument_name() for flag in flags if isinstance(flag, Flag)
+        ]
+
+        # The names only depend on these, and not on the case, so they can be shared between output formats
+        key = (
+            tuple(descriptions),
+            tuple(full_names),
+            tuple(tuple(name) for name in argument_names),
+            frozenset(reserved),
+        )
+
+        def choose():
+            options = zip_longest(
+                generate_names_segment(full_names),
+                self.names.nlp_names([descriptions], reserved=reserved)[0],
+                argument_names,
                 fillvalue=[],
             )
-        )
+            return [
+                choose_unique_name(flag_options, reserved=reserved, number=i)
+                for i, flag_options in enumerate(options)
+            ]
 
         return [
-            NamedArgument(
-                arg=flag,
-                name=self.words_to_name(
-                    choose_unique_name(flag_options, reserved=self.reserved, number=i)
-                ),
-            )
-            for i, (flag, flag_options) in enumerate(zip(flags, options))
+            NamedArgument(arg=flag, name=self.words_to_name(words))
+            for flag, words in zip(flags, self.names.choices(key, choose))
         ]
 
     case: str = "snake"
@@ -161,3 +353,63 @@ class WrapperGenerator(AttrYamlMixin):
     Don't include positional arguments, for example because the help formatting has some
     misleading sections that look like positional arguments
     """
+
+    name_cache: Optional[NameCache] = attr.ib(default=None, repr=False, eq=False)
+    """
+    A cache of variable names that can be shared between several generators, for example one for each output format,
+    so that each command is only named once. If this isn't set, names are only cached during :py:meth:`generate_tree`
+    """
+
+
+def generate_trees(
+    cmd: Command,
+    out_dir: PathLike,
+    converters: Iterable[WrapperGenerator],
+    max_workers: int = 1,
+    buffer: Optional[int] = None,
+) -> Generator[Tuple[Path, Command], None, None]:
+    """
+    Like :py:meth:`WrapperGenerator.generate_tree`, but converts the command tree into several formats in a single pass.
+    The tree is only walked once, and the converters share a :py:class:`NameCache`, so each command's variable names
+    and argument types are only worked out once, rather than once per format. Files are written by a pool of threads,
+    while the next command is being converted. Yields the path of each file, and the command it contains, with one file
+    for each converter, for each command in the tree
+    :param converters: One converter for each output format. Converters that don't already have a ``name_cache`` are
+        copied, and the copies share a new one
+    :param max_workers: The number of threads that write files
+    :param buffer: The maximum number of files that are rendered but not yet written, which bounds the memory used.
+        Defaults to twice the number of threads
+    """
+    out_dir = Path(out_dir)
+    commands = list(cmd.command_tree())
+    name_cache = NameCache()
+    converters = [
+        converter
+        if converter.name_cache is not None
+        else attr.evolve(converter, name_cache=name_cache)
+        for converter in converters
+    ]
+    for converter in converters:
+        converter.prepare_names(commands)
+
+    if buffer is None:
+        buffer = 2 * max_workers
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Only the writes in this queue hold on to their rendered file, so once the queue is full, we wait for the
+        # oldest write before rendering the next file
+        writes = deque()
+        for command in commands:
+            for converter in converters:
+                path = out_dir / (command.as_filename + converter.suffix)
+                with naming_errors(command):
+                    data = converter.save_to_bytes(command)
+                writes.append((pool.submit(path.write_bytes, data), path, command))
+                if len(writes) >= buffer:
+                    write, written, written_command = writes.popleft()
+                    write.result()
+                    yield written, written_command
+
+        for write, path, command in writes:
+            write.result()
+            yield path, command
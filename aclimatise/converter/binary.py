@@ -0,0 +1,37 @@
+import base64
+from pathlib import Path
+
+import attr
+
+from aclimatise import binary
+from aclimatise.converter import WrapperGenerator
+from aclimatise.model import Command
+
+
+@attr.s(auto_attribs=True)
+class BinaryGenerator(WrapperGenerator):
+    """
+    Internal binary format, which is much faster to load and dump than the YML format. See :py:mod:`aclimatise.binary`
+    """
+
+    @property
+    def suffix(self) -> str:
+        return ".msgpack"
+
+    def prepare_names(self, commands):
+        # The binary output doesn't use variable names, so there's no need to generate them
+        pass
+
+    def save_to_bytes(self, cmd: Command) -> bytes:
+        return binary.dumps(cmd)
+
+    def save_to_file(self, cmd: Command, path: Path) -> None:
+        path.write_bytes(binary.dumps(cmd))
+
+    def save_to_string(self, cmd: Command) -> str:
+        # Strings can't hold binary data, so encode it as base64
+        return base64.b64encode(binary.dumps(cmd)).decode("ascii")
+
+    @classmethod
+    def format(cls) -> str:
+        return "msgpack"
@@ -1,6 +1,6 @@
 from io import StringIO
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import attr
 from cwl_utils.parser_v1_1 import (
@@ -16,7 +16,7 @@ from aclimatise import cli_types
 from aclimatise.cli_types import CliType
 from aclimatise.converter import NamedArgument, WrapperGenerator
 from aclimatise.model import CliArgument, Command, Flag, Positional
-from aclimatise.yaml import yaml
+from aclimatise.yaml import fast_dump
 
 
 @attr.s(auto_attribs=True)
@@ -58,11 +58,13 @@ class CwlGenerator(WrapperGenerator):
             raise Exception(f"Invalid type {typ}!")
 
     @staticmethod
-    def arg_to_cwl_type(arg: CliArgument) -> str:
+    def arg_to_cwl_type(arg: CliArgument, typ: Optional[CliType] = None) -> str:
         """
         Calculate the CWL type for an entire argument
+        :param typ: The type of the argument, if it's already known
         """
-        typ = arg.get_type()
+        if typ is None:
+            typ = arg.get_type()
         cwl_type = CwlGenerator.type_to_cwl_type(typ)
 
         if arg.optional and not cwl_type.endswith("[]"):
@@ -77,7 +79,7 @@ class CwlGenerator(WrapperGenerator):
             ret.append(
                 CommandInputParameter(
                     id="in_" + arg.name,
-                    type=self.arg_to_cwl_type(arg.arg),
+                    type=self.arg_to_cwl_type(arg.arg, self.arg_type(arg.arg)),
                     inputBinding=CommandLineBinding(
                         position=arg.arg.position
                         if isinstance(arg.arg, Positional)
@@ -103,12 +105,12 @@ class CwlGenerator(WrapperGenerator):
         ]
 
         for arg in names:
-            typ = arg.arg.get_type()
+            typ = self.arg_type(arg.arg)
             if isinstance(typ, cli_types.CliFileSystemType) and typ.output:
                 ret.append(
                     CommandOutputParameter(
                         id="out_" + arg.name,
-                        type=self.arg_to_cwl_type(arg.arg),
+                        type=self.arg_to_cwl_type(arg.arg, typ),
                         doc=arg.arg.description,
                         outputBinding=CommandOutputBinding(
                             glob="$(inputs.in_{})".format(arg.name)
@@ -121,10 +123,7 @@ class CwlGenerator(WrapperGenerator):
         """
         Outputs the CWL wrapper to the provided file
         """
-        inputs: List[CliArgument] = [*cmd.named] + (
-            [] if self.ignore_positionals else [*cmd.positional]
-        )
-        names = self.choose_variable_names(inputs)
+        names = self.choose_variable_names(self.command_arguments(cmd))
 
         hints = []
         if cmd.docker_image is not None:
@@ -147,10 +146,10 @@ class CwlGenerator(WrapperGenerator):
 
     def save_to_string(self, cmd: Command) -> str:
         io = StringIO()
-        yaml.dump(self.command_to_tool(cmd).save(), io)
+        fast_dump(self.command_to_tool(cmd).save(), io)
         return io.getvalue()
 
     def save_to_file(self, cmd: Command, path: Path) -> None:
         map = self.command_to_tool(cmd).save()
         with path.open("w") as fp:
-            yaml.dump(map, fp)
+            fast_dump(map, fp)
@@ -19,10 +19,7 @@ class JanisGenerator(WrapperGenerator):
 
     def command_to_tool(self, cmd: Command) -> janis.CommandToolBuilder:
 
-        inputs: List[CliArgument] = [*cmd.named] + (
-            [] if self.ignore_positionals else [*cmd.positional]
-        )
-        names = self.choose_variable_names(inputs)
+        names = self.choose_variable_names(self.command_arguments(cmd))
 
         tool = janis.CommandToolBuilder(
             tool=cmd.as_filename,
@@ -66,7 +63,7 @@ class JanisGenerator(WrapperGenerator):
             raise Exception(f"Invalid type {typ}!")
 
     def arg_to_janis_type(self, arg: CliArgument) -> janis.DataType:
-        return self.type_to_janis_type(arg.get_type(), arg.optional)
+        return self.type_to_janis_type(self.arg_type(arg), arg.optional)
 
     def get_inputs(self, names: List[NamedArgument]) -> List[janis.ToolInput]:
         ret = []
@@ -90,7 +87,7 @@ class JanisGenerator(WrapperGenerator):
     def get_outputs(self, names: List[NamedArgument]) -> List[janis.ToolOutput]:
         ret = []
         for arg in names:
-            typ = arg.arg.get_type()
+            typ = self.arg_type(arg.arg)
             if isinstance(typ, cli_types.CliFileSystemType) and typ.output:
                 ret.append(
                     janis.ToolOutput(
@@ -20,7 +20,7 @@ from wdlgen import (
 from aclimatise import cli_types, model
 from aclimatise.converter import NamedArgument, WrapperGenerator
 from aclimatise.model import CliArgument, Command, Flag, Positional
-from aclimatise.nlp import wordsegment
+from aclimatise.nlp import segment
 
 #: A regex, borrowed from MiniWDL, that ma
 WDL_IDENT = re.compile(r"[a-zA-Z][a-zA-Z0-9_]*")
@@ -66,7 +66,7 @@ class WdlGenerator(WrapperGenerator):
     @property
     def reserved(self) -> Set[Tuple[str, ...]]:
         # Steal the keywords list from miniWDL
-        return {tuple(wordsegment.segment(key)) for key in keywords["1.0"]}
+        return {tuple(segment(key)) for key in keywords["1.0"]}
 
     @classmethod
     def format(cls) -> str:
@@ -115,7 +115,7 @@ class WdlGenerator(WrapperGenerator):
         return [
             Input(
                 data_type=self.type_to_wdl(
-                    named_arg.arg.get_type(), optional=named_arg.arg.optional
+                    self.arg_type(named_arg.arg), optional=named_arg.arg.optional
                 ),
                 name=named_arg.name,
             )
@@ -157,7 +157,7 @@ class WdlGenerator(WrapperGenerator):
             Output(data_type=File, name="out_stdout", expression="stdout()")
         ]
         for arg in names:
-            typ = arg.arg.get_type()
+            typ = self.arg_type(arg.arg)
             if isinstance(typ, cli_types.CliFileSystemType) and typ.output:
                 ret.append(
                     Output(
@@ -170,10 +170,7 @@ class WdlGenerator(WrapperGenerator):
         return ret
 
     def save_to_string(self, cmd: Command) -> str:
-        inputs: List[CliArgument] = [*cmd.named] + (
-            [] if self.ignore_positionals else [*cmd.positional]
-        )
-        names = self.choose_variable_names(inputs)
+        names = self.choose_variable_names(self.command_arguments(cmd))
         runtime = Task.Runtime()
         runtime.add_docker(cmd.docker_image)
 
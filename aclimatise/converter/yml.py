@@ -1,13 +1,14 @@
 from io import StringIO
 from os import PathLike
 from pathlib import Path
-from typing import Generator, List
+from typing import Generator, Iterable, List, Optional
 
 import attr
 
 from aclimatise.converter import WrapperGenerator
+from aclimatise.help_store import HelpStore
 from aclimatise.model import Command
-from aclimatise.yaml import yaml
+from aclimatise.yaml import fast_dump
 
 
 @attr.s(auto_attribs=True)
@@ -16,17 +17,27 @@ class YmlGenerator(WrapperGenerator):
     Internal YML format
     """
 
+    help_store: Optional[HelpStore] = None
+    """
+    If set, help texts are moved into this store, and the YAML only contains their digests, which makes it much
+    smaller. Load the YAML inside :py:func:`aclimatise.help_store.use_help_store` to read the help texts back
+    """
+
     @property
     def suffix(self) -> str:
         return ".yml"
 
     def save_to_file(self, cmd: Command, path: Path) -> None:
         with path.open("w") as fp:
-            yaml.dump(cmd, fp)
+            fast_dump(cmd, fp, help_store=self.help_store)
+
+    def prepare_names(self, commands: Iterable[Command]):
+        # The YAML output doesn't use variable names, so there's no need to generate them
+        pass
 
     def save_to_string(self, cmd: Command) -> str:
         buffer = StringIO()
-        yaml.dump(cmd, buffer)
+        fast_dump(cmd, buffer, help_store=self.help_store)
         return buffer.getvalue()
 
     @classmethod
@@ -0,0 +1,458 @@
+"""
+A corpus format for storing a large archive of help texts, so that they can all be parsed again quickly, for example
+after upgrading aCLImatise. The help texts are concatenated into a single data file, which is memory-mapped when it is
+read, and an index file records where each one starts. Reading an entry only touches the pages that contain it, so a
+pool of processes can work through the corpus in chunks, each process sharing the operating system's page cache rather
+than holding its own copy of the archive
+"""
+import mmap
+import os
+import struct
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from os import PathLike
+from pathlib import Path
+from typing import Deque, Generator, Iterable, List, Optional, Sequence, Tuple
+
+import attr
+
+from aclimatise.batch import find_items, preload
+from aclimatise.converter import WrapperGenerator, generate_trees
+from aclimatise.help_store import HelpStore, use_help_store
+from aclimatise.integration import parse_help, parse_help_batch
+from aclimatise.model import Command
+from aclimatise.nlp import SentenceBackend, SentenceClassifier
+
+#: Identifies the data and index files, followed by a version number byte
+MAGIC = b"ACLCORPUS"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+
+#: Each index record contains the offset of an entry in the data file, the length of its command, and the length of
+#: its help text, all in bytes
+RECORD = struct.Struct("<QII")
+
+#: Separates the words of a command in the data file
+SEPARATOR = b"\0"
+
+
+def index_path(path: PathLike) -> Path:
+    """
+    Returns the path of the index file that belongs to a corpus
+    """
+    path = Path(path)
+    return path.with_name(path.name + ".idx")
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class CorpusEntry:
+    """
+    A single help text in a :py:class:`Corpus`
+    """
+
+    #: The command, e.g. ``("bwa", "mem")``
+    command: Tuple[str, ...]
+    #: The UTF-8 encoded help text. This is a view into the memory-mapped corpus, rather than a copy
+    data: memoryview
+
+    @property
+    def help_text(self) -> str:
+        """
+        The decoded help text
+        """
+        return str(self.data, "utf-8", errors="replace")
+
+
+class CorpusWriter:
+    """
+    Writes a corpus one entry at a time, so that it never has to hold more than one help text in memory. Use this as a
+    context manager, or call :py:meth:`close` once every entry is added
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self._data = self.path.open("wb")
+        self._index = index_path(self.path).open("wb")
+        self._data.write(HEADER)
+        self._index.write(HEADER)
+        self._offset = len(HEADER)
+        self.count = 0
+
+    def add(self, command: Sequence[str], help_text: str):
+        """
+        Adds a help text to the corpus
+        :param command: The command, e.g. ``["bwa", "mem"]``
+        """
+        cmd = SEPARATOR.join(word.encode("utf-8") for word in command)
+        text = help_text.encode("utf-8", errors="replace")
+        self._data.write(cmd)
+        self._data.write(text)
+        self._index.write(RECORD.pack(self._offset, len(cmd), len(text)))
+        self._offset += len(cmd) + len(text)
+        self.count += 1
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Corpus:
+    """
+    Reads a corpus written by :py:class:`CorpusWriter`. The data and index files are memory-mapped, so opening a corpus
+    is instant, whatever its size, and each entry is only read from disk when it is accessed. Use this as a context
+    manager, or call :py:meth:`close` when finished
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self._data = self._map(self.path)
+        self._index = self._map(index_path(self.path))
+
+        size = len(self._index) - len(HEADER)
+        if size % RECORD.size != 0:
+            raise ValueError("The corpus index {} is truncated".format(self.path))
+        self._length = size // RECORD.size
+        if self._length > 0:
+            offset, cmd_length, text_length = self._record(self._length - 1)
+            if offset + cmd_length + text_length > len(self._data):
+                raise ValueError("The corpus {} is truncated".format(self.path))
+
+    @staticmethod
+    def _map(path: Path) -> mmap.mmap:
+        with path.open("rb") as fp:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[: len(MAGIC)] != MAGIC:
+            data.close()
+            raise ValueError("{} is not an aCLImatise corpus".format(path))
+        if data[len(MAGIC)] != VERSION:
+            version = data[len(MAGIC)]
+            data.close()
+            raise ValueError("Unsupported corpus version {}".format(version))
+        return data
+
+    def _record(self, index: int) -> Tuple[int, int, int]:
+        return RECORD.unpack_from(self._index, len(HEADER) + index * RECORD.size)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def command(self, index: int) -> Tuple[str, ...]:
+        """
+        Returns the command of an entry, without reading its help text
+        """
+        offset, cmd_length, text_length = self._record(self._check(index))
+        return tuple(
+            word.decode("utf-8")
+            for word in self._data[offset : offset + cmd_length].split(SEPARATOR)
+        )
+
+    def __getitem__(self, index: int) -> CorpusEntry:
+        index = self._check(index)
+        offset, cmd_length, text_length = self._record(index)
+        start = offset + cmd_length
+        return CorpusEntry(
+            command=self.command(index),
+            data=memoryview(self._data)[start : start + text_length],
+        )
+
+    def _check(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Corpus index out of range")
+        return index
+
+    def entries(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> Generator[CorpusEntry, None, None]:
+        """
+        Yields the entries from ``start`` up to, but not including, ``stop``
+        """
+        if stop is None:
+            stop = self._length
+        for index in range(start, min(stop, self._length)):
+            yield self[index]
+
+    def __iter__(self):
+        return self.entries()
+
+    def close(self):
+        for data in (self._data, self._index):
+            try:
+                data.close()
+            except BufferError:
+                # An entry is still using the data. It will be unmapped once that entry is garbage collected
+                pass
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def corpus_entries(
+    source: PathLike,
+    help_store: Optional[PathLike] = None,
+) -> Generator[Tuple[Tuple[str, ...], str], None, None]:
+    """
+    Yields the (command, help text) pairs found in a source, to be added to a corpus
+    :param source: Either a directory of help text files, laid out as described in
+        :py:func:`aclimatise.batch.find_items`, or a command tree in YAML or MessagePack format, in which case the help
+        text of every command in the tree that has one is yielded
+    :param help_store: The directory of the :py:class:`aclimatise.help_store.HelpStore` that a command tree's help
+        texts were moved to, e.g. by ``aclimatise explore --help-store``
+    """
+    source = Path(source)
+    if source.is_dir():
+        for item in find_items(source):
+            with open(item.help_file, encoding="utf-8", errors="replace") as fp:
+                yield item.command, fp.read()
+        return
+
+    store = HelpStore(help_store) if help_store is not None else None
+    with use_help_store(store) if store is not None else nullcontext():
+        if source.suffix == ".msgpack":
+            from aclimatise import binary
+
+            with source.open("rb") as fp:
+                tree = binary.load(fp)
+        else:
+            from aclimatise.yaml import yaml
+
+            with source.open() as fp:
+                tree = yaml.load(fp)
+    for command in tree.command_tree():
+        if command.help_text:
+            yield tuple(command.command), command.help_text
+
+
+def write_corpus(path: PathLike, entries: Iterable[Tuple[Sequence[str], str]]) -> int:
+    """
+    Writes a corpus, returning the number of entries in it
+    :param entries: (command, help text) pairs, such as those from :py:func:`corpus_entries`
+    """
+    with CorpusWriter(path) as writer:
+        for command, help_text in entries:
+            writer.add(command, help_text)
+    return writer.count
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class CorpusResult:
+    """
+    The outcome of parsing a single corpus entry
+    """
+
+    #: The position of the entry in the corpus
+    index: int
+    #: The command, e.g. ``("bwa", "mem")``
+    cmd: Tuple[str, ...]
+    #: The parsed command, unless the wrappers were written to files instead
+    command: Optional[Command] = None
+    #: The paths of the wrappers that were written
+    files: List[str] = attr.ib(factory=list)
+    #: If parsing failed, a description of the error
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+#: The corpus opened by each worker process
+_worker_corpus: Optional[Corpus] = None
+
+
+def _init_worker(path: str):
+    global _worker_corpus
+    preload()
+    _worker_corpus = Corpus(path)
+
+
+def _finish(
+    index: int,
+    command: Command,
+    out_dir: Optional[str],
+    converters: Sequence[WrapperGenerator],
+) -> CorpusResult:
+    cmd = tuple(command.command)
+    if out_dir is None:
+        return CorpusResult(index=index, cmd=cmd, command=command)
+    files = [str(path) for path, _ in generate_trees(command, out_dir, converters)]
+    return CorpusResult(index=index, cmd=cmd, files=files)
+
+
+def reanalyse_chunk(
+    corpus: Optional[Corpus],
+    start: int,
+    stop: int,
+    sentences: str = "spacy",
+    out_dir: Optional[str] = None,
+    converters: Sequence[WrapperGenerator] = (),
+) -> List[CorpusResult]:
+    """
+    Parses the entries from ``start`` up to, but not including, ``stop``. The flag descriptions of the whole chunk are
+    classified together, using :py:func:`aclimatise.integration.parse_help_batch`. Any error is caught and returned in
+    the result, so that one bad entry doesn't stop the others
+    :param corpus: The corpus to read. In a worker process started by :py:func:`reanalyse_corpus`, this is ``None``,
+        and the worker's own memory map is used
+    :param out_dir: If this is set, each command is written here in the format of each converter, rather than being
+        returned
+    """
+    if corpus is None:
+        corpus = _worker_corpus
+    backend = SentenceBackend.choose_backend(sentences)
+    entries = list(corpus.entries(start, stop))
+    try:
+        # The help texts are only decoded here, and each is released as soon as its chunk is done. The parse cache is
+        # skipped, since the whole point is to parse everything again, and it would otherwise fill up with the corpus
+        commands = parse_help_batch(
+            [(entry.command, entry.help_text) for entry in entries],
+            cache=None,
+            sentence_backend=backend(),
+        )
+    except Exception:
+        # Find out which entries are at fault, by parsing them one at a time
+        commands = [None] * len(entries)
+
+    results = []
+    for index, entry, command in zip(range(start, stop), entries, commands):
+        try:
+            if command is None:
+                command = parse_help(
+                    entry.command,
+                    entry.help_text,
+                    cache=None,
+                    sentences=SentenceClassifier(backend()),
+                )
+            results.append(_finish(index, command, out_dir, converters))
+        except Exception:
+            results.append(
+                CorpusResult(
+                    index=index, cmd=entry.command, error=traceback.format_exc()
+                )
+            )
+    return results
+
+
+def reanalyse_corpus(
+    path: PathLike,
+    sentences: str = "spacy",
+    out_dir: Optional[PathLike] = None,
+    converters: Sequence[WrapperGenerator] = (),
+    max_workers: Optional[int] = 1,
+    chunk_size: int = 64,
+    buffer: Optional[int] = None,
+) -> Generator[CorpusResult, None, None]:
+    """
+    Parses every help text in a corpus, and yields the results in the same order as the corpus. Only the positions of
+    each chunk are sent to the worker processes, which read the help texts from their own memory map of the corpus.
+    If a worker dies, e.g. because it runs out of memory, only the chunk that it died on fails
+    :param sentences: The name of the sentence backend, see :py:meth:`aclimatise.nlp.SentenceBackend.choose_backend`
+    :param out_dir: If this is set, the worker processes write each command here in the format of each converter, and
+        the results only contain the paths of the files, which keeps the memory used by a large corpus small
+    :param converters: The converters used to write each command, if ``out_dir`` is set
+    :param max_workers: The number of processes. If this is 1, the entries are parsed in this process. If this is
+        ``None``, it defaults to the number of CPUs
+    :param chunk_size: The number of entries each process parses at once
+    :param buffer: The maximum number of chunks that are being parsed, or are parsed but not yet yielded. Defaults to
+        twice the number of workers
+    """
+    path = str(path)
+    if out_dir is not None:
+        out_dir = str(out_dir)
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    with Corpus(path) as corpus:
+        chunks = [
+            (start, min(start + chunk_size, len(corpus)))
+            for start in range(0, len(corpus), chunk_size)
+        ]
+        if max_workers == 1:
+            for start, stop in chunks:
+                yield from reanalyse_chunk(
+                    corpus, start, stop, sentences, out_dir, converters
+                )
+            return
+
+        # Load the models before creating the pool, so that forked worker processes share them
+        preload()
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if buffer is None:
+            buffer = 2 * max_workers
+        pool = _corpus_pool(path, max_workers)
+        try:
+            pending: Deque = deque()
+            chunks = iter(chunks)
+            while True:
+                for start, stop in chunks:
+                    args = (None, start, stop, sentences, out_dir, converters)
+                    try:
+                        future = pool.submit(reanalyse_chunk, *args)
+                    except BrokenProcessPool:
+                        # A worker died, which breaks the pool. The rest of the corpus is parsed by a new pool
+                        pool.shutdown()
+                        pool = _corpus_pool(path, max_workers)
+                        future = pool.submit(reanalyse_chunk, *args)
+                    pending.append((future, start, stop))
+                    if len(pending) >= buffer:
+                        break
+                if not pending:
+                    break
+
+                future, start, stop = pending.popleft()
+                try:
+                    yield from future.result()
+                except BrokenProcessPool:
+                    # A worker died without raising an exception, e.g. because it ran out of memory, and every
+                    # chunk that the pool hadn't finished failed with it
+                    yield from _retry_chunk(
+                        corpus, start, stop, sentences, out_dir, converters
+                    )
+        finally:
+            pool.shutdown()
+
+
+def _corpus_pool(path: str, max_workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(path,)
+    )
+
+
+def _retry_chunk(
+    corpus: Corpus,
+    start: int,
+    stop: int,
+    sentences: str,
+    out_dir: Optional[str],
+    converters: Sequence[WrapperGenerator],
+) -> List[CorpusResult]:
+    """
+    Parses a chunk again, after the pool it was sent to broke, in a worker process of its own. If this chunk is the
+    one that killed the worker, only its entries fail
+    """
+    with _corpus_pool(str(corpus.path), 1) as pool:
+        try:
+            return pool.submit(
+                reanalyse_chunk, None, start, stop, sentences, out_dir, converters
+            ).result()
+        except BrokenProcessPool as e:
+            return [
+                CorpusResult(
+                    index=index,
+                    cmd=corpus.command(index),
+                    error="Worker process died: {}".format(e),
+                )
+                for index in range(start, stop)
+            ]
@@ -2,9 +2,12 @@
 This module is concerned with running the actual commands so that we can parse their output
 """
 import abc
-from typing import List, Optional
+import shutil
+from typing import Any, Awaitable, Callable, List, Optional
 
+from aclimatise.execution.cache import ExecutionCache
 from aclimatise.model import Command
+from aclimatise.nlp import SentenceBackend
 
 
 class Executor(abc.ABC):
@@ -14,17 +17,28 @@ class Executor(abc.ABC):
     """
 
     def __init__(
-        self, timeout: int = 10, raise_on_timout=False, max_length: Optional[int] = 1000
+        self,
+        timeout: int = 10,
+        raise_on_timout=False,
+        max_length: Optional[int] = 1000,
+        cache: Optional[ExecutionCache] = None,
+        sentence_backend: Optional[SentenceBackend] = None,
     ):
         """
         :param timeout: Amount of inactivity before the execution will be killed
         :param raise_on_timout: If true, execute will raise a TimeoutError if it
             times out
+        :param cache: If provided, the output of each execution is stored in this cache, and re-used for as long as
+            the executable being run hasn't changed
+        :param sentence_backend: The method used to decide which flag descriptions are sentences. Defaults to using
+            spaCy, which is the most accurate
         """
         # Here we initialise all shared parameters that are used by all executors
         self.timeout = timeout
         self.raise_on_timeout = raise_on_timout
         self.max_length = max_length
+        self.cache = cache
+        self.sentence_backend = sentence_backend
 
     def handle_timeout(self, e: Exception) -> str:
         """
@@ -36,6 +50,85 @@ class Executor(abc.ABC):
         else:
             return ""
 
+    def binary_identity(self, command: List[str]) -> Optional[str]:
+        """
+        Returns a string that identifies the executable that would be run by this command, and which changes whenever
+        that executable changes. This is used to key the execution cache. Returns None if the executable can't be
+        identified, in which case the output won't be cached
+        """
+        return None
+
+    def local_binary_identity(
+        self, command: List[str], path: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        A :py:meth:`binary_identity` implementation for executables that are on this machine
+
+        :param path: The PATH to search for the executable, defaulting to the current PATH
+        """
+        if len(command) == 0:
+            return None
+
+        binary = shutil.which(command[0], path=path)
+        if binary is None:
+            return None
+        return self.cache.identify_file(binary)
+
+    def cache_settings(self) -> Any:
+        """
+        Returns any settings of this executor that can change the output of a command, such as its environment. These
+        are included in the cache key, so that changing them doesn't re-use output from the old settings
+        """
+        return None
+
+    def _cache_key(self, command: List[str], *variant: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+
+        identity = self.binary_identity(command)
+        if identity is None:
+            return None
+        return self.cache.key(
+            type(self).__name__, identity, command, variant, self.cache_settings()
+        )
+
+    def cached(self, command: List[str], run: Callable[[], str], *variant: str) -> str:
+        """
+        Returns the cached output of this command, if it's available, otherwise calls ``run`` to execute the command,
+        and caches its output
+
+        :param variant: Any additional strings that change the output of this command, and should therefore be
+            included in the cache key
+        """
+        key = self._cache_key(command, *variant)
+        if key is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+
+        output = run()
+        # An empty output might mean the command timed out, so it's worth trying again next time
+        if key is not None and output:
+            self.cache.put(key, output)
+        return output
+
+    async def cached_async(
+        self, command: List[str], run: Callable[[], Awaitable[str]], *variant: str
+    ) -> str:
+        """
+        The asynchronous equivalent of :py:meth:`cached`
+        """
+        key = self._cache_key(command, *variant)
+        if key is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+
+        output = await run()
+        if key is not None and output:
+            self.cache.put(key, output)
+        return output
+
     def explore(
         self,
         command: List[str],
@@ -0,0 +1,183 @@
+"""
+A persistent cache for the output of executed help commands, so that commands don't need to be run again while the
+executable they invoke hasn't changed
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from os import PathLike
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the default directory in which to store cached help output
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(root) / "aclimatise" / "executions"
+
+
+class ExecutionCache:
+    """
+    Stores the raw output of executions on disk, keyed by the identity of the executable, and the arguments used to
+    run it. When the cache grows larger than its maximum size, the least recently used entries are evicted
+    """
+
+    def __init__(
+        self,
+        path: Optional[PathLike] = None,
+        max_size: int = 100 * 1024 ** 2,
+        hash_binaries: bool = False,
+    ):
+        """
+        :param path: Directory in which to store the cache. Defaults to ``$XDG_CACHE_HOME/aclimatise/executions``
+        :param max_size: Maximum total size of the cache, in bytes
+        :param hash_binaries: If true, identify executables by hashing their contents. Otherwise executables are
+            identified by their path, size and modification time, which is much faster
+        """
+        self.path = Path(path) if path is not None else default_cache_dir()
+        self.max_size = max_size
+        self.hash_binaries = hash_binaries
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def identify_file(self, path: PathLike) -> str:
+        """
+        Returns a string that identifies the contents of the given file, which will change if the file is modified
+        """
+        real = os.path.realpath(path)
+        stat = os.stat(real)
+        if not self.hash_binaries:
+            return "{}:{}:{}".format(real, stat.st_size, stat.st_mtime_ns)
+
+        # Hashing is slow, so only hash each version of each file once
+        stat_key = (real, stat.st_size, stat.st_mtime_ns)
+        if stat_key not in self._hashes:
+            digest = hashlib.sha256()
+            with open(real, "rb") as fp:
+                for chunk in iter(lambda: fp.read(1024 ** 2), b""):
+                    digest.update(chunk)
+            self._hashes[stat_key] = digest.hexdigest()
+        return self._hashes[stat_key]
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Converts any JSON-serializable values into a cache key. Other values are converted using their ``repr``
+        """
+        return hashlib.sha256(
+            json.dumps(parts, sort_keys=True, default=repr).encode()
+        ).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def _entries(self) -> Iterable[Tuple[os.stat_result, Path]]:
+        if not self.path.exists():
+            return
+        for entry in self.path.glob("*/*"):
+            # Temporary files start with a dot, and should be left alone
+            if entry.name.startswith("."):
+                continue
+            try:
+                yield entry.stat(), entry
+            except FileNotFoundError:
+                # Another process may have removed this entry already
+                continue
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached output for this key, or None if it isn't cached
+        """
+        entry = self._entry(key)
+        try:
+            value = entry.read_text(encoding="utf-8")
+            # Record that this entry was used recently
+            os.utime(entry)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns True if there is cached output for this key, without reading it
+        """
+        return self._entry(key).exists()
+
+    def put(self, key: str, value: str):
+        """
+        Stores output in the cache, evicting old entries if the cache is too large
+        """
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        data = value.encode("utf-8")
+
+        # Write to a temporary file first, so that readers never see a partial entry
+        fd, temp = tempfile.mkstemp(dir=str(entry.parent), prefix=".")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+
+        with self._lock:
+            # Find the size before replacing the entry, since the first call to size() scans the directory, which
+            # would otherwise count the new entry twice
+            size = self.size()
+            try:
+                previous = entry.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            os.replace(temp, str(entry))
+            self._size = size + len(data) - previous
+            if self._size > self.max_size:
+                self._evict()
+
+    def invalidate(self, key: str):
+        """
+        Removes a single entry from the cache, if it exists
+        """
+        entry = self._entry(key)
+        with self._lock:
+            try:
+                size = entry.stat().st_size
+                entry.unlink()
+                if self._size is not None:
+                    self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """
+        Removes every entry from the cache
+        """
+        with self._lock:
+            for stat, entry in list(self._entries()):
+                self._unlink(entry)
+            self._size = 0
+
+    def size(self) -> int:
+        """
+        Returns the total size of the cache entries, in bytes
+        """
+        if self._size is None:
+            self._size = sum(stat.st_size for stat, entry in self._entries())
+        return self._size
+
+    def _evict(self):
+        # Remove the least recently used entries until we're within the limit
+        entries = sorted(self._entries(), key=lambda pair: pair[0].st_mtime)
+        self._size = sum(stat.st_size for stat, entry in entries)
+        for stat, entry in entries:
+            if self._size <= self.max_size:
+                break
+            self._unlink(entry)
+            self._size -= stat.st_size
+
+    @staticmethod
+    def _unlink(entry: Path):
+        try:
+            entry.unlink()
+        except FileNotFoundError:
+            pass
@@ -2,7 +2,7 @@ import select
 import socket
 import time
 from select import select as original_select
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from unittest.mock import patch
 
 from docker.utils.socket import consume_socket_output, demux_adaptor, frames_iter
@@ -53,16 +53,19 @@ class DockerExecutor(CliHelpExecutor):
         self.container = container
         self.save_image = save_image
 
-    def convert(
-        self,
-        cmd: List[str],
+    def _choose_best(
+        self, cmd: List[str], flags: List[List[str]], outputs: List[Optional[str]]
     ) -> Command:
-        # Use the existing function, but patch in the docker image
-        cmd = super().convert(cmd)
+        # Use the existing function, but patch in the docker image. This applies to both convert and convert_async
+        cmd = super()._choose_best(cmd, flags, outputs)
         if self.save_image:
             cmd.docker_image = self.container.image.tags[0]
         return cmd
 
+    def binary_identity(self, command: List[str]) -> Optional[str]:
+        # The image determines every executable in the container
+        return self.container.image.id
+
     def execute(self, command: List[str]) -> str:
         _, sock = self.container.exec_run(
             command, stdout=True, stderr=True, demux=True, socket=True
@@ -1,16 +1,25 @@
 import abc
+import asyncio
 import copy
 import logging
-from typing import Iterable, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
 
 from pyparsing import ParseBaseException
 
 from aclimatise.execution import Executor
 from aclimatise.integration import parse_help
 from aclimatise.model import Command
+from aclimatise.nlp import SentenceClassifier
 
 logger = logging.getLogger()
 
+T = TypeVar("T")
+U = TypeVar("U")
+
 
 class CliHelpExecutor(Executor):
     """
@@ -22,11 +31,154 @@ class CliHelpExecutor(Executor):
         self,
         flags: Iterable[str] = (["--help"], ["-h"], [], ["--usage"]),
         try_subcommand_flags=True,
+        max_workers: int = 1,
+        explore_timeout: Optional[float] = None,
         **kwargs
     ):
+        """
+        :param flags: A list of help flags to try, e.g. ['--help', '-h'], in order how which one you would prefer to
+            use. Generally [] aka no flags should be last
+        :param try_subcommand_flags: If true, try all the help flags on each subcommand, otherwise only use the flag
+            that worked best for the parent command
+        :param max_workers: The maximum number of commands to execute concurrently, across all help flags and sibling
+            subcommands. The default of 1 executes everything in series
+        :param explore_timeout: If provided, the maximum number of seconds that a call to :py:meth:`explore` may take
+            in total. Once this has elapsed, any remaining executions are treated as having timed out
+        """
         super().__init__(**kwargs)
         self.flags = flags
         self.try_subcommand_flags = try_subcommand_flags
+        self.max_workers = max_workers
+        self.explore_timeout = explore_timeout
+        # These are shared between the copies of this executor that are made for each subcommand
+        self._execute_slots = threading.BoundedSemaphore(max_workers)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._deadline: Optional[float] = None
+
+    def _map(self, func: Callable[[T], U], items: List[T]) -> List[U]:
+        """
+        Applies ``func`` to each item, concurrently if this executor has more than one worker. The results are always
+        returned in the same order as ``items``, regardless of which finishes first
+        """
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(func, items))
+
+    def _with_deadline(self) -> "CliHelpExecutor":
+        """
+        Returns a copy of this executor whose exploration deadline starts now
+        """
+        executor = copy.copy(self)
+        if self.explore_timeout is not None:
+            executor._deadline = time.monotonic() + self.explore_timeout
+        return executor
+
+    def _within_deadline(self, command: List[str]) -> Optional["CliHelpExecutor"]:
+        """
+        Returns an executor that can be used to run ``command`` without exceeding the exploration deadline, or None if
+        the deadline has already passed
+        """
+        if self._deadline is None:
+            return self
+
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            logger.info(
+                "Exploration time limit reached, skipping {}".format(" ".join(command))
+            )
+            return None
+        if remaining < self.timeout:
+            # Don't let this one execution run past the deadline
+            executor = copy.copy(self)
+            executor.timeout = remaining
+            return executor
+        return self
+
+    def _execute_bounded(self, command: List[str]) -> Optional[str]:
+        """
+        Calls :py:meth:`execute`, while respecting the cache, the worker limit and the exploration deadline. Returns
+        None if the output can't be decoded
+        """
+
+        def run():
+            executor = self._within_deadline(command)
+            if executor is None:
+                return self.handle_timeout(TimeoutError())
+
+            with self._execute_slots:
+                try:
+                    return executor.execute(command)
+                except UnicodeDecodeError:
+                    return None
+
+        return self.cached(command, run)
+
+    async def _execute_bounded_async(self, command: List[str]) -> Optional[str]:
+        """
+        The asynchronous equivalent of :py:meth:`_execute_bounded`
+        """
+
+        async def run():
+            executor = self._within_deadline(command)
+            if executor is None:
+                return self.handle_timeout(TimeoutError())
+
+            async with self._async_slots:
+                try:
+                    return await executor.execute_async(command)
+                except UnicodeDecodeError:
+                    return None
+
+        return await self.cached_async(command, run)
+
+    def _child_executor(self, best: Command) -> "CliHelpExecutor":
+        """
+        Returns the executor that should be used to explore the subcommands of ``best``
+        """
+        # By default we use the best parent help-flag
+        child_executor = copy.copy(self)
+        child_executor.flags = (
+            self.flags if self.try_subcommand_flags else [best.generated_using]
+        )
+        return child_executor
+
+    @staticmethod
+    def _is_subcommand(best: Command, parent: Optional[Command]) -> bool:
+        """
+        Returns true if ``best`` should be kept as the subcommand of ``parent``
+        """
+        if not parent:
+            return True
+
+        if best.valid_subcommand():
+            logger.info(
+                "{} seems to be a valid subcommand".format(" ".join(best.command))
+            )
+            return True
+        else:
+            logger.info(
+                "{} does not seem to be a valid subcommand".format(
+                    " ".join(best.command)
+                )
+            )
+            return False
+
+    @staticmethod
+    def _subcommand_candidates(best: Command) -> List[str]:
+        """
+        Returns each *unique* positional, in the order they were first documented
+        """
+        return list(dict.fromkeys(positional.name for positional in best.positional))
+
+    @staticmethod
+    def _add_subcommands(best: Command, subcommands: List[Optional[Command]]):
+        found = [subcommand for subcommand in subcommands if subcommand is not None]
+        if len(found) > 0:
+            best.subcommands.extend(found)
+            # If we had any subcommands then we probably don't have any positionals, or at least don't care about them
+            best.positional = []
 
     def explore(
         self,
@@ -35,43 +187,32 @@ class CliHelpExecutor(Executor):
         parent: Optional[Command] = None,
     ) -> Optional[Command]:
 
+        if self.explore_timeout is not None and self._deadline is None:
+            # Start the clock for this exploration. We use a copy so that this executor can be re-used afterwards
+            return self._with_deadline().explore(
+                command, max_depth=max_depth, parent=parent
+            )
+
         logger.info("Exploring {}".format(" ".join(command)))
         best = self.convert(command)
         best.parent = parent
 
         # Check if this is a valid subcommand
-        if parent:
-            if best.valid_subcommand():
-                logger.info(
-                    "{} seems to be a valid subcommand".format(" ".join(command))
-                )
-            else:
-                logger.info(
-                    "{} does not seem to be a valid subcommand".format(
-                        " ".join(command)
-                    )
-                )
-                return None
+        if not self._is_subcommand(best, parent):
+            return None
 
         # Recursively call this function on positionals, but only do this if we aren't at max depth
         if best.depth < max_depth:
-            # By default we use the best parent help-flag
-            child_executor = copy.copy(self)
-            child_executor.flags = (
-                self.flags if self.try_subcommand_flags else [best.generated_using]
-            )
-
-            # Try each *unique* positional
-            for positional in {positional.name for positional in best.positional}:
-                subcommand = child_executor.explore(
+            child_executor = self._child_executor(best)
+            subcommands = self._map(
+                lambda positional: child_executor.explore(
                     command=command + [positional],
                     parent=best,
                     max_depth=max_depth,
-                )
-                if subcommand is not None:
-                    best.subcommands.append(subcommand)
-                    # If we had any subcommands then we probably don't have any positionals, or at least don't care about them
-                    best.positional = []
+                ),
+                self._subcommand_candidates(best),
+            )
+            self._add_subcommands(best, subcommands)
 
         return best
 
@@ -82,33 +223,35 @@ class CliHelpExecutor(Executor):
         """
         pass
 
-    def convert(
-        self,
-        cmd: List[str],
-    ) -> Command:
+    async def execute_async(self, cmd: List[str]) -> str:
         """
-        Determine the best Command instance for a given command line tool, by trying many
-        different help flags, such as --help and -h, then return the Command. Use this if you know the command you want to
-        parse, but you don't know which flags it responds to with help text. Unlike :py:func:`aclimatise.explore_command`,
-        this doesn't even attempt to parse subcommands.
+        Executes the provided command without blocking the event loop, and returns a string containing the output.
+        By default this runs :py:meth:`execute` in a thread, but subclasses can provide a truly asynchronous
+        implementation
+        """
+        return await asyncio.get_event_loop().run_in_executor(None, self.execute, cmd)
 
-        :param cmd: The command to analyse, e.g. ['wc'] or ['bwa', 'mem']
-        :param flags: A list of help flags to try, e.g. ['--help', '-h'], in order how which one you would prefer to use.
-        Generally [] aka no flags should be last
-        :param executor: A class that provides the means to run a command. You can use the pre-made classes or write your own.
+    def _choose_best(
+        self, cmd: List[str], flags: List[List[str]], outputs: List[Optional[str]]
+    ) -> Command:
+        """
+        Parses the output of each help flag, and returns the best resulting Command
         """
-        # For each help flag, run the command and then try to parse it
-        logger.info("Trying flags for {}".format(" ".join(cmd)))
         commands = []
-        for flag in self.flags:
-            help_cmd = cmd + flag
-            logger.info("Trying {}".format(" ".join(help_cmd)))
+        # The outputs of different help flags often share flag descriptions, so only classify each one once
+        sentences = SentenceClassifier(self.sentence_backend)
+        for flag, final in zip(flags, outputs):
+            logger.info("Trying {}".format(" ".join(cmd + flag)))
+            if final is None:
+                # If the output couldn't be decoded, this wasn't the right flag to use
+                continue
             try:
-                final = self.execute(help_cmd)
-                result = parse_help(cmd, final, max_length=self.max_length)
+                result = parse_help(
+                    cmd, final, max_length=self.max_length, sentences=sentences
+                )
                 result.generated_using = flag
                 commands.append(result)
-            except (ParseBaseException, UnicodeDecodeError) as e:
+            except ParseBaseException as e:
                 # If parsing fails, this wasn't the right flag to use
                 continue
 
@@ -122,3 +265,100 @@ class CliHelpExecutor(Executor):
             )
         )
         return best
+
+    def convert(
+        self,
+        cmd: List[str],
+    ) -> Command:
+        """
+        Determine the best Command instance for a given command line tool, by trying many
+        different help flags, such as --help and -h, then return the Command. Use this if you know the command you want to
+        parse, but you don't know which flags it responds to with help text. Unlike :py:func:`aclimatise.explore_command`,
+        this doesn't even attempt to parse subcommands.
+
+        :param cmd: The command to analyse, e.g. ['wc'] or ['bwa', 'mem']
+        :param flags: A list of help flags to try, e.g. ['--help', '-h'], in order how which one you would prefer to use.
+        Generally [] aka no flags should be last
+        :param executor: A class that provides the means to run a command. You can use the pre-made classes or write your own.
+        """
+        # For each help flag, run the command and then try to parse it
+        logger.info("Trying flags for {}".format(" ".join(cmd)))
+        flags = list(self.flags)
+        outputs = self._map(self._execute_bounded, [cmd + flag for flag in flags])
+        return self._choose_best(cmd, flags, outputs)
+
+    @contextmanager
+    def _async_session(self) -> Iterator["CliHelpExecutor"]:
+        """
+        Prepares a copy of this executor for use within a single call to :py:meth:`explore_async` or
+        :py:meth:`convert_async`. Subclasses can override this to set up resources that are shared by every execution
+        in the session
+        """
+        executor = copy.copy(self)
+        # The semaphore has to be created within the running event loop
+        executor._async_slots = asyncio.Semaphore(self.max_workers)
+        yield executor
+
+    async def _convert_async(self, cmd: List[str]) -> Command:
+        logger.info("Trying flags for {}".format(" ".join(cmd)))
+        flags = list(self.flags)
+        outputs = await asyncio.gather(
+            *[self._execute_bounded_async(cmd + flag) for flag in flags]
+        )
+        # Parsing is CPU-bound, so it runs in a thread, rather than stalling every other execution on the event loop
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self._choose_best, cmd, flags, list(outputs)
+        )
+
+    async def _explore_async(
+        self,
+        command: List[str],
+        max_depth: int,
+        parent: Optional[Command],
+    ) -> Optional[Command]:
+        logger.info("Exploring {}".format(" ".join(command)))
+        best = await self._convert_async(command)
+        best.parent = parent
+
+        if not self._is_subcommand(best, parent):
+            return None
+
+        if best.depth < max_depth:
+            child_executor = self._child_executor(best)
+            subcommands = await asyncio.gather(
+                *[
+                    child_executor._explore_async(
+                        command=command + [positional],
+                        parent=best,
+                        max_depth=max_depth,
+                    )
+                    for positional in self._subcommand_candidates(best)
+                ]
+            )
+            self._add_subcommands(best, list(subcommands))
+
+        return best
+
+    async def convert_async(self, cmd: List[str]) -> Command:
+        """
+        The asynchronous equivalent of :py:meth:`convert`. Every help flag is executed concurrently, up to the
+        ``max_workers`` limit
+        """
+        with self._async_session() as executor:
+            return await executor._convert_async(cmd)
+
+    async def explore_async(
+        self,
+        command: List[str],
+        max_depth: int = 2,
+        parent: Optional[Command] = None,
+    ) -> Optional[Command]:
+        """
+        The asynchronous equivalent of :py:meth:`explore`. Every help flag of every sibling subcommand is executed
+        concurrently, up to the ``max_workers`` limit, and the result is the same regardless of which execution
+        finishes first
+        """
+        with self._with_deadline()._async_session() as executor:
+            return await executor._explore_async(
+                command, max_depth=max_depth, parent=parent
+            )
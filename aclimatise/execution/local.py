@@ -1,12 +1,14 @@
 """
 Functions that relate to executing the programs of interest, in order to extract their help text
 """
+import asyncio
 import os
 import pty
 import signal
 import subprocess
 import sys
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
 
 import psutil
 
@@ -26,7 +28,11 @@ def kill_proc_tree(pid, sig=signal.SIGTERM, include_parent=True):
     if include_parent:
         children.append(parent)
     for p in children:
-        p.send_signal(sig)
+        try:
+            p.send_signal(sig)
+        except psutil.NoSuchProcess:
+            # The process may have exited, and been reaped, since we listed it
+            pass
 
 
 class LocalExecutor(CliHelpExecutor):
@@ -34,6 +40,14 @@ class LocalExecutor(CliHelpExecutor):
         super().__init__(**kwargs)
         self.popen_args = popen_args
 
+    def binary_identity(self, command: List[str]) -> Optional[str]:
+        env = self.popen_args.get("env") or {}
+        return self.local_binary_identity(command, path=env.get("PATH"))
+
+    def cache_settings(self) -> Any:
+        # These can change the output, for example by setting the environment or the working directory
+        return self.popen_args
+
     def execute(self, command: List[str]) -> str:
         master, slave = pty.openpty()
         popen_kwargs = dict(
@@ -62,3 +76,74 @@ class LocalExecutor(CliHelpExecutor):
                 os.close(slave)
 
         return stdout or stderr
+
+
+class AsyncLocalExecutor(LocalExecutor):
+    """
+    A local executor that is designed to be used with :py:meth:`explore_async` and :py:meth:`convert_async`. Each
+    execution is a non-blocking subprocess rather than a blocked thread, so a single event loop can keep a very large
+    number of help commands in flight at once
+    """
+
+    def __init__(self, max_workers: int = 100, **kwargs):
+        """
+        :param max_workers: The maximum number of subprocesses that may be running at once
+        """
+        super().__init__(max_workers=max_workers, **kwargs)
+        self._stdin: Optional[int] = None
+
+    @contextmanager
+    def _terminal(self) -> Iterator[int]:
+        """
+        Yields a pseudo-terminal to use as stdin, re-using the session's terminal if there is one
+        """
+        if self._stdin is not None:
+            yield self._stdin
+            return
+
+        master, slave = pty.openpty()
+        try:
+            yield slave
+        finally:
+            os.close(master)
+            os.close(slave)
+
+    @contextmanager
+    def _async_session(self) -> Iterator["AsyncLocalExecutor"]:
+        # Every process in the session shares a single pseudo-terminal for stdin, rather than opening one each
+        with super()._async_session() as executor, self._terminal() as stdin:
+            executor._stdin = stdin
+            yield executor
+
+    async def execute_async(self, command: List[str]) -> str:
+        popen_kwargs = dict(
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        popen_kwargs.update(self.popen_args)
+        # The asyncio subprocess functions only deal in bytes, and reject the text mode arguments, so we decode the
+        # output ourselves
+        encoding = popen_kwargs.pop("encoding", None) or "utf-8"
+        errors = popen_kwargs.pop("errors", None) or "strict"
+        popen_kwargs.pop("text", None)
+        popen_kwargs.pop("universal_newlines", None)
+
+        with self._terminal() as stdin:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdin=stdin, **popen_kwargs
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(), timeout=self.timeout
+                )
+            except asyncio.TimeoutError as e:
+                # Kill the entire process tree, because sometimes killing the parent isn't enough
+                kill_proc_tree(
+                    process.pid,
+                    include_parent=True,
+                    sig=signal.SIGKILL if sys.platform == "linux" else None,
+                )
+                await process.wait()
+                return self.handle_timeout(e)
+
+        return (stdout or stderr or b"").decode(encoding, errors)
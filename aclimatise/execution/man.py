@@ -5,6 +5,7 @@ from typing import Collection, List, Optional
 from aclimatise.execution import Executor
 from aclimatise.integration import parse_help
 from aclimatise.model import Command
+from aclimatise.nlp import SentenceClassifier
 
 
 class ManPageExecutor(Executor):
@@ -31,32 +32,49 @@ class ManPageExecutor(Executor):
         Returns the man page text for the provided command, using the provided subcommand separator, or an empty string
         if this man page doesn't exist
         """
-        env = {**os.environ.copy(), "MANPAGER": "cat"}  # Don't use a pager
-        if len(self.man_paths) > 0:
-            env.update({"MANPATH": ":".join(self.man_paths)})
-
-        sub_man = separator.join(command)
-        result = subprocess.run(
-            ["man", *self.man_flags, sub_man],
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        if result.returncode == 0:
-            return result.stdout.decode()
-
-        return ""
+
+        def run():
+            env = {**os.environ.copy(), "MANPAGER": "cat"}  # Don't use a pager
+            if len(self.man_paths) > 0:
+                env.update({"MANPATH": ":".join(self.man_paths)})
+
+            sub_man = separator.join(command)
+            result = subprocess.run(
+                ["man", *self.man_flags, sub_man],
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            if result.returncode == 0:
+                return result.stdout.decode()
+
+            return ""
+
+        return self.cached(command, run, separator, *self.man_flags, *self.man_paths)
+
+    def binary_identity(self, command: List[str]) -> Optional[str]:
+        # We assume that the man page is updated whenever the executable it documents is
+        return self.local_binary_identity(command)
 
     def convert(self, command: List[str]) -> Command:
+        sentences = SentenceClassifier(self.sentence_backend)
         if len(command) == 1:
             return parse_help(
-                command, self.execute_with_sep(command), max_length=self.max_length
+                command,
+                self.execute_with_sep(command),
+                max_length=self.max_length,
+                sentences=sentences,
             )
         else:
             commands = []
             for sep in self.subcommand_sep:
                 man_text = self.execute_with_sep(command, sep)
                 commands.append(
-                    parse_help(command, man_text, max_length=self.max_length)
+                    parse_help(
+                        command,
+                        man_text,
+                        max_length=self.max_length,
+                        sentences=sentences,
+                    )
                 )
             return Command.best(commands)
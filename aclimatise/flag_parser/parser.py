@@ -1,10 +1,12 @@
+import threading
+import typing
 from itertools import groupby
 from operator import attrgetter
 
 import regex
 
 from aclimatise.flag_parser.elements import *
-from aclimatise.nlp import is_sentence
+from aclimatise.nlp import SentenceClassifier, is_sentence
 from aclimatise.parser import IndentCheckpoint, IndentParserMixin
 
 
@@ -52,13 +54,61 @@ multi_space = regex.compile(r"\b[\s]{2,}\b")
 # Used to find words that contain no alphabetical characters
 non_alpha = regex.compile(r"^[^[:alpha:]]+$")
 
+#: Finds the start of each line
+line_start = regex.compile(r"^", flags=regex.MULTILINE)
+
+#: Finds each colon, along with any whitespace before it
+colon_prefix = regex.compile(r"[ \t\r\n]*:")
+
+
+def block_starts(text: str) -> typing.List[int]:
+    """
+    Returns every position in the help text at which a block of flags could start. Each type of flag block starts
+    either at the beginning of a line, or with a colon that may be preceded by whitespace, so we only need to try
+    parsing at these positions, rather than at every character
+    """
+    starts = {match.start() for match in line_start.finditer(text)}
+    for match in colon_prefix.finditer(text):
+        starts.update(range(match.start(), match.end()))
+    return sorted(starts)
+
 
 # The reason we have a parser class here instead of just a function is so that we can store the parser state, in
 # particular the indentation stack. Without this, we would have to use a global stack which would be even more
-# worrying
+# worrying. The stack itself is thread-local, so a single CliParser can be shared, e.g. using CliParser.shared()
 class CliParser(IndentParserMixin):
-    def parse_command(self, cmd, name) -> Command:
-        all_flags = list(itertools.chain.from_iterable(self.flags.searchString(cmd)))
+    def parse_command(
+        self,
+        cmd,
+        name,
+        sentences: typing.Optional[SentenceClassifier] = None,
+    ) -> Command:
+        """
+        Parses the flags and positionals out of some help text
+
+        :param cmd: The help text
+        :param name: The command used to generate the help text, e.g. ['bwa', 'mem']
+        :param sentences: Decides which flag descriptions are real sentences. Share a classifier between several
+            calls to re-use its results
+        """
+        if sentences is None:
+            sentences = SentenceClassifier()
+
+        # The first parse queues up every flag description, so that they can be classified in a single batch, and
+        # assumes that they're all sentences. If any of them aren't, this can change which flags we find, so we parse
+        # again, until every description we found was classified correctly. In most cases the first parse is right
+        all_flags = self.find_flags(cmd, sentences)
+        while sentences.classify_pending():
+            all_flags = self.find_flags(cmd, sentences)
+        return self.build_command(all_flags, name)
+
+    def build_command(self, all_flags: typing.List[CliArgument], name) -> Command:
+        """
+        Makes a Command from the flags and positionals returned by :py:meth:`find_flags`, leaving out any that aren't
+        unique
+
+        :param name: The command used to generate the help text, e.g. ['bwa', 'mem']
+        """
         # If flags aren't unique, they likely aren't real flags
         named = unique_by(
             [flag for flag in all_flags if isinstance(flag, Flag)],
@@ -72,8 +122,50 @@ class CliParser(IndentParserMixin):
         )
         return Command(command=name, positional=positional, named=named)
 
+    def find_flags(
+        self,
+        cmd: str,
+        sentences: SentenceClassifier,
+    ) -> typing.List[CliArgument]:
+        """
+        Parses the help text once, and returns every flag and positional found. Flags whose description hasn't been
+        classified yet are assumed to have a valid description, and their descriptions are queued in ``sentences``
+        """
+        self.state.sentences = sentences
+        try:
+            with self.stack.fresh():
+                return list(itertools.chain.from_iterable(self.scan_flags(cmd)))
+        finally:
+            self.state.sentences = None
+
+    def scan_flags(self, text: str) -> typing.Iterator[ParseResults]:
+        """
+        Finds each block of flags in the help text. This gives the same result as ``self.flags.searchString(text)``,
+        but it only tries to parse at the positions returned by :py:func:`block_starts`, so the time taken depends
+        mostly on the number of lines, rather than the number of characters in the text
+        """
+        if not self.flags.streamlined:
+            self.flags.streamline()
+
+        # The same preprocessing that PyParsing does in scanString
+        text = text.expandtabs()
+        end = 0
+        for start in block_starts(text):
+            # Blocks can't overlap, so skip any start that's inside the previous block
+            if start < end:
+                continue
+            try:
+                loc, tokens = self.flags._parse(text, start, callPreParse=False)
+            except ParseException:
+                continue
+            if loc > start:
+                end = loc
+                yield tokens
+
     def __init__(self):
         super().__init__()
+        # Per-thread state for the current parse
+        self.state = threading.local()
 
         def parse_description(s, lok, toks):
             text = "".join(toks)
@@ -195,7 +287,9 @@ class CliParser(IndentParserMixin):
                         ret[-1].description += "\n"
                     ret[-1].description += tok
 
-            ret = [flag for flag in ret if is_sentence(flag.description)]
+            # Use the batch classifier if we're inside parse_command, otherwise classify each description now
+            sentences = getattr(self.state, "sentences", None) or is_sentence
+            ret = [flag for flag in ret if sentences(flag.description)]
             return ret
 
         self.flag_block = (
@@ -0,0 +1,165 @@
+"""
+A compressed store for help texts, which are by far the largest part of a command tree. Each text is stored once, named
+by the digest of its contents, and commands only keep a :py:class:`HelpRef` to it, which is loaded when it is needed
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import Generator, List, Optional
+
+import attr
+from ruamel.yaml import yaml_object
+
+from aclimatise.yaml import yaml
+
+
+def default_help_store_dir() -> Path:
+    """
+    Returns the default directory in which to store help texts
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(root) / "aclimatise" / "help"
+
+
+class HelpStore:
+    """
+    Stores help texts on disk, compressed, and keyed by the SHA-256 digest of their contents, so that identical texts
+    are only stored once
+    """
+
+    def __init__(self, path: Optional[PathLike] = None):
+        """
+        :param path: Directory in which to store the texts. Defaults to ``$XDG_CACHE_HOME/aclimatise/help``
+        """
+        self.path = Path(path) if path is not None else default_help_store_dir()
+
+    @staticmethod
+    def digest(text: str) -> str:
+        """
+        Returns the key under which this text is stored
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _entry(self, digest: str) -> Path:
+        return self.path / digest[:2] / digest
+
+    def __contains__(self, digest: str) -> bool:
+        return self._entry(digest).exists()
+
+    def put(self, text: str) -> str:
+        """
+        Stores a help text, if it isn't already stored, and returns its digest
+        """
+        digest = self.digest(text)
+        entry = self._entry(digest)
+        if entry.exists():
+            return digest
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that readers never see a partial entry
+        fd, temp = tempfile.mkstemp(dir=str(entry.parent), prefix=".")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(zlib.compress(text.encode("utf-8"), 9))
+        os.replace(temp, str(entry))
+        return digest
+
+    def get(self, digest: str) -> str:
+        """
+        Returns the help text with this digest
+        :raises KeyError: If the text isn't in this store
+        """
+        try:
+            data = self._entry(digest).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(
+                "Help text {} is not in the store at {}".format(digest, self.path)
+            )
+        return zlib.decompress(data).decode("utf-8")
+
+    def __repr__(self):
+        return "HelpStore({!r})".format(str(self.path))
+
+
+_local = threading.local()
+
+
+def current_help_store() -> Optional[HelpStore]:
+    """
+    Returns the store in which help texts loaded from YAML are looked up, which is chosen by :py:func:`use_help_store`,
+    or ``None`` if no store has been chosen
+    """
+    stores: List[HelpStore] = getattr(_local, "stores", [])
+    return stores[-1] if stores else None
+
+
+@contextmanager
+def use_help_store(store: HelpStore) -> Generator[HelpStore, None, None]:
+    """
+    Within this context, help texts loaded from YAML in this thread are looked up in the given store. For example::
+
+        with use_help_store(HelpStore("wrappers/help")):
+            command = yaml.load(fp)
+    """
+    if not hasattr(_local, "stores"):
+        _local.stores = []
+    _local.stores.append(store)
+    try:
+        yield store
+    finally:
+        _local.stores.pop()
+
+
+@yaml_object(yaml)
+@attr.s(auto_attribs=True, frozen=True, slots=True, eq=False)
+class HelpRef:
+    """
+    A reference to a help text in a :py:class:`HelpStore`. This is stored in place of the text itself, and compares
+    equal to both other references and strings with the same contents, without loading the text. Since it is equal to
+    a string, but can't have the same hash, it isn't hashable
+    """
+
+    yaml_tag = "!HelpRef"
+
+    #: The digest of the text, which is its key in the store
+    digest: str
+    #: The store that contains the text. This is ``None`` if the reference was loaded outside
+    #: :py:func:`use_help_store`, in which case the text can't be read
+    store: Optional[HelpStore] = attr.ib(factory=current_help_store, repr=False)
+
+    def load(self) -> str:
+        """
+        Reads the text from the store
+        :raises LookupError: If the reference has no store
+        :raises KeyError: If the text isn't in the store
+        """
+        if self.store is None:
+            raise LookupError(
+                "Help text {} is in a help store, but no store was chosen when it was loaded. Load it inside "
+                "aclimatise.help_store.use_help_store(HelpStore(DIR)), where DIR is the directory the help texts were "
+                "written to, e.g. by `aclimatise explore --help-store DIR`".format(
+                    self.digest
+                )
+            )
+        return self.store.get(self.digest)
+
+    def __eq__(self, other):
+        if isinstance(other, HelpRef):
+            return self.digest == other.digest
+        if isinstance(other, str):
+            return self.digest == HelpStore.digest(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    @classmethod
+    def to_yaml(cls, representer, data):
+        return representer.represent_scalar(cls.yaml_tag, data.digest)
+
+    @classmethod
+    def from_yaml(cls, constructor, node):
+        return cls(digest=node.value)
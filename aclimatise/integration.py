@@ -1,13 +1,152 @@
+import copy
+import functools
+import hashlib
+import threading
 import typing
+from collections import OrderedDict
+from io import StringIO
+from pathlib import Path
 
 import attr
+import pyparsing
 
+from aclimatise.execution.cache import ExecutionCache
 from aclimatise.flag_parser.parser import CliParser
 from aclimatise.model import Command, Flag
+from aclimatise.nlp import SentenceBackend, SentenceClassifier, SpacyBackend
 from aclimatise.usage_parser.parser import UsageParser
+from aclimatise.yaml import fast_dump, yaml
 
 
-def parse_help(cmd: typing.Collection[str], text: str, max_length=1000) -> Command:
+@functools.lru_cache()
+def parser_version() -> str:
+    """
+    Returns a string that changes whenever the parser changes, so that cached parse results from an old parser aren't
+    re-used
+    """
+    root = Path(__file__).parent
+    digest = hashlib.sha256(pyparsing.__version__.encode())
+    for module in sorted(
+        [
+            root / "integration.py",
+            root / "parser.py",
+            root / "model.py",
+            root / "nlp.py",
+            *root.glob("flag_parser/*.py"),
+            *root.glob("usage_parser/*.py"),
+        ]
+    ):
+        digest.update(module.read_bytes())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    A bounded, in-memory, least-recently-used cache of parsed Commands, optionally backed by a persistent store. Every
+    Command that goes in or out of the cache is copied, so callers are free to modify them
+    """
+
+    def __init__(
+        self, max_size: int = 256, store: typing.Optional[ExecutionCache] = None
+    ):
+        """
+        :param max_size: The maximum number of Commands to keep in memory
+        :param store: If provided, Commands are also saved on disk in this cache, so they can be used in future
+            sessions
+        """
+        self.max_size = max_size
+        self.store = store
+        self._entries: "OrderedDict[str, Command]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(
+        cmd: typing.Collection[str],
+        text: str,
+        max_length,
+        sentences: typing.Optional[SentenceClassifier] = None,
+    ) -> str:
+        """
+        Returns the cache key for parsing this text with these arguments
+        """
+        # Different sentence backends can give different results, so they need different keys
+        if sentences is None:
+            sentences = SentenceClassifier()
+        return ExecutionCache.key(
+            parser_version(),
+            list(cmd),
+            max_length,
+            sentences.backend.name(),
+            sentences.threshold,
+            hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest(),
+        )
+
+    def get(self, key: str) -> typing.Optional[Command]:
+        """
+        Returns a copy of the cached Command, or None if it isn't cached
+        """
+        with self._lock:
+            command = self._entries.get(key)
+            if command is not None:
+                self._entries.move_to_end(key)
+
+        if command is None and self.store is not None:
+            serialized = self.store.get(key)
+            if serialized is not None:
+                command = yaml.load(StringIO(serialized))
+                self._remember(key, command)
+
+        if command is None:
+            return None
+        return copy.deepcopy(command)
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns True if a Command is cached for this key. Unlike :py:meth:`get`, this doesn't load or copy the Command
+        """
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.store is not None and key in self.store
+
+    def put(self, key: str, command: Command):
+        """
+        Stores a copy of this Command in the cache
+        """
+        self._remember(key, copy.deepcopy(command))
+        if self.store is not None:
+            buffer = StringIO()
+            fast_dump(command, buffer)
+            self.store.put(key, buffer.getvalue())
+
+    def _remember(self, key: str, command: Command):
+        with self._lock:
+            self._entries[key] = command
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes every Command from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+
+#: The cache used by :py:func:`parse_help` by default
+default_parse_cache = ParseCache()
+
+
+def parse_help(
+    cmd: typing.Collection[str],
+    text: str,
+    max_length=1000,
+    cache: typing.Optional[ParseCache] = default_parse_cache,
+    sentences: typing.Optional[SentenceClassifier] = None,
+) -> Command:
     """
     Parse a string of help text into a Command. Use this if you already have run the executable and extracted the
     help text yourself
@@ -17,12 +156,97 @@ def parse_help(cmd: typing.Collection[str], text: str, max_length=1000) -> Comma
     :param max_length: If the input text has more than this many lines, no attempt will be made to parse the file (as
         it's too large, will likely take a long time, and there's probably an underlying problem if this has happened).
         In this case, an empty Command will be returned
+    :param cache: A cache of previous parse results. If this text has already been parsed, a copy of the previous
+        result is returned. Pass None to always re-parse the text
+    :param sentences: Classifies flag descriptions as sentences or not. Share one classifier between several calls
+        to re-use its results. Defaults to a classifier using spaCy, but ``SentenceClassifier(HeuristicBackend())`` is
+        much faster, at the cost of some accuracy
+    """
+    if cache is None:
+        return _parse_help(cmd, text, max_length=max_length, sentences=sentences)
+
+    key = cache.key(cmd, text, max_length, sentences)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+
+    command = _parse_help(cmd, text, max_length=max_length, sentences=sentences)
+    cache.put(key, command)
+    return command
+
+
+def parse_help_batch(
+    commands: typing.Iterable[typing.Tuple[typing.Collection[str], str]],
+    max_length=1000,
+    cache: typing.Optional[ParseCache] = default_parse_cache,
+    sentence_backend: typing.Optional[SentenceBackend] = None,
+) -> typing.List[Command]:
+    """
+    Parses many help texts, giving the same result as calling :py:func:`parse_help` on each. This is faster, because
+    the flag descriptions from every help text are classified together, in a single batch, and the flags are only
+    found again in the help texts where a description turned out not to be a sentence
+
+    :param commands: Pairs of (command, help text), e.g. ``[(['bwa', 'mem'], "Usage: bwa mem...")]``
+    :param max_length: See :py:func:`parse_help`
+    :param cache: See :py:func:`parse_help`
+    :param sentence_backend: The method used to classify flag descriptions. Defaults to a :py:class:`SpacyBackend`,
+        which can be configured with a ``batch_size`` and ``n_process``
+    """
+    commands = list(commands)
+    sentences = SentenceClassifier(sentence_backend)
+
+    # Find the flags in every help text that still needs parsing, guessing that every new description is a sentence,
+    # and then classify all the descriptions at once
+    parser = CliParser.shared()
+    found = {}
+    for i, (cmd, text) in enumerate(commands):
+        if len(text.splitlines()) > max_length:
+            continue
+        if cache is not None and cache.key(cmd, text, max_length, sentences) in cache:
+            continue
+        with sentences.recording_guesses() as guesses:
+            found[i] = parser.find_flags(text, sentences), guesses
+    sentences.classify_pending()
+
+    results = []
+    for i, (cmd, text) in enumerate(commands):
+        if i in found and sentences.guessed_right(found[i][1]):
+            # The guesses were right, so the flags we found are the same as parse_help would find
+            command = _parse_help(
+                cmd,
+                text,
+                max_length=max_length,
+                sentences=sentences,
+                help_command=parser.build_command(found[i][0], cmd),
+            )
+            if cache is not None:
+                cache.put(cache.key(cmd, text, max_length, sentences), command)
+        else:
+            command = parse_help(
+                cmd, text, max_length=max_length, cache=cache, sentences=sentences
+            )
+        results.append(command)
+    return results
+
+
+def _parse_help(
+    cmd: typing.Collection[str],
+    text: str,
+    max_length=1000,
+    sentences: typing.Optional[SentenceClassifier] = None,
+    help_command: typing.Optional[Command] = None,
+) -> Command:
+    """
+    :param help_command: The flags and positionals already found by :py:class:`CliParser`, if any
     """
     if len(text.splitlines()) > max_length:
         return Command(list(cmd))
 
-    help_command = CliParser().parse_command(name=cmd, cmd=text)
-    usage_command = UsageParser().parse_usage(list(cmd), text)
+    if help_command is None:
+        help_command = CliParser.shared().parse_command(
+            name=cmd, cmd=text, sentences=sentences
+        )
+    usage_command = UsageParser.shared().parse_usage(list(cmd), text)
 
     # Combine the two commands by picking from the help_command where possible, otherwise falling back on the usage
     fields = dict(
@@ -33,8 +257,10 @@ def parse_help(cmd: typing.Collection[str], text: str, max_length=1000) -> Comma
         named=list(Flag.combine([help_command.named, usage_command.named])),
     )
     for field in attr.fields(Command):
-        fields[field.name] = (
-            fields.get(field.name)
+        # Private fields, such as _help_text, don't have the underscore in their __init__ parameter
+        name = field.name.lstrip("_")
+        fields[name] = (
+            fields.get(name)
             or getattr(help_command, field.name)
             or getattr(usage_command, field.name)
         )
@@ -0,0 +1,193 @@
+"""
+Bounded memos for the functions that name generation calls over and over with the same strings, such as word
+segmentation. The same flag names come up in thousands of tools, so these memos are shared by the whole process, and can
+be saved to disk so that future runs can re-use them
+"""
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Dict, Generic, TypeVar
+
+import attr
+
+T = TypeVar("T")
+
+#: Every memo created by :py:func:`memoize`, by name
+memos: Dict[str, "Memo"] = {}
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class MemoStats:
+    """
+    A snapshot of how well a memo is working
+    """
+
+    #: The number of lookups that were answered by the memo
+    hits: int
+    #: The number of lookups that had to call the function
+    misses: int
+    #: The number of results currently stored
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of lookups that were answered by the memo, or 0 if there haven't been any
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class Memo(Generic[T]):
+    """
+    A thread-safe, least-recently-used memo of a function that takes a single string. The function must always return
+    the same JSON-serializable result for the same argument
+    """
+
+    def __init__(self, function: Callable[[str], T], max_size: int = 100000):
+        """
+        :param function: The function to memoize
+        :param max_size: The maximum number of results to store
+        """
+        self.function = function
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, T]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, arg: str) -> T:
+        with self._lock:
+            if arg in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(arg)
+                return self._entries[arg]
+            self.misses += 1
+
+        # Call the function outside the lock, so that other threads aren't blocked. At worst, two threads compute the
+        # same result
+        result = self.function(arg)
+        self._remember(arg, result)
+        return result
+
+    def _remember(self, arg: str, result: T):
+        with self._lock:
+            self._entries[arg] = result
+            self._entries.move_to_end(arg)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> MemoStats:
+        """
+        Returns the hit and miss counts, and the number of stored results
+        """
+        with self._lock:
+            return MemoStats(
+                hits=self.hits, misses=self.misses, size=len(self._entries)
+            )
+
+    def clear(self):
+        """
+        Removes every stored result, and resets the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def entries(self) -> Dict[str, T]:
+        """
+        Returns a copy of the stored results, from least to most recently used
+        """
+        with self._lock:
+            return dict(self._entries)
+
+    def update(self, entries: Dict[str, T]):
+        """
+        Stores these results, as though they had just been computed
+        """
+        for arg, result in entries.items():
+            self._remember(arg, result)
+
+
+def memoize(name: str, max_size: int = 100000):
+    """
+    Decorator that wraps a function in a :py:class:`Memo`, and registers it in :py:data:`memos` so that it can be saved
+    and loaded with the others
+    :param name: A unique name for this memo, which is used as its key when saved
+    :param max_size: See :py:class:`Memo`
+    """
+
+    def decorator(function: Callable[[str], T]) -> Memo[T]:
+        memo = Memo(function, max_size=max_size)
+        functools.update_wrapper(memo, function)
+        memos[name] = memo
+        return memo
+
+    return decorator
+
+
+def memo_stats() -> Dict[str, MemoStats]:
+    """
+    Returns the statistics of every registered memo, by name
+    """
+    return {name: memo.stats() for name, memo in memos.items()}
+
+
+@functools.lru_cache()
+def memo_version() -> str:
+    """
+    Returns a string that changes whenever the memoized functions, or the word segmentation data they use, might have
+    changed, so that results saved by an old version aren't re-used
+    """
+    import wordsegment
+
+    root = Path(__file__).parent
+    digest = hashlib.sha256(getattr(wordsegment, "__version__", "").encode())
+    for module in ("memo.py", "nlp.py", "name_generation.py"):
+        digest.update((root / module).read_bytes())
+    return digest.hexdigest()
+
+
+def save_memos(path: PathLike):
+    """
+    Saves the results stored in every registered memo to a JSON file, along with the :py:func:`memo_version`
+    """
+    data = {
+        "version": memo_version(),
+        "memos": {name: memo.entries() for name, memo in memos.items()},
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Write to a temporary file first, so that a concurrent reader never sees a partial file
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=".")
+    with os.fdopen(fd, "w", encoding="utf-8") as fp:
+        json.dump(data, fp)
+    os.replace(temp, str(path))
+
+
+def load_memos(path: PathLike):
+    """
+    Loads results saved by :py:func:`save_memos` into the registered memos. Missing or unreadable files, and files
+    saved by a different :py:func:`memo_version`, are ignored, since the memos are only an optimisation
+    """
+    try:
+        with open(path, encoding="utf-8") as fp:
+            data = json.load(fp)
+    except (OSError, ValueError):
+        return
+    if not isinstance(data, dict) or data.get("version") != memo_version():
+        return
+    if not isinstance(data.get("memos"), dict):
+        return
+
+    for name, entries in data["memos"].items():
+        if name in memos and isinstance(entries, dict):
+            memos[name].update(entries)
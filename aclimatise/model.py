@@ -5,6 +5,7 @@ import abc
 import enum
 import itertools
 import re
+import sys
 import typing
 from abc import abstractmethod
 from itertools import chain
@@ -17,8 +18,9 @@ from word2number import w2n
 import aclimatise
 from aclimatise import cli_types
 from aclimatise.cli_types import CliFileSystemType, CliString
+from aclimatise.help_store import HelpRef, HelpStore
 from aclimatise.name_generation import segment_string
-from aclimatise.nlp import wordsegment
+from aclimatise.nlp import segment
 from aclimatise.usage_parser.model import UsageInstance
 from aclimatise.yaml import AttrYamlMixin, yaml
 
@@ -49,9 +51,7 @@ def useless_name(name: typing.List[str]):
 
 
 @yaml_object(yaml)
-@attr.s(
-    auto_attribs=True,
-)
+@attr.s(auto_attribs=True, slots=True)
 class Command(AttrYamlMixin):
     """
     Class representing an entire command or subcommand, e.g. `bwa mem` or `grep`
@@ -100,7 +100,8 @@ class Command(AttrYamlMixin):
         if len(self.subcommands) > 0:
             return Command(
                 generated_using=self.generated_using,
-                help_text=self.help_text,
+                # Keep the help text in its store, if it's in one
+                help_text=self._help_text,
                 command=self.command,
                 subcommands=[cmd.reanalyse(self) for cmd in self.subcommands],
                 parent=parent,
@@ -108,7 +109,7 @@ class Command(AttrYamlMixin):
         else:
             replacement = aclimatise.parse_help(cmd=self.command, text=self.help_text)
             replacement.parent = parent
-            replacement.help_text = self.help_text
+            replacement._help_text = self._help_text
             replacement.generated_using = self.generated_using
             return replacement
 
@@ -123,7 +124,8 @@ class Command(AttrYamlMixin):
             return False
 
         # This isn't a subcommand if it has the same input text as the parent
-        if self.help_text and self.help_text == parent.help_text:
+        # This compares references to stored help texts without loading them
+        if self._help_text and self._help_text == parent._help_text:
             return False
 
         # This isn't a subcommand if it has no flags
@@ -222,6 +224,40 @@ class Command(AttrYamlMixin):
         """
         return set(chain.from_iterable([flag.synonyms for flag in self.named]))
 
+    @property
+    def help_text(self) -> typing.Optional[str]:
+        """
+        Optionally, the entire help text that was used to generate this Command. If the text has been moved into a
+        :py:class:`aclimatise.help_store.HelpStore`, it is read from the store each time this is accessed
+        """
+        if isinstance(self._help_text, HelpRef):
+            return self._help_text.load()
+        return self._help_text
+
+    @help_text.setter
+    def help_text(self, value: typing.Optional[str]):
+        self._help_text = value
+
+    def store_help_text(self, store: HelpStore):
+        """
+        Moves the help text of every command in this tree into a store, keeping only a reference to it. This makes the
+        tree much smaller, both in memory and when dumped to YAML
+        """
+        for command in self.command_tree():
+            if isinstance(command._help_text, str):
+                command._help_text = HelpRef(
+                    digest=store.put(command._help_text), store=store
+                )
+
+    @classmethod
+    def yaml_state(cls, representer, data: "Command") -> dict:
+        state = super().yaml_state(representer, data)
+        # When dumping into a help store, write a reference in place of the text, without changing the command
+        store = getattr(representer, "help_store", None)
+        if store is not None and isinstance(data._help_text, str):
+            state["help_text"] = HelpRef(digest=store.put(data._help_text), store=store)
+        return state
+
     def command_tree(self) -> typing.Generator["Command", None, None]:
         """
         Returns a generator over the entire command tree. e.g. if this command has 2 subcommands, each with 2
@@ -276,9 +312,10 @@ class Command(AttrYamlMixin):
     If identified, this is the flag that returns the version of the executable
     """
 
-    help_text: typing.Optional[str] = None
+    _help_text: typing.Union[str, HelpRef, None] = None
     """
-    Optionally, the entire help text that was used to generate this Command
+    The help text, or a reference to it in a :py:class:`aclimatise.help_store.HelpStore`. Use :py:attr:`help_text`
+    instead
     """
 
     generated_using: typing.Optional[str] = None
@@ -293,7 +330,7 @@ class Command(AttrYamlMixin):
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class CliArgument(AttrYamlMixin):
     """
     A generic parent class for both named and positional CLI arguments
@@ -330,7 +367,7 @@ class CliArgument(AttrYamlMixin):
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True, kw_only=True)
+@attr.s(auto_attribs=True, kw_only=True, slots=True)
 class Positional(CliArgument):
     """
     A positional command-line argument. This probably means that it is required, and has no arguments like flags do
@@ -403,7 +440,7 @@ class Positional(CliArgument):
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True, kw_only=True)
+@attr.s(auto_attribs=True, kw_only=True, slots=True)
 class Flag(CliArgument):
     """
     Represents one single flag, with all synonyms for it, and all arguments, e.g. `-h, --help`
@@ -572,7 +609,8 @@ class Flag(CliArgument):
         arg_count = float("-inf")
 
         for synonym in synonyms:
-            synonym_str.append(synonym.name)
+            # The same synonyms appear in many commands, so share a single copy of each
+            synonym_str.append(sys.intern(synonym.name))
             if synonym.argtype.num_args() > arg_count:
                 arg_count = synonym.argtype.num_args()
                 args = synonym.argtype
@@ -595,7 +633,7 @@ class Flag(CliArgument):
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class FlagSynonym(AttrYamlMixin):
     """
     Internal class for storing the arguments for a single synonym
@@ -679,7 +717,7 @@ def infer_type(string) -> typing.Optional[cli_types.CliType]:
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class FlagArg(abc.ABC, AttrYamlMixin):
     """
     The data model for the argument or arguments for a flag, for example a flag might have no arguments, it might have
@@ -709,7 +747,7 @@ class FlagArg(abc.ABC, AttrYamlMixin):
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class EmptyFlagArg(FlagArg):
     """
     A flag that has no arguments, e.g. `--quiet` that is either present or not present
@@ -723,7 +761,7 @@ class EmptyFlagArg(FlagArg):
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class OptionalFlagArg(FlagArg):
     """
     When the flag has multiple arguments, some of which are optional, e.g.
@@ -742,9 +780,7 @@ class OptionalFlagArg(FlagArg):
 
     def text(self) -> typing.List[str]:
         return list(
-            itertools.chain.from_iterable(
-                [wordsegment.segment(name) for name in self.names]
-            )
+            itertools.chain.from_iterable([segment(name) for name in self.names])
         )
 
     def num_args(self) -> int:
@@ -752,12 +788,12 @@ class OptionalFlagArg(FlagArg):
 
     def get_type(self):
         return cli_types.CliTuple(
-            [infer_type(" ".join(wordsegment.segment(arg))) for arg in self.names]
+            [infer_type(" ".join(segment(arg))) for arg in self.names]
         )
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class SimpleFlagArg(FlagArg):
     """
     When a flag has one single argument, e.g. `-e PATTERN`, where PATTERN is the argument
@@ -769,17 +805,17 @@ class SimpleFlagArg(FlagArg):
     """
 
     def text(self) -> typing.List[str]:
-        return list(wordsegment.segment(self.name))
+        return list(segment(self.name))
 
     def num_args(self) -> int:
         return 1
 
     def get_type(self):
-        return infer_type(" ".join(wordsegment.segment(self.name))) or None
+        return infer_type(" ".join(segment(self.name))) or None
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class RepeatFlagArg(FlagArg):
     """
     When a flag accepts 1 or more arguments, e.g. `--samout SAMOUTS [SAMOUTS ...]`
@@ -791,21 +827,18 @@ class RepeatFlagArg(FlagArg):
     """
 
     def text(self) -> typing.List[str]:
-        return list(wordsegment.segment(self.name))
+        return list(segment(self.name))
 
     def num_args(self) -> int:
         return 1
 
     def get_type(self):
-        t = (
-            infer_type(" ".join(wordsegment.segment(self.name)))
-            or cli_types.CliString()
-        )
+        t = infer_type(" ".join(segment(self.name))) or cli_types.CliString()
         return cli_types.CliList(t)
 
 
 @yaml_object(yaml)
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class ChoiceFlagArg(FlagArg):
     """
     When a flag accepts one option from a list of options, e.g. `-s {yes,no,reverse}`
@@ -818,9 +851,7 @@ class ChoiceFlagArg(FlagArg):
 
     def text(self) -> typing.List[str]:
         return list(
-            itertools.chain.from_iterable(
-                [wordsegment.segment(name) for name in self.choices]
-            )
+            itertools.chain.from_iterable([segment(name) for name in self.choices])
         )
 
     def get_type(self):
@@ -1,16 +1,28 @@
+import heapq
 import itertools
 import unicodedata
 from collections import Counter, defaultdict
-from difflib import ndiff, unified_diff
 from itertools import groupby
-from typing import Generator, Iterable, List, Optional, Set, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Collection,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import regex as re
 from num2words import num2words
-from spacy.tokens import Token
 from word2number import w2n
 
-from aclimatise.nlp import nlp, wordsegment
+from aclimatise.memo import memoize
+from aclimatise.nlp import get_nlp, segment
+
+if TYPE_CHECKING:
+    from spacy.tokens import Token
 
 
 class NameGenerationError(Exception):
@@ -65,11 +77,15 @@ def sanitize_symbols(text):
     return re.sub("[^[:alpha:]-_., ]", "", text)
 
 
+#: Compiled once, because looking patterns up in the regex cache is slow, and this runs on every token in every name
+non_alpha_re = re.compile("[^[:alpha:]]")
+
+
 def sanitize_token(text):
     """
     Remove any non-word symbols
     """
-    return re.sub("[^[:alpha:]]", "", text)
+    return non_alpha_re.sub("", text)
 
 
 def replace_hyphens(text):
@@ -94,11 +110,13 @@ def distance_to_root(token, root):
         return dist
 
 
-def token_priority(token: Token, current: List[Token], key: Set[Token] = set()) -> int:
+def token_priority(
+    token: "Token", current: Collection["Token"], key: Set["Token"] = set()
+) -> int:
     """
     Returns a priority (where lowest means highest priority) of tokens
     :param token: The token to prioritise
-    :param current: The current list of tokens in the name
+    :param current: The tokens currently in the name
     """
     if token in key:
         # Tokens that are "keywords" are the highest priority
@@ -142,6 +160,7 @@ def name_to_snake(words: Iterable[str]) -> str:
     return "_".join([word.lower() for word in words])
 
 
+@memoize("human_readable_translate")
 def human_readable_translate(symbol: str):
     # First, if the symbol is in this small curated list, use that
     lookup = {".": "dot", ",": "comma", "/": "slash", "\\": "backslash", "@": "at"}
@@ -163,11 +182,16 @@ def human_readable_translate(symbol: str):
 
 def segment_string(text: str):
     """
-    Divides one larger word into segments
+    Divides one larger word into segments. The same flag names come up in many tools, so the results are memoized
     :param text:
     :return:
     """
+    # Return a copy, so that callers can't modify the memoized result
+    return list(_segment_string(text))
 
+
+@memoize("segment_string")
+def _segment_string(text: str) -> List[str]:
     base = text.lstrip("-")
 
     # Replace symbols with their unicode names
@@ -176,9 +200,7 @@ def segment_string(text: str):
     )
 
     dash_tokens = re.split("[-_ ]", translated)
-    segment_tokens = itertools.chain.from_iterable(
-        [wordsegment.segment(w) for w in dash_tokens]
-    )
+    segment_tokens = itertools.chain.from_iterable([segment(w) for w in dash_tokens])
     return [sanitize_token(tok) for tok in segment_tokens]
 
 
@@ -269,54 +291,79 @@ def intersection_indices(
 
 
 def find_key_diff_words(
-    descriptions: List[List[Token]], after_index: int = 5
-) -> List[Set[Token]]:
+    descriptions: List[List["Token"]], after_index: int = 5
+) -> List[Set["Token"]]:
     """
-    Returns a list of words for each description that uniquely identifies each
+    Returns a list of words for each description that uniquely identifies each. For each pair of descriptions, the
+    first word at which they differ is a key word for both of them
     :param after_index: The index in the string after which to consider key words. Because we always include the first
     few words in generated names, finding diffs at these positions isn't helpful
     """
-    desc_strings = [[str(token) for token in desc] for desc in descriptions]
+    # Comparing every pair of descriptions is quadratic, so instead we build a trie of all the descriptions. Two
+    # descriptions first differ at the node where their paths through the trie split, so at each node, a description
+    # differs from any other description that doesn't follow it to the same child node
+    root = TrieNode()
+    for description in descriptions:
+        root.insert([str(token) for token in description])
+
     ret = [set() for d in descriptions]
-    for i, description_a in enumerate(descriptions):
-        for j, description_b in enumerate(descriptions):
-            if i == j:
-                # Don't compare a word to itself
-                continue
-
-            # Keep iterating until we find the first diff, then add the diff words to a list of key words
-            for k, diff in enumerate(ndiff(desc_strings[i], desc_strings[j])):
-                if diff[0] in ["+", "-"]:
-                    if k > after_index:
-                        # If this token differs, add the difference
-                        if len(description_a) > k:
-                            ret[i].add(description_a[k])
-                        if len(description_b) > k:
-                            ret[j].add(description_b[k])
-
-                    # Always break once we find a diff
-                    break
+    for description, key_words in zip(descriptions, ret):
+        node = root
+        for k, token in enumerate(description):
+            child = node.children[str(token)]
+            if k > after_index and child.count < node.count:
+                key_words.add(token)
+            node = child
 
     return ret
 
 
-def preprocess(text: str) -> List[Token]:
+class TrieNode:
+    """
+    A node in a trie of token sequences, which counts the sequences that pass through it
+    """
+
+    __slots__ = ("children", "count")
+
+    def __init__(self):
+        self.children = defaultdict(TrieNode)
+        self.count = 0
+
+    def insert(self, tokens: Iterable[str]):
+        node = self
+        node.count += 1
+        for token in tokens:
+            node = node.children[token]
+            node.count += 1
+
+
+def sanitize_description(text: str) -> str:
+    """
+    Removes any delimited text and unhelpful symbols from a description, so that it can be parsed
+    """
+    return ensure_first_alpha(sanitize_symbols(remove_delims(replace_hyphens(text))))
+
+
+def preprocess(text: str) -> List["Token"]:
     """
     Pre-process some text, remove and unnecessary tokens, and return the Spacy data structure
     """
-    # Remove all delimited text
-    sanitized = ensure_first_alpha(
-        sanitize_symbols(remove_delims(replace_hyphens(text)))
-    )
+    return preprocess_batch([text])[0]
 
-    # Parse the sentence
-    doc = nlp(sanitized)
 
-    candidates = [tok for sent in doc.sents for tok in sent]
-    if len(candidates) == 0:
-        return []
-    else:
-        return candidates
+def preprocess_batch(
+    texts: Iterable[str], batch_size: int = 128
+) -> List[List["Token"]]:
+    """
+    Like :py:func:`preprocess`, but processes many texts at once, which is much faster than processing them one at a
+    time
+    :param batch_size: The number of texts that spaCy processes in each batch
+    """
+    sanitized = [sanitize_description(text) for text in texts]
+    return [
+        [tok for sent in doc.sents for tok in sent]
+        for doc in get_nlp().pipe(sanitized, batch_size=batch_size)
+    ]
 
 
 def generate_names_nlp(
@@ -331,18 +378,68 @@ def generate_names_nlp(
     :param max_length: The maximum length variables can have before it will fail
     :param reserved: Keywords that are not permitted to be used as the entire name
     """
+    return generate_names_nlp_batch(
+        [descriptions],
+        initial_length=initial_length,
+        max_length=max_length,
+        reserved=reserved,
+    )[0]
+
+
+def generate_names_nlp_batch(
+    description_lists: List[List[str]],
+    initial_length: int = 3,
+    max_length: int = 5,
+    reserved: Set[Tuple[str, ...]] = set(),
+    batch_size: int = 128,
+) -> List[List[List[str]]]:
+    """
+    Like :py:func:`generate_names_nlp`, but names the flags of many commands at once. The descriptions of every command
+    are pre-processed together, which is much faster, but the names for each command are still only unique within that
+    command, and are identical to those from :py:func:`generate_names_nlp`
+    :param description_lists: A list of flag descriptions for each command
+    :param batch_size: See :py:func:`preprocess_batch`
+    """
+    processed = iter(
+        preprocess_batch(
+            itertools.chain.from_iterable(description_lists), batch_size=batch_size
+        )
+    )
+    return [
+        generate_names_preprocessed(
+            list(itertools.islice(processed, len(descriptions))),
+            initial_length=initial_length,
+            max_length=max_length,
+            reserved=reserved,
+        )
+        for descriptions in description_lists
+    ]
+
+
+def generate_names_preprocessed(
+    processed: List[List["Token"]],
+    initial_length: int = 3,
+    max_length: int = 5,
+    reserved: Set[Tuple[str, ...]] = set(),
+) -> List[List[str]]:
+    """
+    Like :py:func:`generate_names_nlp`, but for descriptions that have already been pre-processed using
+    :py:func:`preprocess_batch`, so that the same pre-processing can be re-used for several sets of reserved keywords
+    :param processed: The pre-processed description of each flag
+    """
     #: A set of indices of flags that still need to be named
-    todo = set(range(len(descriptions)))
+    todo = set(range(len(processed)))
 
-    # Preprocessing
-    processed = list(map(preprocess, descriptions))
     diffs = find_key_diff_words(processed)
     generators = [
         generate_name(proc, initial_length=initial_length, key_words=keywords)
         for proc, keywords in zip(processed, diffs)
     ]
     #: A list of flag names, in the same order as the input list
-    ret = [[]] * len(descriptions)
+    ret = [[]] * len(processed)
+    #: Maps each name to the indices of the flags that currently have it, so that we only need to check the names
+    #: that changed in each round for collisions, rather than comparing every name
+    index = defaultdict(set)
     #: A set of generators that are exhausted, meaning we can't iterate on them
     empty = set()
 
@@ -355,21 +452,27 @@ def generate_names_nlp(
             return ret
             # raise Exception("Variable names failed to converge")
 
-        # Update the outputs using each generator
+        # Update the outputs using each generator, and note which names might now be shared
+        changed = set()
         for j in todo:
             try:
                 # If we are able to add more characters, do so
                 name = next(generators[j])
+                index[tuple(ret[j])].discard(j)
                 ret[j] = name
+                index[tuple(name)].add(j)
             except StopIteration:
                 # If we can't, exclude it from further calculations
                 empty.add(j)
+            changed.add(tuple(ret[j]))
 
-        # Clean up old generators
-        new_todo = duplicate_keys(ret) | intersection_indices(ret, reserved) - empty
-        for j in todo - new_todo:
-            generators[j] = None
-        todo = new_todo
+        # Only the groups of names that changed can contain new duplicates. If the names are empty strings, we should
+        # stop iterating and try another method
+        new_todo = set()
+        for name in changed:
+            if len(index[name]) > 1 and len("".join(name)) > 0:
+                new_todo |= index[name]
+        todo = new_todo | {j for j in todo if tuple(ret[j]) in reserved} - empty
 
         # Finish once every variable name is unique
         if len(todo) == 0:
@@ -379,7 +482,7 @@ def generate_names_nlp(
 
 
 def generate_name(
-    tokens: List[Token], initial_length: int = 3, key_words: Set[Token] = set()
+    tokens: List["Token"], initial_length: int = 3, key_words: Set["Token"] = set()
 ) -> Generator[List[str], None, None]:
     """
     Given one or more sentences, attempt to parse out a concise (2-4 word) variable name. This is a generator, and each
@@ -388,27 +491,59 @@ def generate_name(
     :param tokens: One or more sentences of text that have been pre-processed
     :param initial_length: The number of words in the first output this produces
     """
-    candidates = tokens
     ret = [*key_words]
+    #: The tokens already in the name, for fast lookups
+    used = set(ret)
+    #: The position and sanitized text of each token in the name, so that each token is only sanitized once
+    words = [(tok.i, sanitize_token(str(tok)).lower()) for tok in ret]
+    #: The positions of each token in the list, so that we can find the tokens attached to each new word in the name
+    positions = {}
+    for pos, token in enumerate(tokens):
+        positions.setdefault(token, []).append(pos)
+
+    # All tokens, in a heap ordered by importance. Popping from this heap returns the same token that sorting every
+    # remaining candidate by priority would: among equal priorities, the last in the original order wins, unless a
+    # token's priority has just improved, in which case it ranks behind every token that already had that priority
+    priorities = [token_priority(token, used) for token in tokens]
+    heap = [(priority, -pos, pos) for pos, priority in enumerate(priorities)]
+    heapq.heapify(heap)
+    rank = 0
+    remaining = len(tokens)
+
     max = initial_length
     while True:
 
-        # All tokens, sorted in order of importance
-        candidates = sorted(
-            candidates, key=lambda token: token_priority(token, ret), reverse=True
-        )
-
         # Each time through the loop, we increase the number of candidates we use
-        if candidates:
-            ret.append(candidates.pop())
+        if remaining:
+            while True:
+                priority, _, pos = heapq.heappop(heap)
+                # Skip any stale entries for tokens whose priority has since changed
+                if priority == priorities[pos]:
+                    break
+            priorities[pos] = None
+            remaining -= 1
+            token = tokens[pos]
+            ret.append(token)
+            words.append((token.i, sanitize_token(str(token)).lower()))
+
+            # The only part of the priority that depends on the current name is whether each token's head is in it,
+            # so only the tokens attached to this one need updating
+            if token not in used:
+                used.add(token)
+                for child in token.children:
+                    for dependent in positions.get(child, []):
+                        if priorities[dependent] is None:
+                            continue
+                        priority = token_priority(child, used)
+                        if priority != priorities[dependent]:
+                            rank += 1
+                            priorities[dependent] = priority
+                            heapq.heappush(heap, (priority, rank, dependent))
 
         # Iterate until we have N tokens, then yield the word. Then if the generator is called again, increase N by
         # 1 and continue
 
-        if len(ret) >= max or len(candidates) == 0:
+        if len(ret) >= max or remaining == 0:
             max += 1
             # Now sort the tokens back into their original positions
-            yield [
-                sanitize_token(str(tok)).lower()
-                for tok in sorted(ret, key=lambda tok: tok.i)
-            ]
+            yield [word for i, word in sorted(words, key=lambda word: word[0])]
@@ -1,5 +1,19 @@
-import spacy
-import wordsegment
+"""
+Natural language processing utilities. The spaCy and wordsegment models take several seconds and a lot of memory to
+load, so they are only loaded the first time they're needed, and then shared by all callers
+"""
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Type
+
+import regex
+
+from aclimatise.memo import memoize
+
+_load_lock = threading.RLock()
+_models = {}
 
 
 def prevent_sentence_boundary_detection(doc):
@@ -8,22 +22,89 @@ def prevent_sentence_boundary_detection(doc):
     return doc
 
 
-try:
-    nlp = spacy.load("en")
-    no_sentences = spacy.load("en")
-    no_sentences.add_pipe(
-        prevent_sentence_boundary_detection, name="prevent-sbd", before="parser"
-    )
-except IOError:
-    raise Exception(
-        "Spacy model doesn't exist! Install it with `python -m spacy download en`"
-    )
+def get_nlp():
+    """
+    Returns the spaCy English pipeline, loading it if this is the first time it's needed
+    """
+    if "nlp" not in _models:
+        with _load_lock:
+            if "nlp" not in _models:
+                import spacy
 
-# We load the spacy and the wordsegment models here as a kind of singleton pattern, to avoid multiple functions loading
-# redundant copies
+                try:
+                    _models["nlp"] = spacy.load("en")
+                except IOError:
+                    raise Exception(
+                        "Spacy model doesn't exist! Install it with `python -m spacy download en`"
+                    )
+    return _models["nlp"]
+
+
+def get_no_sentences():
+    """
+    Returns a spaCy English pipeline that treats each text as a single sentence. This shares its components with
+    :py:func:`get_nlp`, so the model is only loaded once
+    """
+    if "no_sentences" not in _models:
+        with _load_lock:
+            if "no_sentences" not in _models:
+                from spacy.language import Language
 
-if len(wordsegment.WORDS) == 0:
-    wordsegment.load()
+                nlp = get_nlp()
+                no_sentences = Language(
+                    vocab=nlp.vocab, make_doc=nlp.tokenizer, meta=nlp.meta
+                )
+                for name, component in nlp.pipeline:
+                    no_sentences.add_pipe(component, name=name)
+                no_sentences.add_pipe(
+                    prevent_sentence_boundary_detection,
+                    name="prevent-sbd",
+                    before="parser",
+                )
+                _models["no_sentences"] = no_sentences
+    return _models["no_sentences"]
+
+
+def get_wordsegment():
+    """
+    Returns the wordsegment module, loading its word frequencies if this is the first time it's needed
+    """
+    if "wordsegment" not in _models:
+        with _load_lock:
+            if "wordsegment" not in _models:
+                import wordsegment
+
+                if len(wordsegment.WORDS) == 0:
+                    wordsegment.load()
+                _models["wordsegment"] = wordsegment
+    return _models["wordsegment"]
+
+
+@memoize("segment")
+def _segment(text: str) -> List[str]:
+    return get_wordsegment().segment(text)
+
+
+def segment(text: str) -> List[str]:
+    """
+    Splits text that has no spaces into a list of words, e.g. "outputfile" becomes ["output", "file"]. The same words
+    are segmented over and over, so the results are memoized
+    """
+    # Return a copy, so that callers can't modify the memoized result
+    return list(_segment(text))
+
+
+def __getattr__(name: str):
+    # For backwards compatibility, the models can still be accessed as module attributes, e.g.
+    # ``from aclimatise.nlp import nlp``, but they are only loaded when accessed. This requires Python 3.7
+    getters = {
+        "nlp": get_nlp,
+        "no_sentences": get_no_sentences,
+        "wordsegment": get_wordsegment,
+    }
+    if name in getters:
+        return getters[name]()
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
 
 def is_sentence(text: str, threshold: float = 0.8) -> bool:
@@ -32,8 +113,30 @@ def is_sentence(text: str, threshold: float = 0.8) -> bool:
     learning classifier in the future
     :param threshold: If the ratio of non-word tokens over word tokens is higher than this, then return False
     """
+    return _is_sentence_doc(get_no_sentences()(text), threshold)
+
+
+def are_sentences(
+    texts: Iterable[str],
+    threshold: float = 0.8,
+    batch_size: int = 128,
+    n_process: int = 1,
+) -> List[bool]:
+    """
+    Like :py:func:`is_sentence`, but classifies many texts at once, which is much faster than classifying them one at a
+    time
+    :param batch_size: The number of texts that spaCy processes in each batch
+    :param n_process: The number of processes spaCy uses to process the texts
+    """
+    return [
+        _is_sentence_doc(doc, threshold)
+        for doc in get_no_sentences().pipe(
+            texts, batch_size=batch_size, n_process=n_process
+        )
+    ]
+
 
-    doc = no_sentences(text)
+def _is_sentence_doc(doc, threshold: float) -> bool:
     sents = list(doc.sents)
 
     if len(sents) == 0:
@@ -54,3 +157,174 @@ def is_sentence(text: str, threshold: float = 0.8) -> bool:
 
     result = word_count == 0 or non_word_count / word_count < threshold
     return result
+
+
+class SentenceBackend(ABC):
+    """
+    Abstract base class for a method of deciding whether texts are sentences. Different backends trade off accuracy
+    against speed
+    """
+
+    @classmethod
+    def choose_backend(cls, name: str) -> Type["SentenceBackend"]:
+        """
+        Returns a backend subclass, given its name
+        :param name: The name of the backend, e.g. "spacy" or "heuristic"
+        """
+        for subclass in cls.__subclasses__():
+            if subclass.name() == name:
+                return subclass
+
+        raise Exception("Unknown sentence backend")
+
+    @classmethod
+    @abstractmethod
+    def name(cls) -> str:
+        """
+        Returns the name of this backend, e.g. "spacy"
+        """
+        pass
+
+    @abstractmethod
+    def classify(self, texts: List[str], threshold: float = 0.8) -> List[bool]:
+        """
+        Returns a bool for each text, indicating if it's likely a sentence
+        :param threshold: If the ratio of non-word tokens over word tokens is higher than this, the text isn't a
+            sentence
+        """
+        pass
+
+
+class SpacyBackend(SentenceBackend):
+    """
+    Classifies texts using the part of speech tags from spaCy's English model. This is the most accurate backend, but
+    it's slow, and requires the model to be installed
+    """
+
+    def __init__(self, batch_size: int = 128, n_process: int = 1):
+        """
+        :param batch_size: See :py:func:`are_sentences`
+        :param n_process: See :py:func:`are_sentences`
+        """
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+    @classmethod
+    def name(cls) -> str:
+        return "spacy"
+
+    def classify(self, texts: List[str], threshold: float = 0.8) -> List[bool]:
+        return are_sentences(
+            texts,
+            threshold=threshold,
+            batch_size=self.batch_size,
+            n_process=self.n_process,
+        )
+
+
+#: Splits text into tokens that are roughly the same as spaCy's: words, and individual punctuation characters
+heuristic_token = regex.compile(r"[\p{L}\p{N}]+(?:['’.-][\p{L}\p{N}]+)*|\S")
+
+#: Matches tokens that contain a letter, which are the only tokens we consider to be words
+heuristic_word = regex.compile(r"\p{L}")
+
+
+class HeuristicBackend(SentenceBackend):
+    """
+    Classifies texts by counting the tokens that contain no letters, such as numbers and symbols, in place of spaCy's
+    NUM, SYM, PUNCT and X tags. This is many times faster than :py:class:`SpacyBackend`, and doesn't need any model,
+    but it occasionally disagrees with spaCy. Use ``benchmarks/sentence_backends.py`` to measure the agreement
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "heuristic"
+
+    def classify(self, texts: List[str], threshold: float = 0.8) -> List[bool]:
+        return [self.is_sentence(text, threshold) for text in texts]
+
+    @staticmethod
+    def is_sentence(text: str, threshold: float = 0.8) -> bool:
+        # spaCy finds no sentences in an empty text
+        if len(text) == 0:
+            return False
+
+        tokens = heuristic_token.findall(text)
+        if len(tokens) == 0:
+            return True
+
+        non_word_count = sum(1 for tok in tokens if not heuristic_word.search(tok))
+        return non_word_count / len(tokens) < threshold
+
+
+class SentenceClassifier:
+    """
+    Remembers which texts are sentences, and defers the classification of new texts so that they can be classified
+    together in one batch. Calling the classifier with a text it hasn't seen before returns True, and queues the text
+    for the next call to :py:meth:`classify_pending`. A classifier keeps track of the guesses made by a single parse at
+    a time, so it must not be shared between threads
+    """
+
+    def __init__(
+        self, backend: Optional[SentenceBackend] = None, threshold: float = 0.8
+    ):
+        """
+        :param backend: The method used to classify texts. Defaults to a :py:class:`SpacyBackend`
+        :param threshold: See :py:func:`is_sentence`
+        """
+        self.backend = backend or SpacyBackend()
+        self.threshold = threshold
+        self.results: Dict[str, bool] = {}
+        # An OrderedDict is used as an ordered set, so that texts are classified in a consistent order
+        self.pending = OrderedDict()
+        self._guesses: Optional[Set[str]] = None
+
+    def __call__(self, text: str) -> bool:
+        if text in self.results:
+            return self.results[text]
+        self.pending[text] = None
+        if self._guesses is not None:
+            self._guesses.add(text)
+        return True
+
+    @contextmanager
+    def recording_guesses(self) -> Iterator[Set[str]]:
+        """
+        Within this context, every text that is guessed to be a sentence, because it hasn't been classified yet, is
+        added to the yielded set. Once they have been classified, :py:meth:`guessed_right` checks the guesses
+        """
+        guesses = set()
+        self._guesses = guesses
+        try:
+            yield guesses
+        finally:
+            self._guesses = None
+
+    def guessed_right(self, guesses: Iterable[str]) -> bool:
+        """
+        Returns True if every one of these texts, which were guessed to be sentences, has been classified as one
+        """
+        return all(self.results[text] for text in guesses)
+
+    def classify(self, texts: Iterable[str]):
+        """
+        Classifies any of these texts that haven't already been classified
+        """
+        for text in texts:
+            if text not in self.results:
+                self.pending[text] = None
+        self.classify_pending()
+
+    def classify_pending(self) -> bool:
+        """
+        Classifies every text that has been queued, and returns True if any of them aren't sentences. Queued texts are
+        assumed to be sentences, so this is True if anything that used that assumption needs to be done again
+        """
+        texts = list(self.pending)
+        self.pending.clear()
+        if not texts:
+            return False
+
+        results = self.backend.classify(texts, threshold=self.threshold)
+        self.results.update(zip(texts, results))
+        return not all(results)
@@ -1,15 +1,64 @@
-from typing import List
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence
 
 from pyparsing import *
 
 
+class IndentStack(threading.local):
+    """
+    A list-like stack of indentation levels, which has a separate value in each thread. This allows the same grammar
+    to be used to parse several strings at once, even though the grammar's parse actions update the stack
+    """
+
+    def __init__(self, initial: Sequence[int] = (1,)):
+        self.initial = initial
+        self.levels = list(initial)
+
+    @contextmanager
+    def fresh(self) -> Iterator["IndentStack"]:
+        """
+        Resets the stack to its initial value for the duration of a single parse, restoring it afterwards
+        """
+        previous = self.levels
+        self.levels = list(self.initial)
+        try:
+            yield self
+        finally:
+            self.levels = previous
+
+    def append(self, level: int):
+        self.levels.append(level)
+
+    def pop(self) -> int:
+        return self.levels.pop()
+
+    def __getitem__(self, item):
+        return self.levels[item]
+
+    def __setitem__(self, key, value):
+        self.levels[key] = value
+
+    def __contains__(self, item) -> bool:
+        return item in self.levels
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def __iter__(self):
+        return iter(self.levels)
+
+    def __repr__(self):
+        return repr(self.levels)
+
+
 class IndentCheckpoint(ParseElementEnhance):
     """
     This is a wrapper element that simply rolls back changes in the indent stack whenever the contained element
     fails to match. This ensures the stack remains accurate
     """
 
-    def __init__(self, expr: ParserElement, indent_stack: List[int]):
+    def __init__(self, expr: ParserElement, indent_stack: IndentStack):
         super().__init__(expr)
         # self.expr = expr
         self.stack = indent_stack
@@ -36,11 +85,26 @@ class IndentCheckpoint(ParseElementEnhance):
 
 class IndentParserMixin:
     """
-    A mixin that maintains an indent stack, and utility methods for them
+    A mixin that maintains an indent stack, and utility methods for them. Building the grammar is slow, so rather than
+    constructing a new parser each time, use :py:meth:`shared` to get an instance that can be re-used by any thread
     """
 
+    _shared_lock = threading.Lock()
+
     def __init__(self):
-        self.stack = [1]
+        self.stack = IndentStack()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns an instance of this parser that is constructed once per process, and is safe to share between threads
+        """
+        # Look in the class's own __dict__, so that subclasses don't share their parent's instance
+        if "_shared_instance" not in cls.__dict__:
+            with cls._shared_lock:
+                if "_shared_instance" not in cls.__dict__:
+                    cls._shared_instance = cls()
+        return cls.__dict__["_shared_instance"]
 
     def pop_indent(self):
         def check_indent(s, l, t):
@@ -103,4 +167,4 @@ class IndentParserMixin:
         return Empty().setParseAction(check_dedent).setName("Unindent")
 
 
-__all__ = [IndentCheckpoint, IndentParserMixin]
+__all__ = [IndentCheckpoint, IndentParserMixin, IndentStack]
@@ -0,0 +1,295 @@
+"""
+A long-running HTTP server that parses help text and generates wrappers. The language models and grammars are loaded
+once, when the server starts, so each request only pays for the parsing itself
+"""
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Callable, Dict, Optional
+
+from aclimatise.batch import preload
+from aclimatise.converter import WrapperGenerator
+from aclimatise.execution.local import LocalExecutor
+from aclimatise.integration import parse_help
+from aclimatise.model import Command
+from aclimatise.nlp import SentenceBackend, SentenceClassifier
+from aclimatise.yaml import fast_dump, yaml
+
+Request = Dict[str, Any]
+Response = Dict[str, Any]
+
+
+class RequestError(Exception):
+    """
+    Raised when a request is invalid, which the server reports with a 400 status
+    """
+
+
+def _field(request: Request, name: str, typ: type, default: Any = None) -> Any:
+    """
+    Returns a field of the request, checking its type
+    :param default: The value to use if the field is missing. If this is None, the field is required
+    """
+    if name not in request:
+        if default is None:
+            raise RequestError("Missing field '{}'".format(name))
+        return default
+
+    value = request[name]
+    if not isinstance(value, typ):
+        raise RequestError("Field '{}' must be a {}".format(name, typ.__name__))
+    return value
+
+
+def _cmd(request: Request):
+    cmd = _field(request, "cmd", list)
+    if not cmd or not all(isinstance(word, str) for word in cmd):
+        raise RequestError("Field 'cmd' must be a non-empty list of strings")
+    return cmd
+
+
+def _sentence_backend(request: Request) -> SentenceBackend:
+    name = _field(request, "sentences", str, "spacy")
+    for backend in SentenceBackend.__subclasses__():
+        if backend.name() == name:
+            return backend()
+    raise RequestError("Unknown sentence backend '{}'".format(name))
+
+
+def _dump(command: Command) -> str:
+    buffer = StringIO()
+    fast_dump(command, buffer)
+    return buffer.getvalue()
+
+
+def parse_help_endpoint(request: Request) -> Response:
+    """
+    Parses the help text of a command. The request has a ``cmd``, a list of strings, and its ``help`` text. The
+    response has the parsed ``command``, as YAML
+    """
+    cmd = _cmd(request)
+    classifier = SentenceClassifier(_sentence_backend(request))
+    command = parse_help(cmd, _field(request, "help", str), sentences=classifier)
+    return {"command": _dump(command)}
+
+
+def explore_endpoint(request: Request, max_depth: int = 2) -> Response:
+    """
+    Runs a command on the server to find its help text, and that of its subcommands. The request has a ``cmd``, and
+    optionally a ``depth``. The response has the parsed ``command``, as YAML
+    :param max_depth: The deepest that clients can explore. A larger ``depth`` is reduced to this
+    """
+    executor = LocalExecutor(sentence_backend=_sentence_backend(request))
+    depth = min(_field(request, "depth", int, 1), max_depth)
+    command = executor.explore(_cmd(request), max_depth=depth)
+    return {"command": _dump(command)}
+
+
+def save_to_string_endpoint(request: Request) -> Response:
+    """
+    Generates a wrapper. The request has either a ``command``, as returned by the other endpoints, or a ``cmd`` and its
+    ``help`` text, which are parsed first. It can also have a ``format``, ``case`` and ``generate_names``, which are
+    the same as the options to ``aclimatise pipe``. The response has the wrapper as its ``output``
+    """
+    if "command" in request:
+        command = yaml.load(_field(request, "command", str))
+        if not isinstance(command, Command):
+            raise RequestError("Field 'command' must be a YAML command")
+    else:
+        classifier = SentenceClassifier(_sentence_backend(request))
+        command = parse_help(
+            _cmd(request), _field(request, "help", str), sentences=classifier
+        )
+
+    format = _field(request, "format", str, "cwl")
+    case = _field(request, "case", str, "snake")
+    if format not in {
+        subclass.format() for subclass in WrapperGenerator.__subclasses__()
+    }:
+        raise RequestError("Unknown format '{}'".format(format))
+    if case not in WrapperGenerator.cases:
+        raise RequestError("Unknown case '{}'".format(case))
+
+    converter = WrapperGenerator.choose_converter(format)(
+        generate_names=_field(request, "generate_names", bool, False), case=case
+    )
+    return {"output": converter.save_to_string(command)}
+
+
+#: The functions that handle each POST endpoint, by path
+endpoints: Dict[str, Callable[[Request], Response]] = {
+    "/parse_help": parse_help_endpoint,
+    "/explore": explore_endpoint,
+    "/save_to_string": save_to_string_endpoint,
+}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles each request by passing it to the server's worker pool. Requests and responses are JSON objects
+    """
+
+    # Allow clients to keep the connection open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": "Unknown endpoint"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # We can't tell where this request ends, so the connection can't be used for another
+            self.close_connection = True
+            self.send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > self.server.max_request_size:
+            # The body isn't read, so the connection can't be used for another request
+            self.close_connection = True
+            self.send_json(
+                413,
+                {
+                    "error": "The request is larger than {} bytes".format(
+                        self.server.max_request_size
+                    )
+                },
+            )
+            return
+
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            self.send_json(400, {"error": "The request must be a JSON object"})
+            return
+
+        endpoint = endpoints.get(self.path)
+        if endpoint is None:
+            self.send_json(404, {"error": "Unknown endpoint"})
+        elif endpoint is explore_endpoint and not self.server.allow_explore:
+            self.send_json(
+                403, {"error": "The server was started without --allow-explore"}
+            )
+        elif not isinstance(request, dict):
+            self.send_json(400, {"error": "The request must be a JSON object"})
+        elif not self.server.slots.acquire(blocking=False):
+            self.send_json(503, {"error": "Too many requests are queued"})
+        else:
+            if endpoint is explore_endpoint:
+                endpoint = partial(explore_endpoint, max_depth=self.server.max_depth)
+            pool = self.server.pool
+            try:
+                response = pool.submit(endpoint, request).result()
+            except RequestError as e:
+                self.send_json(400, {"error": str(e)})
+            except BrokenProcessPool:
+                # A worker died, e.g. because it ran out of memory, which breaks the pool for every request
+                self.server.restart_pool(pool)
+                self.send_json(503, {"error": "A worker process died, try again"})
+            except Exception as e:
+                self.send_json(500, {"error": "{}: {}".format(type(e).__name__, e)})
+            else:
+                self.send_json(200, response)
+            finally:
+                self.server.slots.release()
+
+    def send_json(self, status: int, body: Response):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket clients don't have an address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+
+class ServerMixin(ThreadingMixIn):
+    """
+    Adds the worker pool and request queue to a server. Each connection is handled by a thread, which waits for a
+    worker process to handle its requests
+    """
+
+    daemon_threads = True
+
+    def setup_workers(
+        self,
+        workers: Optional[int] = None,
+        queue_size: int = 100,
+        allow_explore: bool = False,
+        max_request_size: int = 10 * 2 ** 20,
+        max_depth: int = 2,
+    ):
+        """
+        :param workers: The number of worker processes. Defaults to the number of CPUs
+        :param queue_size: The maximum number of requests that can be waiting for, or using, a worker. Any more are
+            rejected with a 503 status
+        :param allow_explore: If true, enable the ``/explore`` endpoint, which lets clients run commands on this
+            machine
+        :param max_request_size: The largest request body, in bytes. Larger requests are rejected with a 413 status
+        :param max_depth: The deepest that ``/explore`` requests can explore subcommands
+        """
+        # Loading the models here means that forked worker processes share them, rather than each loading their own
+        preload()
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=preload)
+        self.pool_lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.allow_explore = allow_explore
+        self.max_request_size = max_request_size
+        self.max_depth = max_depth
+
+    def restart_pool(self, broken: ProcessPoolExecutor):
+        """
+        Replaces a broken worker pool with a new one. Several requests can fail because of the same broken pool, but it
+        is only replaced once
+        """
+        with self.pool_lock:
+            if self.pool is broken:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=preload
+                )
+        broken.shutdown(wait=False)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class TcpServer(ServerMixin, HTTPServer):
+    pass
+
+
+class UnixServer(ServerMixin, UnixStreamServer):
+    def server_close(self):
+        super().server_close()
+        os.unlink(self.server_address)
+
+
+def make_server(
+    host: str = "127.0.0.1", port: int = 8000, socket: Optional[str] = None, **kwargs
+) -> ServerMixin:
+    """
+    Creates a server, and starts its worker processes. Use ``serve_forever()`` to handle requests, and
+    ``server_close()`` to stop the workers
+    :param socket: The path of a Unix socket to listen on. If this is set, ``host`` and ``port`` are ignored
+    :param kwargs: See :py:meth:`ServerMixin.setup_workers`
+    """
+    if socket is not None:
+        server = UnixServer(socket, RequestHandler)
+    else:
+        server = TcpServer((host, port), RequestHandler)
+    server.setup_workers(**kwargs)
+    return server
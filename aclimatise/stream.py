@@ -0,0 +1,111 @@
+"""
+Converts a stream of JSON-lines records, each containing the help text of one command, into a stream of wrappers. This
+lets aCLImatise sit inside a pipeline or queue consumer, and convert any number of commands without being restarted
+"""
+import json
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Deque, Generator, Iterable, Optional
+
+from aclimatise.batch import preload
+from aclimatise.converter import WrapperGenerator
+from aclimatise.integration import parse_help
+from aclimatise.nlp import SentenceBackend, SentenceClassifier
+
+
+def convert_record(
+    line: str,
+    format: str = "cwl",
+    generate_names: bool = False,
+    case: str = "snake",
+    sentences: str = "spacy",
+) -> str:
+    """
+    Converts a single record into a wrapper. Any error is caught and returned in the output record, so that one bad
+    record doesn't stop the stream
+    :param line: A JSON object with a ``cmd`` key, containing the command as a list of strings, and a ``help`` key,
+        containing its help text
+    :param format: The output format, e.g. "cwl". See :py:meth:`aclimatise.converter.WrapperGenerator.choose_converter`
+    :return: A JSON object with the same ``cmd``, and either an ``output`` key, containing the wrapper, or an ``error``
+        key, containing a description of what went wrong
+    """
+    cmd = None
+    try:
+        record = json.loads(line)
+        cmd = record["cmd"]
+        classifier = SentenceClassifier(SentenceBackend.choose_backend(sentences)())
+        command = parse_help(cmd, record["help"], sentences=classifier)
+        converter = WrapperGenerator.choose_converter(format)(
+            generate_names=generate_names, case=case
+        )
+        return json.dumps({"cmd": cmd, "output": converter.save_to_string(command)})
+    except Exception:
+        return json.dumps({"cmd": cmd, "error": traceback.format_exc()})
+
+
+def convert_stream(
+    lines: Iterable[str],
+    convert: Callable[[str], str] = convert_record,
+    max_workers: int = 1,
+    buffer: Optional[int] = None,
+) -> Generator[str, None, None]:
+    """
+    Converts each record as it is read, and yields the results in the same order as the input. Blank lines are skipped
+    :param lines: The input records, one JSON object per line. This can be a file, such as stdin, in which case each
+        line is only read once there is room for it in the buffer
+    :param convert: A function that converts a single record, such as :py:func:`convert_record`. If ``max_workers`` is
+        more than 1, this has to be picklable, so use :py:func:`functools.partial` rather than a lambda to set its
+        options
+    :param max_workers: The number of processes that convert records in parallel. If this is 1, records are converted
+        in this process, one at a time
+    :param buffer: The maximum number of records that are read but not yet output, which bounds the memory used.
+        Defaults to twice the number of workers
+    """
+    records = (line for line in lines if line.strip())
+    if max_workers == 1:
+        for line in records:
+            yield convert(line)
+        return
+
+    # Load the models before creating the pool, so that forked worker processes share them
+    preload()
+    if buffer is None:
+        buffer = 2 * max_workers
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=preload)
+    try:
+        pending: Deque = deque()
+        for line in records:
+            try:
+                future = pool.submit(convert, line)
+            except BrokenProcessPool:
+                # A worker died, which breaks the pool. The records it was converting fail when they're output, and
+                # the rest of the stream is converted by a new pool
+                pool.shutdown()
+                pool = ProcessPoolExecutor(max_workers=max_workers, initializer=preload)
+                future = pool.submit(convert, line)
+            pending.append((future, line))
+            # A slow record blocks the output, even if later ones are done, but the buffer limits how many of those
+            # can pile up behind it
+            if len(pending) >= buffer:
+                yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+    finally:
+        pool.shutdown()
+
+
+def _result(future: Future, line: str) -> str:
+    """
+    Returns the output of a record, or an error record if the worker converting it died without raising an
+    exception, e.g. because it ran out of memory
+    """
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        try:
+            cmd = json.loads(line)["cmd"]
+        except Exception:
+            cmd = None
+        return json.dumps({"cmd": cmd, "error": "Worker process died: {}".format(e)})
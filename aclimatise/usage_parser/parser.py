@@ -79,7 +79,10 @@ class UsageParser(IndentParserMixin):
 
     def parse_usage(self, cmd: List[str], usage: str, debug: bool = False) -> Command:
         # return self.usage.searchString(usage)
-        usage_blocks = self.usage.setDebug(debug).searchString(usage)
+        # Don't modify the shared grammar just to enable debugging for this one parse
+        grammar = self.usage.copy().setDebug(True) if debug else self.usage
+        with self.stack.fresh():
+            usage_blocks = grammar.searchString(usage)
         if not usage_blocks:
             # If we had no results, return an empty command
             return Command(command=cmd)
@@ -1,12 +1,490 @@
+import re
+import sys
+from functools import lru_cache
+from io import StringIO
+from typing import Any, Dict, List, Set, TextIO, Tuple
+
+import attr
 from ruamel.yaml import YAML, yaml_object
-from ruamel.yaml.comments import CommentedMap
+from ruamel.yaml.anchor import Anchor
+from ruamel.yaml.comments import (
+    CommentedMap,
+    CommentedSeq,
+    comment_attrib,
+    format_attrib,
+    merge_attrib,
+    tag_attrib,
+)
+from ruamel.yaml.emitter import Emitter, ScalarAnalysis
+from ruamel.yaml.events import ScalarEvent
+from ruamel.yaml.nodes import ScalarNode
+from ruamel.yaml.representer import RoundTripRepresenter
+from ruamel.yaml.resolver import VersionedResolver
 
 yaml = YAML()
 
 
+def compact_seq(seq: CommentedSeq) -> list:
+    """
+    Returns a plain copy of a sequence loaded by the round-trip loader, without the comment and line information that
+    it carries, which we never use. Strings in the copy, which are mostly flag synonyms and command words that appear
+    throughout a tree, are interned
+    """
+    # A sequence can be shared by several objects using a YAML anchor, so remember the copy, in order that they still
+    # share it
+    compact = seq.__dict__.get("_compact")
+    if compact is None:
+        compact = [sys.intern(item) if type(item) is str else item for item in seq]
+        seq.__dict__["_compact"] = compact
+    return compact
+
+
 class AttrYamlMixin:
+    # Allows subclasses to use slots=True without gaining a __dict__ from this class
+    __slots__ = ()
+
     @classmethod
     def from_yaml(cls, constructor, node):
         state = CommentedMap()
         constructor.construct_mapping(node, state)
-        return cls(**state)
+        obj = cls(**state)
+        yield obj
+
+        # The loader only fills in sequences after this object has been yielded, so they can only be replaced now
+        for key, value in state.items():
+            if type(value) is CommentedSeq:
+                # Use object.__setattr__ so that this also works for frozen classes
+                object.__setattr__(obj, key, compact_seq(value))
+
+    @classmethod
+    def yaml_state(cls, representer, data) -> dict:
+        """
+        Returns the fields to write for this object
+        """
+        # Slotted classes don't have a __dict__ for the default representer to use, so list the fields explicitly. Use
+        # the names that __init__ expects, which don't have the leading underscore of private fields
+        return {
+            field.name.lstrip("_"): getattr(data, field.name)
+            for field in attr.fields(cls)
+        }
+
+    @classmethod
+    def to_yaml(cls, representer, data):
+        return representer.represent_mapping(
+            getattr(cls, "yaml_tag", "!" + cls.__name__),
+            cls.yaml_state(representer, data),
+            flow_style=representer.default_flow_style,
+        )
+
+
+NULL_TAG = "tag:yaml.org,2002:null"
+BOOL_TAG = "tag:yaml.org,2002:bool"
+INT_TAG = "tag:yaml.org,2002:int"
+STR_TAG = "tag:yaml.org,2002:str"
+SEQ_TAG = "tag:yaml.org,2002:seq"
+MAP_TAG = "tag:yaml.org,2002:map"
+SET_TAG = "tag:yaml.org,2002:set"
+
+SCALAR = "scalar"
+SEQUENCE = "sequence"
+MAPPING = "mapping"
+
+#: Types that the round-trip representer never writes as anchors and aliases
+UNALIASED = (type(None), bool, int, str)
+
+#: Characters that the emitter escapes in double-quoted scalars, along with spaces, at which it may break the line
+DOUBLE_QUOTED_STOPS = {
+    True: re.compile(
+        '[ "\\\\\x85\u2028\u2029\ufeff]|[^\x20-\x7e\xa0-\ud7ff\ue000-\ufffd]'
+    ),
+    False: re.compile('[ "\\\\]|[^\x20-\x7e]'),
+}
+#: Characters that the emitter treats specially in plain scalars
+PLAIN_STOPS = re.compile("[ \n\x85\u2028\u2029]")
+
+_resolver = VersionedResolver()
+
+
+@lru_cache(maxsize=4096)
+def _implicit(tag: str, value: str) -> Tuple[bool, bool, bool]:
+    # This is how the serializer decides whether a scalar needs quoting or an explicit tag
+    return (
+        tag == _resolver.resolve(ScalarNode, value, (True, False)),
+        tag == _resolver.resolve(ScalarNode, value, (False, True)),
+        tag.startswith("tag:yaml.org,2002:"),
+    )
+
+
+class UnsupportedData(Exception):
+    """
+    Raised by :py:class:`FastEmitter` when it meets data that it can't write identically to the round-trip dumper
+    """
+
+
+def _is_plain(data: Any) -> bool:
+    """
+    Returns True if a CommentedMap or CommentedSeq has no comments, anchor, tag or style of its own, and can therefore
+    be written like a plain dict or list
+    """
+    comment = getattr(data, comment_attrib, None)
+    fmt = getattr(data, format_attrib, None)
+    tag = getattr(data, tag_attrib, None)
+    anchor = getattr(data, Anchor.attrib, None)
+    return (
+        (comment is None or not (comment.comment or comment.items or comment.end))
+        and (fmt is None or fmt.flow_style() is None)
+        and (tag is None or tag.value is None)
+        and (anchor is None or anchor.value is None)
+        and not getattr(data, merge_attrib, None)
+    )
+
+
+class _Representer:
+    """
+    Stands in for the round-trip representer when calling the ``to_yaml`` methods of our classes, and records what they
+    would have represented
+    """
+
+    default_flow_style = False
+
+    def __init__(self, help_store=None):
+        #: See :py:func:`fast_dump`
+        self.help_store = help_store
+
+    def represent_scalar(self, tag, value, style=None, anchor=None):
+        if style or anchor:
+            raise UnsupportedData(value)
+        return SCALAR, tag, value
+
+    def represent_sequence(self, tag, sequence, flow_style=None):
+        if flow_style:
+            raise UnsupportedData(sequence)
+        return SEQUENCE, tag, list(sequence)
+
+    def represent_mapping(self, tag, mapping, flow_style=None):
+        if flow_style:
+            raise UnsupportedData(mapping)
+        return MAPPING, tag, list(mapping.items())
+
+
+class FastEmitter(Emitter):
+    """
+    Writes the kinds of data that we dump, namely command trees and CWL tools, exactly as :py:data:`yaml` would, but
+    several times faster. Rather than representing the data as a graph of nodes, serializing that into events, and
+    feeding those through the emitter's state machine, this walks the data directly, and only uses the emitter to
+    write each scalar and indicator. Each instance writes a single document, so, unlike :py:data:`yaml`, separate
+    instances can be used from different threads at once
+    """
+
+    def __init__(self, stream: TextIO, help_store=None):
+        """
+        :param help_store: See :py:func:`fast_dump`
+        """
+        super().__init__(
+            stream,
+            canonical=yaml.canonical,
+            indent=yaml.old_indent,
+            width=yaml.width,
+            allow_unicode=yaml.allow_unicode,
+            line_break=yaml.line_break,
+            prefix_colon=yaml.prefix_colon,
+        )
+        self.tag_prefixes = self.DEFAULT_TAG_PREFIXES.copy()
+        # Without a dumper, the emitter uses itself as the serializer
+        self.use_version = yaml.version
+        self.representer = _Representer(help_store)
+        #: The anchor of each object that can be aliased, by id, or None if it only appears once
+        self.anchors: Dict[int, Any] = {}
+        self.last_anchor_id = 0
+        #: The representation of each object that can be aliased, by id
+        self.represented: Dict[int, Tuple[str, str, Any]] = {}
+        self.emitted: Set[int] = set()
+        self.analyses: Dict[str, Any] = {}
+        self.tags: Dict[str, str] = {}
+
+    def analyze_scalar(self, scalar):
+        # Mapping keys in particular are repeated many times over, so only analyse each scalar once
+        analysis = self.analyses.get(scalar)
+        if analysis is None:
+            if "\n" in scalar:
+                # Multi-line scalars, such as help texts, are always double quoted, which only depends on these fields,
+                # so there's no need to look at every character
+                analysis = ScalarAnalysis(
+                    scalar=scalar,
+                    empty=False,
+                    multiline=True,
+                    allow_flow_plain=False,
+                    allow_block_plain=False,
+                    allow_single_quoted=False,
+                    allow_double_quoted=True,
+                    allow_block=False,
+                )
+            else:
+                analysis = super().analyze_scalar(scalar)
+            self.analyses[scalar] = analysis
+        return analysis
+
+    def prepare_tag(self, tag):
+        prepared = self.tags.get(tag)
+        if prepared is None:
+            if "#" in tag:
+                # This is escaped depending on the YAML version of the dumper, which we don't have
+                raise UnsupportedData(tag)
+            prepared = self.tags[tag] = super().prepare_tag(tag)
+        return prepared
+
+    def write_plain(self, text, split=True):
+        if self.root_context or not text or PLAIN_STOPS.search(text):
+            return super().write_plain(text, split)
+        # A single word is written as it is
+        if not self.whitespace:
+            text = " " + text
+        self.whitespace = False
+        self.indention = False
+        self.column += len(text)
+        self.stream.write(text)
+
+    def split_double_quoted(self, text: str, start: int, end: int) -> int:
+        """
+        Breaks the line within a double-quoted scalar if it is too long, like ``Emitter.write_double_quoted`` does
+        before the character at ``end``, and returns the new start of the unwritten text
+        """
+        if (
+            0 < end < len(text) - 1
+            and (text[end] == " " or start >= end)
+            and self.column + (end - start) > self.best_width
+        ):
+            data = text[start:end] + "\\"
+            if start < end:
+                start = end
+            self.column += len(data)
+            self.stream.write(data)
+            self.write_indent()
+            self.whitespace = False
+            self.indention = False
+            if text[start] == " ":
+                self.column += 1
+                self.stream.write("\\")
+        return start
+
+    def write_double_quoted(self, text, split=True):
+        if self.root_context or not split:
+            return super().write_double_quoted(text, split)
+        # This is Emitter.write_double_quoted, except that rather than stepping through every character, it skips to
+        # the next character that needs escaping, or space at which the line might be broken
+        stops = DOUBLE_QUOTED_STOPS[bool(self.allow_unicode)]
+        self.write_indicator('"', True)
+        start = 0
+        for match in stops.finditer(text):
+            end = match.start()
+            ch = text[end]
+            if ch == " ":
+                if self.column + (end - start) > self.best_width:
+                    start = self.split_double_quoted(text, start, end)
+                continue
+
+            if start < end:
+                data = text[start:end]
+                self.column += len(data)
+                self.stream.write(data)
+            if ch in self.ESCAPE_REPLACEMENTS:
+                data = "\\" + self.ESCAPE_REPLACEMENTS[ch]
+            elif ch <= "\xFF":
+                data = "\\x%02X" % ord(ch)
+            elif ch <= "\uFFFF":
+                data = "\\u%04X" % ord(ch)
+            else:
+                data = "\\U%08X" % ord(ch)
+            self.column += len(data)
+            self.stream.write(data)
+            start = self.split_double_quoted(text, end + 1, end)
+            # The line can also be broken straight after an escape sequence, which the next match won't cover unless it
+            # is the next character
+            if not stops.match(text, end + 1):
+                start = self.split_double_quoted(text, start, end + 1)
+        if start < len(text):
+            data = text[start:]
+            self.column += len(data)
+            self.stream.write(data)
+        self.write_indicator('"', False)
+
+    def represent(self, data: Any) -> Tuple[str, str, Any]:
+        """
+        Returns the kind of node that the round-trip representer would make for this data, along with its tag and its
+        value: a string for scalars, a list for sequences, and a list of key-value pairs for mappings
+        :raises UnsupportedData: If we can't be sure how the round-trip representer would represent it
+        """
+        cls = type(data)
+        if cls is str:
+            return SCALAR, STR_TAG, data
+        if data is None:
+            return SCALAR, NULL_TAG, ""
+        if cls is bool:
+            return SCALAR, BOOL_TAG, "true" if data else "false"
+        if cls is int:
+            return SCALAR, INT_TAG, str(data)
+        if cls is list or (cls is CommentedSeq and _is_plain(data)):
+            return SEQUENCE, SEQ_TAG, data
+        if cls is dict or (cls is CommentedMap and _is_plain(data)):
+            return MAPPING, MAP_TAG, list(data.items())
+        if cls is set:
+            return MAPPING, SET_TAG, [(key, None) for key in data]
+
+        # Classes registered using yaml_object, which represent themselves
+        to_yaml = RoundTripRepresenter.yaml_representers.get(cls)
+        if getattr(to_yaml, "__self__", None) is cls:
+            return to_yaml(self.representer, data)
+        raise UnsupportedData(data)
+
+    def scan(self, data: Any):
+        """
+        Finds the objects that appear more than once, and names their anchors in the same order as the serializer
+        """
+        if isinstance(data, UNALIASED):
+            return
+        key = id(data)
+        if key in self.anchors:
+            if self.anchors[key] is None:
+                self.last_anchor_id += 1
+                self.anchors[key] = "id{:03d}".format(self.last_anchor_id)
+            return
+        self.anchors[key] = None
+        kind, tag, value = self.represented[key] = self.represent(data)
+        if kind is SEQUENCE:
+            for item in value:
+                self.scan(item)
+        elif kind is MAPPING:
+            for item_key, item_value in value:
+                self.scan(item_key)
+                self.scan(item_value)
+
+    def scalar(self):
+        """
+        Writes the scalar in ``self.event``, following ``Emitter.expect_scalar``
+        """
+        self.process_tag()
+        self.increase_indent(flow=True)
+        self.process_scalar()
+        self.indent = self.indents.pop()
+
+    def node(self, data: Any, root=False, sequence=False, mapping=False):
+        """
+        Writes a node, following ``Emitter.expect_node``
+        """
+        self.root_context = root
+        self.sequence_context = sequence
+        self.mapping_context = mapping
+        self.simple_key_context = False
+
+        if isinstance(data, UNALIASED):
+            kind, tag, value = self.represent(data)
+        else:
+            key = id(data)
+            anchor = self.anchors[key]
+            if key in self.emitted:
+                self.write_indicator("*" + anchor, True)
+                self.no_newline = False
+                return
+            self.emitted.add(key)
+            kind, tag, value = self.represented[key]
+            if anchor is not None:
+                self.write_indicator("&" + anchor, True)
+                self.no_newline = False
+                if kind is SCALAR:
+                    self.sequence_context = False
+
+        if kind is SCALAR:
+            self.event = ScalarEvent(None, tag, _implicit(tag, value), value)
+            self.scalar()
+            return
+
+        if tag != (SEQ_TAG if kind is SEQUENCE else MAP_TAG):
+            self.write_indicator(self.prepare_tag(tag), True)
+
+        if not value:
+            # Empty collections are always written in flow style
+            start, end = ("[", "]") if kind is SEQUENCE else ("{", "}")
+            ind = self.indents.seq_flow_align(self.best_sequence_indent, self.column)
+            self.write_indicator(" " * ind + start, True, whitespace=True)
+            self.increase_indent(flow=True, sequence=kind is SEQUENCE)
+            self.indent = self.indents.pop()
+            self.write_indicator(end, False)
+            self.write_line_break()
+        elif kind is SEQUENCE:
+            self.block_sequence(value)
+        else:
+            self.block_mapping(value)
+
+    def block_sequence(self, items: List[Any]):
+        """
+        Writes a non-empty sequence, following ``Emitter.expect_block_sequence``
+        """
+        indentless = self.mapping_context and not self.indention
+        self.increase_indent(flow=False, sequence=True, indentless=indentless)
+        for item in items:
+            nonl = self.no_newline if self.column == 0 else False
+            self.write_indent()
+            self.write_indicator(
+                " " * self.sequence_dash_offset + "-", True, indention=True
+            )
+            if nonl or self.sequence_dash_offset + 2 > self.best_sequence_indent:
+                self.no_newline = True
+            self.node(item, sequence=True)
+        self.indent = self.indents.pop()
+        self.no_newline = False
+
+    def block_mapping(self, items: List[Tuple[Any, Any]]):
+        """
+        Writes a non-empty mapping, following ``Emitter.expect_block_mapping``
+        """
+        if not self.mapping_context and not (self.compact_seq_map or self.column == 0):
+            self.write_line_break()
+        self.increase_indent(flow=False, sequence=False)
+        for key, value in items:
+            self.write_indent()
+            if not isinstance(key, UNALIASED):
+                raise UnsupportedData(key)
+            kind, tag, text = self.represent(key)
+            self.event = ScalarEvent(None, tag, _implicit(tag, text), text)
+            if not self.check_simple_key():
+                raise UnsupportedData(key)
+            self.root_context = False
+            self.sequence_context = False
+            self.mapping_context = True
+            self.simple_key_context = True
+            self.scalar()
+            self.write_indicator(self.prefixed_colon, False)
+            self.node(value, mapping=True)
+        self.indent = self.indents.pop()
+
+    def dump(self, data: Any):
+        """
+        Writes a single document containing this data, which must be a collection
+        """
+        self.scan(data)
+        if self.represented.get(id(data), (SCALAR,))[0] is SCALAR:
+            raise UnsupportedData(data)
+        self.node(data, root=True)
+        self.write_indent()
+        self.flush_stream()
+
+
+def fast_dump(data: Any, stream: TextIO, help_store=None):
+    """
+    Writes data to a stream as YAML. The output is identical to ``yaml.dump(data, stream)``, but for command trees and
+    CWL tools it is much faster. Unlike the global :py:data:`yaml` object, this is safe to use from several threads at
+    once
+    :param help_store: If this is a :py:class:`aclimatise.help_store.HelpStore`, each command's help text is moved into
+        it, and the YAML only contains a reference to the text. The commands themselves aren't changed
+    """
+    buffer = StringIO()
+    try:
+        FastEmitter(buffer, help_store).dump(data)
+    except UnsupportedData:
+        # Anything else is written by the round-trip dumper. The global instance keeps its state between dumps, so use
+        # a new one
+        buffer = StringIO()
+        dumper = YAML()
+        dumper.representer.help_store = help_store
+        dumper.dump(data, buffer)
+    stream.write(buffer.getvalue())
@@ -0,0 +1,82 @@
+"""
+Packs the help texts from every YAML tree in the test data into a corpus, and measures how long it takes to parse them
+all again with :py:func:`aclimatise.corpus.reanalyse_corpus`, writing a YAML wrapper for each, along with the peak
+memory used by Python objects in the main process, and the peak resident memory of the worker processes.
+
+Usage: python benchmarks/corpus.py [--workers N] [--chunk-size N] [--sentences BACKEND]
+"""
+import argparse
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from aclimatise.batch import preload
+from aclimatise.converter.yml import YmlGenerator
+from aclimatise.corpus import corpus_entries, reanalyse_corpus, write_corpus
+
+TEST_DATA = Path(__file__).parent.parent / "test" / "test_data"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--sentences", default="spacy")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "help.corpus"
+        start = time.perf_counter()
+        count = write_corpus(
+            path,
+            (
+                entry
+                for tree in sorted(TEST_DATA.glob("*/*.yml"))
+                for entry in corpus_entries(tree)
+            ),
+        )
+        build = time.perf_counter() - start
+
+        # Load the models first, so that they aren't counted
+        preload()
+        tracemalloc.start()
+        start = time.perf_counter()
+        failed = sum(
+            not result.ok
+            for result in reanalyse_corpus(
+                path,
+                sentences=args.sentences,
+                out_dir=Path(tmp) / "out",
+                converters=[YmlGenerator()],
+                max_workers=args.workers,
+                chunk_size=args.chunk_size,
+            )
+        )
+        parse = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(
+            "help texts: {} ({:.1f} MB), {} failed".format(
+                count, path.stat().st_size / 1e6, failed
+            )
+        )
+        print("build corpus: {:.1f} s".format(build))
+        print(
+            "reanalyse: {:.1f} s ({:.1f} ms per help text)".format(
+                parse, 1000 * parse / count
+            )
+        )
+        print("main process peak Python memory: {:.1f} MB".format(peak / 1e6))
+        # On Linux, ru_maxrss is in kilobytes
+        print(
+            "largest worker peak resident memory: {:.1f} MB".format(
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1e3
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
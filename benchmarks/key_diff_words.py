@@ -0,0 +1,89 @@
+"""
+Times find_key_diff_words on synthetic sets of flag descriptions of increasing size, and compares it to the previous
+implementation, which ran difflib.ndiff on every pair of descriptions.
+
+Usage: python benchmarks/key_diff_words.py [--sizes N N ...] [--max-reference N]
+"""
+import argparse
+import random
+import time
+from difflib import ndiff
+
+from aclimatise.name_generation import find_key_diff_words
+
+WORDS = (
+    "the number of threads to use for reading and writing output input file files "
+    "minimum maximum quality score length reads per base default value if set ignore"
+).split()
+
+
+def reference_key_diff_words(descriptions, after_index: int = 5):
+    """
+    The previous, quadratic, implementation of find_key_diff_words
+    """
+    desc_strings = [[str(token) for token in desc] for desc in descriptions]
+    ret = [set() for d in descriptions]
+    for i, description_a in enumerate(descriptions):
+        for j, description_b in enumerate(descriptions):
+            if i == j:
+                continue
+            for k, diff in enumerate(ndiff(desc_strings[i], desc_strings[j])):
+                if diff[0] in ["+", "-"]:
+                    if k > after_index:
+                        if len(description_a) > k:
+                            ret[i].add(description_a[k])
+                        if len(description_b) > k:
+                            ret[j].add(description_b[k])
+                    break
+    return ret
+
+
+def synthetic_descriptions(count: int, rand: random.Random):
+    """
+    Generates descriptions that often share a long prefix, as in tools with many similar flags
+    """
+    prefixes = [
+        [rand.choice(WORDS) for i in range(8)] for j in range(max(count // 10, 1))
+    ]
+    return [
+        rand.choice(prefixes)[: rand.randint(4, 8)]
+        + [rand.choice(WORDS) for i in range(rand.randint(2, 15))]
+        for j in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 25, 50, 100, 200, 400, 1000]
+    )
+    parser.add_argument(
+        "--max-reference",
+        type=int,
+        default=200,
+        help="Don't time the old implementation for flag sets larger than this, because it's too slow",
+    )
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    print("{:>6} {:>12} {:>12}".format("flags", "trie", "ndiff"))
+    for size in args.sizes:
+        descriptions = synthetic_descriptions(size, rand)
+
+        start = time.perf_counter()
+        result = find_key_diff_words(descriptions)
+        new_time = time.perf_counter() - start
+
+        if size <= args.max_reference:
+            start = time.perf_counter()
+            expected = reference_key_diff_words(descriptions)
+            old_time = "{:.4f}".format(time.perf_counter() - start)
+            assert result == expected, "The implementations disagree"
+        else:
+            old_time = "-"
+
+        print("{:>6} {:>12.4f} {:>12}".format(size, new_time, old_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the memory used by Command trees once they're loaded, by loading the YAML trees in the test data several
+times over, as a registry of many parsed commands would. The memory used by help texts is reported separately, since
+it doesn't depend on the model classes.
+
+Usage: python benchmarks/model_memory.py [--copies N]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+from aclimatise.yaml import yaml
+
+TEST_DATA = Path(__file__).parent.parent / "test" / "test_data"
+
+
+def load_trees(copies: int):
+    trees = []
+    for i in range(copies):
+        for path in sorted(TEST_DATA.glob("*/*.yml")):
+            with path.open() as fp:
+                trees.append(yaml.load(fp))
+    return trees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=5)
+    args = parser.parse_args()
+
+    # Load once first, so that the memory used by imports and caches isn't counted
+    load_trees(1)
+    gc.collect()
+
+    tracemalloc.start()
+    trees = load_trees(args.copies)
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    commands = [command for tree in trees for command in tree.command_tree()]
+    help_texts = {
+        id(command.help_text): sys.getsizeof(command.help_text)
+        for command in commands
+        if command.help_text is not None
+    }
+    help_size = sum(help_texts.values())
+    model_size = total - help_size
+
+    print("commands:         {:>12,}".format(len(commands)))
+    print("total bytes:      {:>12,}".format(total))
+    print("help text bytes:  {:>12,}".format(help_size))
+    print("model bytes:      {:>12,}".format(model_size))
+    print("model per command:{:>12,.0f}".format(model_size / len(commands)))
+
+
+if __name__ == "__main__":
+    main()
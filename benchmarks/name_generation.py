@@ -0,0 +1,126 @@
+"""
+Times the naming of synthetic commands with an increasing number of flags, and compares it to the previous
+implementation, which re-sorted every candidate token each time a name grew, and compared every name with every other
+after each round. The descriptions are pre-processed once, up front, so that only the naming itself is timed.
+
+Usage: python benchmarks/name_generation.py [--sizes N N ...] [--words N]
+"""
+import argparse
+import gc
+import random
+import time
+
+from aclimatise.name_generation import (
+    duplicate_keys,
+    find_key_diff_words,
+    generate_names_preprocessed,
+    intersection_indices,
+    preprocess_batch,
+    sanitize_token,
+    token_priority,
+)
+
+WORDS = (
+    "the number of threads to use for reading and writing output input file files "
+    "minimum maximum quality score length reads per base default value if set ignore"
+).split()
+
+
+def reference_generate_name(tokens, initial_length=3, key_words=set()):
+    """
+    The previous implementation of generate_name
+    """
+    candidates = tokens
+    ret = [*key_words]
+    max = initial_length
+    while True:
+        candidates = sorted(
+            candidates, key=lambda token: token_priority(token, ret), reverse=True
+        )
+        if candidates:
+            ret.append(candidates.pop())
+        if len(ret) >= max or len(candidates) == 0:
+            max += 1
+            yield [
+                sanitize_token(str(tok)).lower()
+                for tok in sorted(ret, key=lambda tok: tok.i)
+            ]
+
+
+def reference_unique_names(processed, initial_length=3, max_length=5, reserved=set()):
+    """
+    The previous implementation of the loop in generate_names_nlp
+    """
+    todo = set(range(len(processed)))
+    generators = [
+        reference_generate_name(proc, initial_length=initial_length, key_words=keys)
+        for proc, keys in zip(processed, find_key_diff_words(processed))
+    ]
+    ret = [[]] * len(processed)
+    empty = set()
+    for i in range(max_length + 1):
+        if i >= max_length:
+            for j in todo:
+                ret[j] = []
+            return ret
+        for j in todo:
+            try:
+                ret[j] = next(generators[j])
+            except StopIteration:
+                empty.add(j)
+        todo = duplicate_keys(ret) | intersection_indices(ret, reserved) - empty
+        if len(todo) == 0:
+            break
+    return ret
+
+
+def synthetic_descriptions(count: int, words: int, rand: random.Random):
+    """
+    Generates descriptions that often share a long prefix, as in tools with many similar flags
+    """
+    prefixes = [
+        [rand.choice(WORDS) for i in range(8)] for j in range(max(count // 10, 1))
+    ]
+    return [
+        " ".join(
+            rand.choice(prefixes)[: rand.randint(4, 8)]
+            + [rand.choice(WORDS) for i in range(rand.randint(2, words))]
+        )
+        for j in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument(
+        "--words",
+        type=int,
+        default=40,
+        help="The maximum number of words after the shared prefix of each description",
+    )
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    # Compile the regular expressions and load the model before timing anything
+    reference_unique_names(preprocess_batch(synthetic_descriptions(10, 5, rand)))
+    # Like timeit, don't let garbage collection of the model's objects distort the timings
+    gc.disable()
+    print("{:>6} {:>12} {:>12}".format("flags", "new", "old"))
+    for size in args.sizes:
+        processed = preprocess_batch(synthetic_descriptions(size, args.words, rand))
+
+        start = time.perf_counter()
+        result = generate_names_preprocessed(processed, 3, 5, set())
+        new_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = reference_unique_names(processed)
+        old_time = time.perf_counter() - start
+        assert result == expected, "The implementations disagree"
+
+        print("{:>6} {:>12.4f} {:>12.4f}".format(size, new_time, old_time))
+
+
+if __name__ == "__main__":
+    main()
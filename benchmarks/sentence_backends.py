@@ -0,0 +1,73 @@
+"""
+Measures how often each sentence backend agrees with the spaCy backend on the flag descriptions in the test data, and
+how long each takes to classify them.
+
+Usage: python benchmarks/sentence_backends.py [--threshold N]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from aclimatise.flag_parser.parser import CliParser
+from aclimatise.nlp import SentenceBackend, SentenceClassifier, SpacyBackend
+
+TEST_DATA = Path(__file__).parent.parent / "test" / "test_data"
+
+
+def load_descriptions():
+    """
+    Returns every flag description that the parser needs to classify, for every help text in the test data
+    """
+    sentences = SentenceClassifier()
+    parser = CliParser.shared()
+    for path in sorted(TEST_DATA.glob("*.txt")):
+        parser.find_flags(path.read_text(), sentences)
+    return list(sentences.pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    texts = load_descriptions()
+    results = {}
+    print(
+        "{:<12} {:>10} {:>12} {:>10}".format(
+            "backend", "seconds", "texts/sec", "agreement"
+        )
+    )
+    # spaCy is the reference, so it has to go first
+    backends = sorted(
+        SentenceBackend.__subclasses__(),
+        key=lambda backend: backend.name() != SpacyBackend.name(),
+    )
+    for backend_cls in backends:
+        backend = backend_cls()
+        # Load any models before timing
+        backend.classify(texts[:1], threshold=args.threshold)
+        start = time.perf_counter()
+        results[backend.name()] = backend.classify(texts, threshold=args.threshold)
+        duration = time.perf_counter() - start
+
+        reference = results.get(SpacyBackend.name())
+        agreement = (
+            sum(a == b for a, b in zip(results[backend.name()], reference)) / len(texts)
+            if reference is not None
+            else float("nan")
+        )
+        print(
+            "{:<12} {:>10.4f} {:>12.0f} {:>9.1%}".format(
+                backend.name(), duration, len(texts) / duration, agreement
+            )
+        )
+
+    # Show the texts where the backends disagree, to help improve the faster backends
+    for name, result in results.items():
+        for text, expected, actual in zip(texts, results[SpacyBackend.name()], result):
+            if expected != actual:
+                print("{} says {}: {!r}".format(name, actual, text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the time taken to load and dump the YAML trees in the test data, using the YAML format and the binary format
+in :py:mod:`aclimatise.binary`, along with the size of each. YAML is dumped both by the round-trip dumper, and by
+:py:func:`aclimatise.yaml.fast_dump`, which gives the same output.
+
+Usage: python benchmarks/serialization.py [--repeat N]
+"""
+import argparse
+import time
+from io import StringIO
+from pathlib import Path
+
+from aclimatise import binary
+from aclimatise.yaml import fast_dump, yaml
+
+TEST_DATA = Path(__file__).parent.parent / "test" / "test_data"
+
+
+def timed(func, repeat: int) -> float:
+    """
+    Returns the best time, in milliseconds, of several calls to func
+    """
+    best = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def yaml_dumps(trees, dump=yaml.dump):
+    texts = []
+    for tree in trees:
+        buffer = StringIO()
+        dump(tree, buffer)
+        texts.append(buffer.getvalue())
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    trees = []
+    for path in sorted(TEST_DATA.glob("*/*.yml")):
+        with path.open() as fp:
+            trees.append(yaml.load(fp))
+    texts = yaml_dumps(trees)
+    assert yaml_dumps(trees, fast_dump) == texts
+    blobs = [binary.dumps(tree) for tree in trees]
+
+    results = {
+        "yaml": (
+            timed(lambda: [yaml.load(text) for text in texts], args.repeat),
+            timed(lambda: yaml_dumps(trees), args.repeat),
+            sum(len(text.encode("utf-8")) for text in texts),
+        ),
+        "fast yaml": (
+            None,
+            timed(lambda: yaml_dumps(trees, fast_dump), args.repeat),
+            sum(len(text.encode("utf-8")) for text in texts),
+        ),
+        "binary": (
+            timed(lambda: [binary.loads(blob) for blob in blobs], args.repeat),
+            timed(lambda: [binary.dumps(tree) for tree in trees], args.repeat),
+            sum(len(blob) for blob in blobs),
+        ),
+    }
+
+    print("trees: {}".format(len(trees)))
+    print(
+        "{:<10}{:>12}{:>12}{:>14}".format(
+            "format", "load (ms)", "dump (ms)", "size (bytes)"
+        )
+    )
+    for name, (load, dump, size) in results.items():
+        load = "-" if load is None else "{:.1f}".format(load)
+        print("{:<10}{:>12}{:>12.1f}{:>14,}".format(name, load, dump, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Times each stage of aCLImatise on every help text in the test data: parse_help, CliParser.parse_command,
+UsageParser.parse_usage, variable name generation, and save_to_string for each output format. Each stage is timed
+several times, and its fastest and median times are recorded. Process-wide memos, such as those used for word
+segmentation, are warm after the first repeat, but the parse cache is disabled, and each call gets a fresh sentence
+classifier and converter, so no results are re-used between repeats.
+
+The results can be saved as JSON, and compared with a baseline saved by an earlier run on the same machine, for
+example from the main branch. A stage regresses if its fastest time grows by more than the tolerance, and by more than
+a minimum amount of time, since very fast stages are noisy. If any stage regresses, the exit status is 1.
+
+Usage: python benchmarks/suite.py [--repeat N] [--output FILE] [--baseline FILE] [--tolerance F] [--min-delta-ms F]
+    [--sentences BACKEND] [--filter TEXT]
+
+For example:
+    git checkout main && python benchmarks/suite.py --output baseline.json
+    git checkout my-branch && python benchmarks/suite.py --baseline baseline.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from aclimatise.converter import WrapperGenerator
+from aclimatise.converter.cwl import CwlGenerator
+from aclimatise.flag_parser.parser import CliParser
+from aclimatise.integration import parse_help, parser_version
+from aclimatise.nlp import SentenceBackend, SentenceClassifier
+from aclimatise.usage_parser.parser import UsageParser
+
+TEST_DATA = Path(__file__).parent.parent / "test" / "test_data"
+
+#: Stats are stored as {stage: {help text: {"min": seconds, "median": seconds}}}
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def load_corpus(max_length: int, filter: str):
+    for path in sorted(TEST_DATA.glob("*.txt")):
+        text = path.read_text()
+        # parse_help doesn't parse texts with more lines than this
+        if filter in path.stem and len(text.splitlines()) <= max_length:
+            yield path.stem, text
+
+
+def timed(func: Callable, repeat: int) -> Dict[str, float]:
+    """
+    Returns the fastest and median times, in seconds, of several calls to func
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def stages(name: str, text: str, backend: SentenceBackend) -> Dict[str, Callable]:
+    """
+    Returns a function that runs each stage on a single help text
+    """
+    cmd = [name]
+    command = parse_help(cmd, text, cache=None, sentences=SentenceClassifier(backend))
+    flags = command.positional + command.named
+
+    ret = {
+        "parse_help": lambda: parse_help(
+            cmd, text, cache=None, sentences=SentenceClassifier(backend)
+        ),
+        "parse_command": lambda: CliParser.shared().parse_command(
+            text, cmd, sentences=SentenceClassifier(backend)
+        ),
+        "parse_usage": lambda: UsageParser.shared().parse_usage(cmd, text),
+        "name_generation": lambda: CwlGenerator().choose_variable_names(flags),
+    }
+    for converter in WrapperGenerator.get_subclasses():
+        ret[
+            "save_to_string_" + converter.format()
+        ] = lambda converter=converter: converter().save_to_string(command)
+    return ret
+
+
+def run(args) -> Results:
+    backend = SentenceBackend.choose_backend(args.sentences)()
+    results: Results = {}
+    for name, text in load_corpus(args.max_length, args.filter):
+        print(name, file=sys.stderr)
+        for stage, func in stages(name, text, backend).items():
+            results.setdefault(stage, {})[name] = timed(func, args.repeat)
+    return results
+
+
+def compare(
+    results: Results, baseline: Results, tolerance: float, min_delta: float
+) -> List[str]:
+    """
+    Returns a description of each stage and help text that is slower than in the baseline
+    """
+    regressions = []
+    for stage, texts in results.items():
+        for name, stats in texts.items():
+            before = baseline.get(stage, {}).get(name)
+            if before is None:
+                continue
+            delta = stats["min"] - before["min"]
+            if delta > min_delta and stats["min"] > before["min"] * (1 + tolerance):
+                regressions.append(
+                    "{} {}: {:.2f} ms -> {:.2f} ms ({:+.0%})".format(
+                        stage,
+                        name,
+                        before["min"] * 1000,
+                        stats["min"] * 1000,
+                        delta / before["min"],
+                    )
+                )
+    return regressions
+
+
+def total(texts: Dict[str, Dict[str, float]], names: Iterable[str]) -> float:
+    """
+    Returns the sum of the fastest times of a stage, over the given help texts
+    """
+    return sum(texts[name]["min"] for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-length", type=int, default=1000)
+    parser.add_argument(
+        "--sentences",
+        default="spacy",
+        choices=[backend.name() for backend in SentenceBackend.__subclasses__()],
+    )
+    parser.add_argument(
+        "--filter", default="", help="Only time help texts whose name contains this"
+    )
+    parser.add_argument("--output", type=Path, help="Save the results to this file")
+    parser.add_argument(
+        "--baseline", type=Path, help="Compare the results with this file"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="The fraction by which a stage can slow down before it regresses",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="The number of milliseconds by which a stage can slow down before it regresses",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline is not None:
+        with args.baseline.open() as fp:
+            baseline = json.load(fp)
+        if baseline["sentences"] != args.sentences:
+            parser.error(
+                "The baseline used the {} sentence backend".format(
+                    baseline["sentences"]
+                )
+            )
+        baseline = baseline["results"]
+
+    results = run(args)
+    if args.output is not None:
+        with args.output.open("w") as fp:
+            json.dump(
+                {
+                    "parser": parser_version(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "repeat": args.repeat,
+                    "sentences": args.sentences,
+                    "results": results,
+                },
+                fp,
+                indent=2,
+                sort_keys=True,
+            )
+
+    # Only the help texts that were timed by both runs are compared
+    print("{:<24}{:>12}{:>12}".format("stage", "total (ms)", "baseline"))
+    for stage, texts in results.items():
+        if baseline is not None and stage in baseline:
+            names = [name for name in texts if name in baseline[stage]]
+            before = "{:.1f}".format(total(baseline[stage], names) * 1000)
+        else:
+            names = list(texts)
+            before = "-"
+        print("{:<24}{:>12.1f}{:>12}".format(stage, total(texts, names) * 1000, before))
+
+    if baseline is not None:
+        regressions = compare(
+            results, baseline, args.tolerance, args.min_delta_ms / 1000
+        )
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,8 +22,9 @@ setup(
         "deprecated",
         "attrs",
         "janis-pipelines.core >= 0.11.2",
+        "msgpack",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     entry_points={"console_scripts": ["aclimatise = aclimatise.cli:main"]},
     extras_require={
         "dev": [
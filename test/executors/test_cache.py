@@ -0,0 +1,148 @@
+import os
+import time
+from typing import List, Optional
+
+from aclimatise.execution.cache import ExecutionCache
+from aclimatise.execution.help import CliHelpExecutor
+
+from ..util import skip_not_installed
+
+
+class CountingExecutor(CliHelpExecutor):
+    """
+    Records how many times each command is actually executed
+    """
+
+    def __init__(self, output: str, identity: Optional[str] = "v1", **kwargs):
+        super().__init__(**kwargs)
+        self.output = output
+        self.identity = identity
+        self.calls = []
+
+    def binary_identity(self, command: List[str]) -> Optional[str]:
+        return self.identity
+
+    def execute(self, cmd: List[str]) -> str:
+        self.calls.append(cmd)
+        return self.output
+
+
+def test_cache_get_put(tmp_path):
+    cache = ExecutionCache(tmp_path)
+    key = cache.key("bwa", ["bwa", "--help"])
+    assert cache.get(key) is None
+    assert key not in cache
+    cache.put(key, "some help")
+    assert cache.get(key) == "some help"
+    assert key in cache
+
+    # A new cache in the same directory should see the same entry
+    assert ExecutionCache(tmp_path).get(key) == "some help"
+
+    cache.invalidate(key)
+    assert cache.get(key) is None
+    assert key not in cache
+
+
+def test_cache_size(tmp_path):
+    """
+    The first entry in a new cache should only be counted once
+    """
+    ExecutionCache(tmp_path).put(ExecutionCache.key("a"), "12345")
+    cache = ExecutionCache(tmp_path)
+    cache.put(cache.key("b"), "1234567890")
+    assert cache.size() == 15
+    # Replacing an entry only counts its new size
+    cache.put(cache.key("b"), "123")
+    assert cache.size() == 8
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ExecutionCache(tmp_path, max_size=30)
+    for i in range(3):
+        cache.put(cache.key(i), "1234567890")
+        # Make sure the modification times are distinguishable
+        time.sleep(0.05)
+
+    # Using the oldest entry makes it the most recently used
+    assert cache.get(cache.key(0)) is not None
+    time.sleep(0.05)
+    cache.put(cache.key(3), "1234567890")
+
+    assert cache.size() <= 30
+    assert cache.get(cache.key(0)) is not None
+    assert cache.get(cache.key(1)) is None
+
+
+def test_cache_clear(tmp_path):
+    cache = ExecutionCache(tmp_path)
+    cache.put(cache.key("a"), "a")
+    cache.clear()
+    assert cache.get(cache.key("a")) is None
+    assert cache.size() == 0
+
+
+def test_identify_file(tmp_path):
+    binary = tmp_path / "tool"
+    binary.write_text("version 1")
+    for hash_binaries in (True, False):
+        cache = ExecutionCache(tmp_path / "cache", hash_binaries=hash_binaries)
+        before = cache.identify_file(binary)
+        assert cache.identify_file(binary) == before
+
+        binary.write_text("version 2!")
+        os.utime(binary, (time.time() + 10, time.time() + 10))
+        assert cache.identify_file(binary) != before
+
+
+def test_executor_cache(tmp_path):
+    cache = ExecutionCache(tmp_path)
+    executor = CountingExecutor("Usage: tool <file>", cache=cache, flags=[["--help"]])
+    executor.convert(["tool"])
+    executor.convert(["tool"])
+    assert executor.calls == [["tool", "--help"]]
+
+    # A new version of the executable should not re-use the output of the old one
+    executor.identity = "v2"
+    executor.convert(["tool"])
+    assert len(executor.calls) == 2
+
+
+def test_executor_cache_unidentifiable(tmp_path):
+    """
+    If we can't identify the executable, we can't cache it
+    """
+    executor = CountingExecutor(
+        "Usage: tool <file>",
+        identity=None,
+        cache=ExecutionCache(tmp_path),
+        flags=[["--help"]],
+    )
+    executor.convert(["tool"])
+    executor.convert(["tool"])
+    assert len(executor.calls) == 2
+
+
+@skip_not_installed("echo")
+def test_local_binary_identity(tmp_path):
+    from aclimatise.execution.local import LocalExecutor
+
+    executor = LocalExecutor(cache=ExecutionCache(tmp_path))
+    assert executor.binary_identity(["echo"]) is not None
+    assert executor.binary_identity(["not-a-real-executable-at-all"]) is None
+
+
+@skip_not_installed("echo")
+def test_local_cache_settings(tmp_path):
+    """
+    Output run with different Popen arguments, such as a different environment, shouldn't be re-used
+    """
+    from aclimatise.execution.local import LocalExecutor
+
+    cache = ExecutionCache(tmp_path)
+    default = LocalExecutor(cache=cache)
+    with_env = LocalExecutor(cache=cache, popen_args={"env": {"LANG": "C"}})
+    assert default._cache_key(["echo"]) != with_env._cache_key(["echo"])
+    assert with_env._cache_key(["echo"]) == LocalExecutor(
+        cache=cache, popen_args={"env": {"LANG": "C"}}
+    )._cache_key(["echo"])
@@ -0,0 +1,127 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from pkg_resources import resource_filename
+
+from aclimatise.execution.help import CliHelpExecutor
+
+
+class CorpusExecutor(CliHelpExecutor):
+    """
+    Pretends to run a command by returning help text from the test data, after a short random delay
+    """
+
+    def __init__(self, help_texts: Dict[Tuple[str, ...], str], delay=0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.help_texts = help_texts
+        self.delay = delay
+        # Child executors are copies of this one, so these need to be shared by reference
+        self.lock = threading.Lock()
+        self.stats = {"running": 0, "max_running": 0}
+
+    def execute(self, cmd: List[str]) -> str:
+        with self.lock:
+            self.stats["running"] += 1
+            self.stats["max_running"] = max(
+                self.stats["max_running"], self.stats["running"]
+            )
+        try:
+            duration = random.uniform(0, self.delay)
+            if duration > self.timeout:
+                time.sleep(self.timeout)
+                return self.handle_timeout(TimeoutError())
+            time.sleep(duration)
+            return self.help_texts.get(tuple(arg for arg in cmd if arg[0] != "-"), "")
+        finally:
+            with self.lock:
+                self.stats["running"] -= 1
+
+
+def read_test_data(name: str) -> str:
+    with open(resource_filename("test", "test_data/" + name)) as fp:
+        return fp.read()
+
+
+def bwa_help_texts():
+    return {
+        ("bwa",): read_test_data("bwa.txt"),
+        ("bwa", "mem"): read_test_data("bwa_mem.txt"),
+        ("bwa", "index"): read_test_data("bwa_index.txt"),
+        ("bwa", "bwt2sa"): read_test_data("bwa_bwt2sa.txt"),
+        ("bwa", "bwtupdate"): read_test_data("bwa_bwtupdate.txt"),
+    }
+
+
+def test_parallel_explore_matches_serial():
+    """
+    Exploring with several workers should produce exactly the same tree as exploring serially, no matter which
+    subcommand finishes first
+    """
+    serial = CorpusExecutor(bwa_help_texts()).explore(["bwa"], max_depth=1)
+    parallel_exec = CorpusExecutor(bwa_help_texts(), max_workers=4)
+    parallel = parallel_exec.explore(["bwa"], max_depth=1)
+
+    assert [sub.command for sub in parallel.subcommands] == [
+        sub.command for sub in serial.subcommands
+    ]
+    assert len(parallel.subcommands) == 4
+    assert parallel["mem"].named == serial["mem"].named
+
+
+def test_parallel_explore_worker_limit():
+    """
+    The number of concurrent executions should never exceed the number of workers
+    """
+    executor = CorpusExecutor(bwa_help_texts(), max_workers=3)
+    executor.explore(["bwa"], max_depth=1)
+    assert 1 < executor.stats["max_running"] <= 3
+
+
+def test_explore_timeout():
+    """
+    Once the time limit is exceeded, exploration should finish without running anything else
+    """
+    executor = CorpusExecutor(
+        bwa_help_texts(), delay=2, max_workers=2, explore_timeout=0.5
+    )
+    start = time.monotonic()
+    executor.explore(["bwa"], max_depth=1)
+    assert time.monotonic() - start < 2
+
+
+def test_async_explore_matches_serial():
+    """
+    Exploring asynchronously should produce the same tree as exploring serially
+    """
+    serial = CorpusExecutor(bwa_help_texts()).explore(["bwa"], max_depth=1)
+    executor = CorpusExecutor(bwa_help_texts(), max_workers=8)
+    concurrent = asyncio.get_event_loop().run_until_complete(
+        executor.explore_async(["bwa"], max_depth=1)
+    )
+
+    assert [sub.command for sub in concurrent.subcommands] == [
+        sub.command for sub in serial.subcommands
+    ]
+    assert 1 < executor.stats["max_running"] <= 8
+
+
+class ThreadRecordingExecutor(CorpusExecutor):
+    def _choose_best(self, *args):
+        self.threads.add(threading.current_thread())
+        return super()._choose_best(*args)
+
+
+def test_async_parse_off_loop():
+    """
+    Help texts should be parsed in other threads, so that parsing doesn't block the event loop
+    """
+    executor = ThreadRecordingExecutor(bwa_help_texts())
+    executor.threads = set()
+    asyncio.get_event_loop().run_until_complete(
+        executor.explore_async(["bwa"], max_depth=1)
+    )
+    assert executor.threads
+    assert threading.current_thread() not in executor.threads
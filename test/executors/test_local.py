@@ -1,4 +1,7 @@
-from aclimatise.execution.local import LocalExecutor
+import asyncio
+import time
+
+from aclimatise.execution.local import AsyncLocalExecutor, LocalExecutor
 
 from ..util import skip_not_installed
 
@@ -8,3 +11,41 @@ def test_local(bwamem_help):
     exec = LocalExecutor()
     output = exec.execute(["bwa", "mem"])
     assert output == bwamem_help
+
+
+@skip_not_installed("echo")
+def test_async_local():
+    exec = AsyncLocalExecutor()
+    output = asyncio.get_event_loop().run_until_complete(
+        exec.execute_async(["echo", "some help"])
+    )
+    assert output == LocalExecutor().execute(["echo", "some help"])
+
+
+@skip_not_installed("sh")
+@skip_not_installed("sleep")
+def test_async_local_kill():
+    """
+    Test that the AsyncLocalExecutor kills the entire process tree if it times out
+    """
+    exec = AsyncLocalExecutor(timeout=1)
+    start = time.monotonic()
+    output = asyncio.get_event_loop().run_until_complete(
+        exec.execute_async(["sh", "-c", "sleep 999 & sleep 999"])
+    )
+    assert output == ""
+    assert time.monotonic() - start < 10
+
+
+@skip_not_installed("printf")
+def test_async_local_text_args():
+    """
+    Text mode arguments that work with LocalExecutor should also work with AsyncLocalExecutor
+    """
+    exec = AsyncLocalExecutor(
+        popen_args={"encoding": "utf-8", "errors": "replace", "text": True}
+    )
+    output = asyncio.get_event_loop().run_until_complete(
+        exec.execute_async(["printf", "help \\377"])
+    )
+    assert output == "help �"
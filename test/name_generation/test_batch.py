@@ -5,6 +5,7 @@ import pytest
 from pkg_resources import resource_filename
 
 from aclimatise import WrapperGenerator, parse_help
+from aclimatise.name_generation import generate_names_nlp, generate_names_nlp_batch
 
 from ..util import HelpText, all_tests, convert_validate, validate_cwl, validate_wdl
 
@@ -20,3 +21,16 @@ def test_all(test: HelpText):
     cmd = parse_help(test.cmd, help_text)
 
     WrapperGenerator().choose_variable_names([*cmd.positional, *cmd.named])
+
+
+def test_generate_names_nlp_batch(bedtools_cmd):
+    """
+    Naming the flags of many commands at once should give the same names as naming each command separately
+    """
+    description_lists = [
+        [flag.description for flag in [*cmd.named, *cmd.positional]]
+        for cmd in bedtools_cmd.command_tree()
+    ]
+    assert generate_names_nlp_batch(description_lists) == [
+        generate_names_nlp(descriptions) for descriptions in description_lists
+    ]
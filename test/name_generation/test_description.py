@@ -1,6 +1,11 @@
 """
 Tests the generate_name function, which converts a paragraph of text into a variable name
 """
+import itertools
+
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
 from aclimatise.name_generation import generate_name, preprocess
 
 
@@ -103,3 +108,22 @@ def test_hyphens():
         assert "-" not in word
         assert "[" not in word
         assert "," not in word
+
+
+def test_generate_name_attached_words():
+    """
+    Once a word is in the name, the words attached to it should be preferred over words that are attached to
+    something else
+    """
+    doc = Doc(Vocab(), words=["threads", "used", "for", "sorting"])
+    for token, pos, head in zip(doc, ["NOUN", "VERB", "ADP", "NOUN"], [0, 3, 0, 0]):
+        token.pos_ = pos
+        token.head = doc[head]
+
+    names = list(itertools.islice(generate_name(list(doc), initial_length=1), 4))
+    assert names == [
+        ["threads"],
+        ["threads", "sorting"],
+        ["threads", "used", "sorting"],
+        ["threads", "used", "for", "sorting"],
+    ]
@@ -3,6 +3,7 @@ Tests certain groups of flags used together
 """
 from aclimatise.converter import WrapperGenerator
 from aclimatise.model import EmptyFlagArg, Flag, SimpleFlagArg
+from aclimatise.name_generation import find_key_diff_words
 
 
 def test_bedtools_window_sm():
@@ -64,3 +65,22 @@ def test_same_arg():
     names = WrapperGenerator().choose_variable_names(flags)
     assert names[0].name == "a"
     assert names[1].name == "b"
+
+
+def test_find_key_diff_words():
+    """
+    The first word at which each pair of descriptions differ is a key word for both, as long as it's not one of the
+    first few words
+    """
+    descriptions = [
+        "only report hits in b that overlap a on the same strand".split(),
+        "only report hits in b that overlap a on the opposite strand".split(),
+        "only report hits in b that overlap a".split(),
+        "only report hits in b with a minimum overlap".split(),
+    ]
+    assert find_key_diff_words(descriptions) == [
+        {"same", "on"},
+        {"opposite", "on"},
+        set(),
+        set(),
+    ]
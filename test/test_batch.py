@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import time
+
+from click.testing import CliRunner
+from pkg_resources import resource_filename
+
+from aclimatise import batch as batch_module
+from aclimatise.batch import (
+    BatchItem,
+    BatchOptions,
+    BatchResult,
+    convert_item,
+    find_items,
+    pending_items,
+    run_batch,
+)
+from aclimatise.cli import main
+from aclimatise.yaml import yaml
+
+
+def help_dir(tmp_path):
+    """
+    Makes a directory of help text files for bwa and bwa mem
+    """
+    source = tmp_path / "help"
+    (source / "bwa").mkdir(parents=True)
+    shutil.copy(resource_filename("test", "test_data/bwa.txt"), source / "bwa.txt")
+    shutil.copy(
+        resource_filename("test", "test_data/bwa_mem.txt"), source / "bwa" / "mem.txt"
+    )
+    return source
+
+
+def test_find_items(tmp_path):
+    source = help_dir(tmp_path)
+    assert [item.command for item in find_items(source)] == [
+        ("bwa",),
+        ("bwa", "mem"),
+    ]
+
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# Aligners\nbwa mem\n\nsamtools sort\n")
+    assert find_items(manifest) == [
+        BatchItem(command=("bwa", "mem")),
+        BatchItem(command=("samtools", "sort")),
+    ]
+
+
+def test_convert_item_failure(tmp_path):
+    """
+    Errors should be returned in the result, rather than raised
+    """
+    result = convert_item(
+        BatchItem(command=("bwa",), help_file=str(tmp_path / "missing.txt")),
+        BatchOptions(out_dir=str(tmp_path)),
+    )
+    assert not result.ok
+    assert "FileNotFoundError" in result.error
+
+
+def test_batch_cli(tmp_path):
+    source = help_dir(tmp_path)
+    out_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        ["batch", str(source), "--out-dir", str(out_dir), "-f", "yml", "-w", "2"],
+    )
+    assert result.exit_code == 0, result.output
+
+    with (out_dir / "bwa_mem.yml").open() as fp:
+        assert yaml.load(fp).command == ["bwa", "mem"]
+
+    log = out_dir / "batch.jsonl"
+    entries = [json.loads(line) for line in log.read_text().splitlines()]
+    assert {entry["command"]: entry["status"] for entry in entries} == {
+        "bwa": "ok",
+        "bwa mem": "ok",
+    }
+
+    # Everything has been converted, so running it again should have nothing to do
+    assert pending_items(find_items(source), log) == []
+
+
+def die_on_bad(item, options):
+    if item.command == ("bad",):
+        os._exit(1)
+    # Give the pool time to notice that the other worker died
+    time.sleep(0.5)
+    return BatchResult(item=item)
+
+
+def test_run_batch_worker_dies(tmp_path, monkeypatch):
+    """
+    If a worker dies, only the item that killed it should fail, and the rest of the batch should still be converted
+    """
+    # The worker processes are forked after this, so they inherit it
+    monkeypatch.setattr(batch_module, "convert_item", die_on_bad)
+    items = [BatchItem(command=(name,)) for name in ["a", "b", "bad", "c", "d", "e"]]
+
+    results = list(run_batch(items, BatchOptions(out_dir=str(tmp_path)), max_workers=2))
+    assert sorted(result.item.key for result in results) == sorted(
+        item.key for item in items
+    )
+    assert {result.item.key for result in results if not result.ok} == {"bad"}
+    (failed,) = [result for result in results if not result.ok]
+    assert "Worker process died" in failed.error
@@ -0,0 +1,167 @@
+from enum import Enum
+from io import BytesIO
+
+import attr
+import msgpack
+import pytest
+
+from aclimatise import binary
+from aclimatise.cli_types import (
+    CliDict,
+    CliDir,
+    CliEnum,
+    CliFile,
+    CliFloat,
+    CliInteger,
+    CliList,
+    CliString,
+    CliTuple,
+)
+from aclimatise.converter.binary import BinaryGenerator
+from aclimatise.help_store import HelpRef, HelpStore, use_help_store
+from aclimatise.integration import parse_help
+from aclimatise.model import (
+    ChoiceFlagArg,
+    Command,
+    EmptyFlagArg,
+    Flag,
+    OptionalFlagArg,
+    RepeatFlagArg,
+    SimpleFlagArg,
+)
+
+
+def test_round_trip(bwamem_help):
+    command = parse_help(["bwa", "mem"], bwamem_help)
+    loaded = binary.loads(binary.dumps(command))
+    assert loaded == command
+    assert loaded.generated_using == command.generated_using
+
+
+def test_round_trip_tree(samtools_cmd):
+    sort = samtools_cmd["sort"]
+    loaded = binary.loads(binary.dumps(sort))
+
+    # We get back the same command, along with the rest of its tree
+    assert loaded.command == ["samtools", "sort"]
+    assert loaded.parent.command == ["samtools"]
+    assert all(sub.parent is loaded.parent for sub in loaded.parent.subcommands)
+
+    # Each command in the tree should be identical. Commands are compared one by one, because comparing a whole tree
+    # follows the parent links back up again
+    fields = [field.name for field in attr.fields(Command)]
+    originals = list(samtools_cmd.command_tree())
+    copies = list(loaded.parent.command_tree())
+    assert len(copies) == len(originals)
+    for original, copy in zip(originals, copies):
+        for field in fields:
+            if field not in ("parent", "subcommands"):
+                assert getattr(copy, field) == getattr(original, field)
+
+
+def test_types():
+    types = [
+        CliEnum(enum=Enum("Mode", ["fast", "slow"])),
+        CliTuple(values=[CliInteger(), CliFile(output=True)]),
+        CliList(value=CliDir()),
+        CliDict(key=CliString(), value=CliFloat()),
+    ]
+    loaded = binary._unpack(binary._pack(types))
+    assert [member.name for member in loaded[0].enum] == ["fast", "slow"]
+    assert loaded[1:] == types[1:]
+
+
+def test_flag_args():
+    args = [
+        EmptyFlagArg(),
+        SimpleFlagArg("FILE"),
+        RepeatFlagArg("FILE"),
+        OptionalFlagArg(names=["INT", "STR"], separator=","),
+        ChoiceFlagArg({"fast", "slow"}),
+    ]
+    command = Command(
+        command=["tool"],
+        named=[
+            Flag(synonyms=["-" + str(i)], description="", args=arg)
+            for i, arg in enumerate(args)
+        ],
+    )
+    loaded = binary.loads(binary.dumps(command))
+    assert [flag.args for flag in loaded.named] == args
+
+
+def test_help_ref(tmp_path):
+    store = HelpStore(tmp_path)
+    command = Command(command=["bwa"], help_text=HelpRef(store.put("bwa"), store))
+    with use_help_store(store):
+        loaded = binary.loads(binary.dumps(command))
+    assert isinstance(loaded._help_text, HelpRef)
+    assert loaded.help_text == "bwa"
+
+
+def test_file(samtools_cmd, tmp_path):
+    path = tmp_path / "samtools.msgpack"
+    BinaryGenerator().save_to_file(samtools_cmd, path)
+    with path.open("rb") as fp:
+        loaded = binary.load(fp)
+    assert [cmd.command for cmd in loaded.command_tree()] == [
+        cmd.command for cmd in samtools_cmd.command_tree()
+    ]
+
+
+def test_bad_magic():
+    with pytest.raises(ValueError):
+        binary.loads(b"not a command")
+    with pytest.raises(ValueError):
+        binary.load(BytesIO(binary.MAGIC + bytes([99])))
+
+
+def dumps_with_fields(cmd, fields, monkeypatch):
+    """
+    Serializes a command as if Command had only these fields, in this order
+    """
+    monkeypatch.setitem(binary.class_fields, Command, fields)
+    monkeypatch.setattr(
+        binary,
+        "schema",
+        msgpack.packb(
+            {
+                binary.class_codes[cls]: list(names)
+                for cls, names in binary.class_fields.items()
+            }
+        ),
+    )
+    data = binary.dumps(cmd)
+    monkeypatch.undo()
+    return data
+
+
+def test_other_fields(monkeypatch):
+    """
+    Files written when the model had different fields should be loaded by field name
+    """
+    command = Command(
+        command=["bwa"], positional=[], named=[], docker_image="biocontainers/bwa"
+    )
+    fields = binary.class_fields[Command]
+
+    # Fields that were in a different order
+    data = dumps_with_fields(command, tuple(reversed(fields)), monkeypatch)
+    assert binary.loads(data).docker_image == "biocontainers/bwa"
+
+    # Fields that have been added since the file was written get their default
+    data = dumps_with_fields(
+        command,
+        tuple(field for field in fields if field not in {"docker_image", "usage"}),
+        monkeypatch,
+    )
+    loaded = binary.loads(data)
+    assert loaded.docker_image is None
+    assert loaded.usage == []
+
+    # Fields that have been removed since can't be loaded
+    stored = dict(binary.schema_fields)
+    stored[binary.class_codes[Command]] = list(fields) + ["removed"]
+    data = binary.dumps(command).replace(binary.schema, msgpack.packb(stored), 1)
+    with pytest.raises(ValueError, match="removed"):
+        binary.loads(data)
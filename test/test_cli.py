@@ -1,3 +1,5 @@
+import json
+import os
 import shutil
 import tempfile
 import traceback
@@ -9,6 +11,7 @@ from click.testing import CliRunner
 from packaging import version
 
 from aclimatise.cli import main
+from aclimatise.stream import convert_stream
 from aclimatise.yaml import yaml
 
 from .util import skip_not_installed, validate_cwl, validate_janis, validate_wdl
@@ -51,6 +54,63 @@ def test_pipe_janis(runner, htseq_help):
     validate_janis(result.output)
 
 
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipe_jsonl(runner, htseq_help, bwamem_help, workers):
+    records = [
+        json.dumps({"cmd": ["htseq-count"], "help": htseq_help}),
+        "",
+        "not json",
+        json.dumps({"cmd": ["bwa", "mem"], "help": bwamem_help}),
+    ]
+    result = runner.invoke(
+        main,
+        ["pipe", "--jsonl", "--format", "yml", "--workers", str(workers)],
+        input="\n".join(records),
+    )
+    cli_worked(result)
+
+    # Blank lines are skipped, and the outputs are in the same order as the inputs
+    htseq, error, bwa = [json.loads(line) for line in result.output.splitlines()]
+    assert yaml.load(htseq["output"]).command == ["htseq-count"]
+    assert error["cmd"] is None and "JSONDecodeError" in error["error"]
+    assert bwa["cmd"] == ["bwa", "mem"]
+    assert len(yaml.load(bwa["output"]).named) > 0
+
+
+def convert_or_die(line):
+    record = json.loads(line)
+    if record["cmd"] == ["die"]:
+        os._exit(1)
+    return json.dumps({"cmd": record["cmd"], "output": "ok"})
+
+
+def test_stream_worker_dies():
+    """
+    A worker that dies should only fail the records it was converting, and not end the stream
+    """
+    lines = [json.dumps({"cmd": [cmd]}) for cmd in ["a", "die", "b", "c", "d", "e"]]
+    outputs = [
+        json.loads(output)
+        for output in convert_stream(lines, convert_or_die, max_workers=2, buffer=2)
+    ]
+    assert [output["cmd"] for output in outputs] == [
+        ["a"],
+        ["die"],
+        ["b"],
+        ["c"],
+        ["d"],
+        ["e"],
+    ]
+    assert "Worker process died" in outputs[1]["error"]
+    # The records after those that were being converted when the worker died are converted by a new pool
+    assert outputs[-1]["output"] == "ok"
+
+
+def test_pipe_requires_cmd(runner, htseq_help):
+    result = runner.invoke(main, ["pipe"], input=htseq_help)
+    assert result.exit_code != 0
+
+
 @skip_not_installed("htseq-count")
 def test_explore_htseq(runner, caplog):
     caplog.set_level(100000)
@@ -5,10 +5,13 @@ from pathlib import Path
 import pytest
 from WDL import parse_document
 
-from aclimatise import explore_command
+from aclimatise import converter, explore_command
+from aclimatise.converter import NameCache, generate_trees
 from aclimatise.converter.cwl import CwlGenerator
 from aclimatise.converter.wdl import WdlGenerator
+from aclimatise.converter.yml import YmlGenerator
 from aclimatise.model import CliArgument, Flag, SimpleFlagArg
+from aclimatise.name_generation import preprocess_batch
 from aclimatise.yaml import yaml
 
 from .util import convert_validate, skip_not_installed
@@ -53,6 +56,105 @@ def test_explore_samtools_pl(yaml_converter):
         assert filenames == {"samtools.yml", "samtools.pl.yml"}
 
 
+@pytest.mark.parametrize("converter_cls", [CwlGenerator, WdlGenerator])
+def test_generate_tree_names(bedtools_cmd, converter_cls):
+    """
+    Generating a whole tree names every command at once, but this should give the same output as converting each
+    command separately
+    """
+    converter = converter_cls()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for path, cmd in converter.generate_tree(bedtools_cmd, temp_dir):
+            assert path.read_text() == converter.save_to_string(cmd)
+
+
+def test_generate_tree_interleaved(bedtools_cmd, samtools_cmd, tmp_path, monkeypatch):
+    """
+    Generating two trees at once with the same converter should name each tree once, like generating them one by one
+    """
+    preprocessed = []
+
+    def count_preprocess(texts):
+        preprocessed.extend(texts)
+        return preprocess_batch(texts)
+
+    monkeypatch.setattr(converter, "preprocess_batch", count_preprocess)
+    cwl = CwlGenerator()
+    for tree in (bedtools_cmd, samtools_cmd):
+        list(cwl.generate_tree(tree, tmp_path))
+    separately = len(preprocessed)
+
+    preprocessed.clear()
+    for item in itertools.zip_longest(
+        cwl.generate_tree(bedtools_cmd, tmp_path),
+        cwl.generate_tree(samtools_cmd, tmp_path),
+    ):
+        pass
+    assert len(preprocessed) == separately
+
+
+def test_shared_name_cache(bedtools_cmd, monkeypatch):
+    """
+    Converters that share a name cache should give the same output as converters that don't, but only pre-process
+    each flag description once between them
+    """
+    expected = {
+        converter_cls: converter_cls().save_to_string(bedtools_cmd["intersect"])
+        for converter_cls in [CwlGenerator, WdlGenerator]
+    }
+
+    preprocessed = []
+
+    def count_preprocess(texts):
+        preprocessed.extend(texts)
+        return preprocess_batch(texts)
+
+    monkeypatch.setattr(converter, "preprocess_batch", count_preprocess)
+    name_cache = NameCache()
+    for converter_cls in [CwlGenerator, WdlGenerator]:
+        output = converter_cls(name_cache=name_cache).save_to_string(
+            bedtools_cmd["intersect"]
+        )
+        assert output == expected[converter_cls]
+
+    assert len(preprocessed) == len(set(preprocessed))
+
+
+def test_generate_trees(bedtools_cmd, tmp_path):
+    """
+    Converting a tree into several formats at once should give the same files as converting it once per format
+    """
+    converters = [YmlGenerator(), CwlGenerator(), WdlGenerator()]
+    separate = tmp_path / "separate"
+    separate.mkdir()
+    for converter in converters:
+        list(converter.generate_tree(bedtools_cmd, separate))
+
+    combined = tmp_path / "combined"
+    combined.mkdir()
+    paths = [
+        path
+        for path, cmd in generate_trees(
+            bedtools_cmd, combined, converters, max_workers=4
+        )
+    ]
+
+    assert len(paths) == 3 * len(list(bedtools_cmd.command_tree()))
+    assert {path.name for path in paths} == {path.name for path in separate.iterdir()}
+    for path in paths:
+        assert path.read_text() == (separate / path.name).read_text()
+
+
+def test_generate_trees_buffer(bedtools_cmd, tmp_path):
+    """
+    Files should be yielded as soon as they're written, rather than once the whole tree has been rendered
+    """
+    trees = generate_trees(bedtools_cmd, tmp_path, [YmlGenerator()], buffer=1)
+    path, cmd = next(trees)
+    assert list(tmp_path.iterdir()) == [path]
+    trees.close()
+
+
 def test_docker_conversion(bedtools_cmd):
     intersect = bedtools_cmd["intersect"]
     container = "quay.io/biocontainers/bedtools:2.29.2--hc088bd4_0"
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+from click.testing import CliRunner
+from pkg_resources import resource_filename
+
+from aclimatise import corpus as corpus_module
+from aclimatise import parse_help
+from aclimatise.cli import main
+from aclimatise.converter.yml import YmlGenerator
+from aclimatise.corpus import (
+    Corpus,
+    corpus_entries,
+    index_path,
+    reanalyse_corpus,
+    write_corpus,
+)
+from aclimatise.help_store import HelpStore
+from aclimatise.yaml import yaml
+
+from .test_batch import help_dir
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "help.corpus"
+    texts = [(("bwa",), "Usage: bwa"), (("bwa", "mem"), "Ünïcode\n"), (("x",), "")]
+    assert write_corpus(path, texts) == 3
+
+    with Corpus(path) as corpus:
+        assert len(corpus) == 3
+        assert corpus.command(1) == ("bwa", "mem")
+        assert [(entry.command, entry.help_text) for entry in corpus] == texts
+        assert corpus[-1].command == ("x",)
+        with pytest.raises(IndexError):
+            corpus[3]
+
+
+def test_bad_corpus(tmp_path):
+    path = tmp_path / "help.corpus"
+    write_corpus(path, [(("bwa",), "Usage: bwa")])
+
+    # An index that refers to more data than there is should be rejected
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        Corpus(path)
+
+    index_path(path).write_bytes(b"not a corpus")
+    with pytest.raises(ValueError):
+        Corpus(path)
+
+
+def test_corpus_entries(tmp_path):
+    assert [cmd for cmd, text in corpus_entries(help_dir(tmp_path))] == [
+        ("bwa",),
+        ("bwa", "mem"),
+    ]
+
+    tree = resource_filename("test", "test_data/bedtools/bedtools.yml")
+    with open(tree) as fp:
+        commands = list(yaml.load(fp).command_tree())
+    assert len(list(corpus_entries(tree))) == len(commands)
+
+
+def test_corpus_entries_help_store(tmp_path):
+    """
+    Trees whose help texts were moved to a help store should be readable, given the store
+    """
+    tree = resource_filename("test", "test_data/bedtools/bedtools.yml")
+    with open(tree) as fp:
+        command = yaml.load(fp)
+    stored = tmp_path / "bedtools.yml"
+    YmlGenerator(help_store=HelpStore(tmp_path / "help")).save_to_file(command, stored)
+
+    assert list(corpus_entries(stored, help_store=tmp_path / "help")) == list(
+        corpus_entries(tree)
+    )
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_reanalyse_corpus(tmp_path, max_workers):
+    path = tmp_path / "help.corpus"
+    write_corpus(path, corpus_entries(help_dir(tmp_path)))
+
+    results = list(reanalyse_corpus(path, max_workers=max_workers, chunk_size=1))
+    assert [result.index for result in results] == [0, 1]
+    with open(resource_filename("test", "test_data/bwa_mem.txt")) as fp:
+        expected = parse_help(["bwa", "mem"], fp.read(), cache=None)
+    assert results[1].command.named == expected.named
+    assert results[1].command.positional == expected.positional
+
+
+def test_reanalyse_files(tmp_path):
+    path = tmp_path / "help.corpus"
+    write_corpus(path, corpus_entries(help_dir(tmp_path)))
+
+    out_dir = tmp_path / "out"
+    (result,) = [
+        result
+        for result in reanalyse_corpus(
+            path, out_dir=out_dir, converters=[YmlGenerator()], max_workers=2
+        )
+        if result.cmd == ("bwa", "mem")
+    ]
+    assert result.command is None
+    assert result.files == [str(out_dir / "bwa_mem.yml")]
+
+
+def test_reanalyse_cli(tmp_path):
+    path = tmp_path / "help.corpus"
+    out_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["corpus", str(help_dir(tmp_path)), "--output", str(path)]
+    )
+    assert result.exit_code == 0, result.output
+
+    result = runner.invoke(
+        main, ["reanalyse", str(path), "--out-dir", str(out_dir), "-f", "yml"]
+    )
+    assert result.exit_code == 0, result.output
+    with (out_dir / "bwa_mem.yml").open() as fp:
+        assert yaml.load(fp).command == ["bwa", "mem"]
+
+
+_reanalyse_chunk = corpus_module.reanalyse_chunk
+
+
+def die_on_third_chunk(corpus, start, stop, *args):
+    if start == 2:
+        os._exit(1)
+    return _reanalyse_chunk(corpus, start, stop, *args)
+
+
+def test_reanalyse_worker_dies(tmp_path, monkeypatch):
+    """
+    If a worker dies, only the chunk that killed it should fail, and the rest of the corpus should still be parsed
+    """
+    path = tmp_path / "help.corpus"
+    write_corpus(path, [((str(i),), "Usage: cmd [-a]") for i in range(8)])
+    # The worker processes are forked after this, so they inherit it
+    monkeypatch.setattr(corpus_module, "reanalyse_chunk", die_on_third_chunk)
+
+    results = list(reanalyse_corpus(path, max_workers=2, chunk_size=1, buffer=2))
+    assert [result.index for result in results] == list(range(8))
+    assert [result.ok for result in results] == [i != 2 for i in range(8)]
+    assert "Worker process died" in results[2].error
@@ -0,0 +1,106 @@
+from io import StringIO
+
+import pytest
+from ruamel.yaml.comments import CommentedMap
+
+from aclimatise.converter.yml import YmlGenerator
+from aclimatise.help_store import HelpRef, HelpStore, use_help_store
+from aclimatise.model import Command
+from aclimatise.yaml import fast_dump, yaml
+
+
+def test_store_deduplicates(tmp_path):
+    store = HelpStore(tmp_path)
+    text = "Usage: bwa mem [options] <idxbase> <in1.fq>\n" * 100
+    digest = store.put(text)
+    assert store.put(text) == digest
+    assert store.get(digest) == text
+
+    entries = list(tmp_path.glob("*/*"))
+    assert len(entries) == 1
+    # The text is compressed
+    assert entries[0].stat().st_size < len(text) / 10
+
+
+def test_ref_equality(tmp_path):
+    store = HelpStore(tmp_path)
+    ref = HelpRef(digest=store.put("bwa"), store=store)
+    assert ref == "bwa"
+    assert "bwa" == ref
+    assert ref != "samtools"
+    assert ref == HelpRef(digest=HelpStore.digest("bwa"), store=store)
+
+    # Equal objects must have equal hashes, which isn't possible for a reference and a string
+    with pytest.raises(TypeError):
+        hash(ref)
+
+
+def test_yml_help_store(samtools_cmd, tmp_path):
+    help_texts = [command.help_text for command in samtools_cmd.command_tree()]
+    store = HelpStore(tmp_path)
+    output = YmlGenerator(help_store=store).save_to_string(samtools_cmd)
+    assert "Usage:" not in output
+    # The help texts are only moved into the store in the output, not in the tree that was converted
+    assert all(
+        isinstance(command._help_text, str) for command in samtools_cmd.command_tree()
+    )
+
+    with use_help_store(store):
+        loaded = yaml.load(output)
+    assert [command.help_text for command in loaded.command_tree()] == help_texts
+
+    # Reanalysing reads the help texts from the store, and keeps the new tree's texts there too
+    reanalysed = loaded["sort"].reanalyse()
+    assert len(reanalysed.named) > 0
+    assert isinstance(reanalysed._help_text, HelpRef)
+    assert reanalysed.help_text == samtools_cmd["sort"].help_text
+
+
+class CheckingStore(HelpStore):
+    """
+    Checks that the tree being dumped still has all its help texts whenever one is stored
+    """
+
+    def __init__(self, path, tree):
+        super().__init__(path)
+        self.tree = tree
+        self.checked = 0
+
+    def put(self, text: str) -> str:
+        assert all(isinstance(command._help_text, str) for command in self.tree)
+        self.checked += 1
+        return super().put(text)
+
+
+def test_yml_help_store_unchanged(samtools_cmd, tmp_path):
+    """
+    Other threads could be reading the tree while it's being dumped, so the tree shouldn't change, even temporarily
+    """
+    store = CheckingStore(tmp_path, list(samtools_cmd.command_tree()))
+    YmlGenerator(help_store=store).save_to_string(samtools_cmd)
+    assert store.checked == len(store.tree)
+
+
+def test_yml_help_store_fallback(tmp_path):
+    """
+    Data that the fast emitter can't write should still have its help texts stored
+    """
+    store = HelpStore(tmp_path)
+    data = CommentedMap(command=Command(command=["bwa"], help_text="Usage: bwa"))
+    data.yaml_add_eol_comment("A comment", "command")
+    buffer = StringIO()
+    fast_dump(data, buffer, help_store=store)
+    assert "A comment" in buffer.getvalue()
+    assert "Usage" not in buffer.getvalue()
+    assert HelpStore.digest("Usage: bwa") in store
+
+
+def test_ref_without_store(samtools_cmd, tmp_path):
+    """
+    A reference loaded without choosing a store should explain how to choose one, rather than looking in the default
+    store
+    """
+    output = YmlGenerator(help_store=HelpStore(tmp_path)).save_to_string(samtools_cmd)
+    loaded = yaml.load(output)
+    with pytest.raises(LookupError, match="use_help_store"):
+        loaded.help_text
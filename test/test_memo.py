@@ -0,0 +1,103 @@
+import json
+
+from aclimatise.memo import Memo, load_memos, memo_stats, memoize, memos, save_memos
+from aclimatise.name_generation import human_readable_translate, segment_string
+from aclimatise.nlp import _segment
+
+
+def test_memo_hits():
+    calls = []
+
+    def double(text):
+        calls.append(text)
+        return text * 2
+
+    memo = Memo(double)
+    assert [memo("a"), memo("b"), memo("a"), memo("a")] == ["aa", "bb", "aa", "aa"]
+    assert calls == ["a", "b"]
+
+    stats = memo.stats()
+    assert (stats.hits, stats.misses, stats.size) == (2, 2, 2)
+    assert stats.hit_rate == 0.5
+
+
+def test_memo_lru_eviction():
+    memo = Memo(str.upper, max_size=2)
+    memo("a")
+    memo("b")
+    # Using "a" again makes "b" the least recently used
+    memo("a")
+    memo("c")
+    assert list(memo.entries()) == ["a", "c"]
+
+
+def test_segment_string_memoized():
+    segment_string("--outputfile")
+    before = memo_stats()["segment_string"]
+    name = segment_string("--outputfile")
+    assert name == ["output", "file"]
+    assert memo_stats()["segment_string"].hits == before.hits + 1
+
+    # Callers are free to modify the result
+    name.append("path")
+    assert segment_string("--outputfile") == ["output", "file"]
+
+
+def test_memoize_wraps():
+    # The memo keeps the identity of the function it wraps, for introspection and autodoc
+    @memoize("test_shout")
+    def shout(text: str) -> str:
+        """
+        Makes text louder
+        """
+        return text.upper()
+
+    try:
+        assert shout("a") == "A"
+        assert shout.__name__ == "shout"
+        assert "Makes text louder" in shout.__doc__
+        assert shout.__wrapped__ is shout.function
+    finally:
+        memos.pop("test_shout")
+
+    assert _segment.__name__ == "_segment"
+    assert human_readable_translate.__name__ == "human_readable_translate"
+
+
+def test_save_load_memos(tmp_path):
+    path = tmp_path / "memos.json"
+    segment_string("--threads")
+    human_readable_translate("@")
+    save_memos(path)
+    assert (
+        json.loads(path.read_text())["memos"]["human_readable_translate"]["@"] == "at"
+    )
+
+    for memo in memos.values():
+        memo.clear()
+    load_memos(path)
+    assert segment_string("--threads") == ["threads"]
+    assert memo_stats()["segment_string"].hits == 1
+
+
+def test_load_memos_missing_or_corrupt(tmp_path):
+    load_memos(tmp_path / "missing.json")
+
+    corrupt = tmp_path / "corrupt.json"
+    corrupt.write_text("{not json")
+    load_memos(corrupt)
+
+
+def test_load_memos_old_version(tmp_path):
+    """
+    Results saved by a different version may be wrong, so they shouldn't be loaded
+    """
+    path = tmp_path / "memos.json"
+    path.write_text(
+        json.dumps(
+            {"version": "old", "memos": {"human_readable_translate": {"@": "wrong"}}}
+        )
+    )
+    memos["human_readable_translate"].clear()
+    load_memos(path)
+    assert human_readable_translate("@") == "at"
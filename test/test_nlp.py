@@ -0,0 +1,133 @@
+import subprocess
+import sys
+
+import pytest
+
+from aclimatise.integration import ParseCache
+from aclimatise.nlp import (
+    HeuristicBackend,
+    SentenceBackend,
+    SentenceClassifier,
+    SpacyBackend,
+    are_sentences,
+    get_nlp,
+    get_no_sentences,
+    is_sentence,
+)
+
+texts = [
+    "Output file name",
+    "10 20 30 40",
+    "Number of threads to use [default: 1]",
+    "",
+    "--- ... ---",
+]
+
+
+def test_are_sentences():
+    assert are_sentences(texts, batch_size=2) == [is_sentence(text) for text in texts]
+
+
+def test_sentence_classifier():
+    classifier = SentenceClassifier()
+
+    # Until they're classified, texts are assumed to be sentences
+    assert all(classifier(text) for text in texts)
+    assert classifier.classify_pending()
+    assert [classifier(text) for text in texts] == [is_sentence(text) for text in texts]
+
+    # Every text has now been classified
+    assert not classifier.classify_pending()
+
+
+class ConstantBackend:
+    def __init__(self, result: bool):
+        self.result = result
+
+    def classify(self, texts, threshold):
+        return [self.result] * len(texts)
+
+
+def test_sentence_classifier_guess():
+    """
+    classify_pending should only be True if a text that was assumed to be a sentence isn't one
+    """
+    for result in (True, False):
+        classifier = SentenceClassifier(ConstantBackend(result))
+        assert classifier("some text")
+        assert classifier.classify_pending() == (not result)
+        assert classifier("some text") == result
+
+
+def test_sentence_classifier_recording():
+    """
+    Only the texts guessed within the context should be recorded, and only wrong guesses should count against them
+    """
+    classifier = SentenceClassifier(HeuristicBackend())
+    classifier("A real sentence")
+    with classifier.recording_guesses() as guesses:
+        classifier("A real sentence")
+        classifier("1 2 3 4 5")
+    classifier("Another sentence")
+    assert guesses == {"A real sentence", "1 2 3 4 5"}
+
+    classifier.classify_pending()
+    assert not classifier.guessed_right(guesses)
+    assert classifier.guessed_right({"A real sentence", "Another sentence"})
+
+
+def test_lazy_import():
+    """
+    Importing aclimatise shouldn't load any language models
+    """
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, aclimatise.cli; assert 'spacy' not in sys.modules; assert 'wordsegment' not in sys.modules",
+        ],
+        check=True,
+    )
+
+
+def test_shared_model():
+    """
+    Both pipelines should use the same underlying model
+    """
+    assert get_no_sentences().vocab is get_nlp().vocab
+    assert get_no_sentences().get_pipe("parser") is get_nlp().get_pipe("parser")
+
+
+@pytest.mark.parametrize("backend", [SpacyBackend(), HeuristicBackend()])
+def test_backend(backend: SentenceBackend):
+    assert (
+        backend.classify(
+            [
+                "Number of threads to use",
+                "Print only the matched parts of a matching line",
+                "1 2 3 4 5",
+                "--- ... ---",
+                "",
+            ]
+        )
+        == [True, True, False, False, False]
+    )
+
+
+def test_choose_backend():
+    assert SentenceBackend.choose_backend("spacy") is SpacyBackend
+    assert SentenceBackend.choose_backend("heuristic") is HeuristicBackend
+    with pytest.raises(Exception):
+        SentenceBackend.choose_backend("nothing")
+
+
+def test_cache_key_backend():
+    """
+    Parse results from different backends shouldn't be shared
+    """
+    assert ParseCache.key(["a"], "text", 1000) == ParseCache.key(
+        ["a"], "text", 1000, SentenceClassifier(SpacyBackend())
+    )
+    assert ParseCache.key(["a"], "text", 1000) != ParseCache.key(
+        ["a"], "text", 1000, SentenceClassifier(HeuristicBackend())
+    )
@@ -0,0 +1,55 @@
+from aclimatise.execution.cache import ExecutionCache
+from aclimatise.integration import ParseCache, parse_help
+
+
+def test_parse_cache_hit(bwamem_help):
+    cache = ParseCache()
+    first = parse_help(["bwa", "mem"], bwamem_help, cache=cache)
+    second = parse_help(["bwa", "mem"], bwamem_help, cache=cache)
+
+    assert first == second
+    # Callers must be free to modify the result without affecting the cache
+    assert first is not second
+    second.named.clear()
+    assert parse_help(["bwa", "mem"], bwamem_help, cache=cache) == first
+
+
+def test_parse_cache_key(bwamem_help, bwa_help):
+    key = ParseCache.key(["bwa", "mem"], bwamem_help, 1000)
+    assert key == ParseCache.key(["bwa", "mem"], bwamem_help, 1000)
+    assert key != ParseCache.key(["bwa"], bwamem_help, 1000)
+    assert key != ParseCache.key(["bwa", "mem"], bwa_help, 1000)
+    assert key != ParseCache.key(["bwa", "mem"], bwamem_help, 10)
+
+
+def test_parse_cache_bounded(bwa_help):
+    cache = ParseCache(max_size=2)
+    for i in range(3):
+        parse_help(["bwa", str(i)], bwa_help, cache=cache)
+
+    assert cache.get(ParseCache.key(["bwa", "0"], bwa_help, 1000)) is None
+    assert cache.get(ParseCache.key(["bwa", "2"], bwa_help, 1000)) is not None
+
+
+def test_parse_cache_store(tmp_path, bwamem_help):
+    """
+    Parse results should be re-usable by a new cache that uses the same store
+    """
+    first = parse_help(
+        ["bwa", "mem"], bwamem_help, cache=ParseCache(store=ExecutionCache(tmp_path))
+    )
+    fresh = ParseCache(store=ExecutionCache(tmp_path))
+    assert fresh.get(ParseCache.key(["bwa", "mem"], bwamem_help, 1000)) == first
+
+
+def test_parse_cache_contains(tmp_path, bwa_help):
+    key = ParseCache.key(["bwa"], bwa_help, 1000)
+    cache = ParseCache(store=ExecutionCache(tmp_path))
+    assert key not in cache
+    parse_help(["bwa"], bwa_help, cache=cache)
+    assert key in cache
+
+    # Checking the store shouldn't load the Command into memory
+    fresh = ParseCache(store=ExecutionCache(tmp_path))
+    assert key in fresh
+    assert len(fresh._entries) == 0
@@ -1,11 +1,14 @@
 import random
 import string
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from pkg_resources import resource_filename
 
-from aclimatise.integration import parse_help
+from aclimatise.flag_parser.parser import CliParser
+from aclimatise.integration import parse_help, parse_help_batch
 
+from .test_nlp import ConstantBackend
 from .util import (
     HelpText,
     all_ids,
@@ -54,3 +57,68 @@ def test_long_text():
     command = parse_help(["some", "command"], text=text)
     assert len(command.positional) == 0
     assert len(command.named) == 0
+
+
+def test_parse_threaded():
+    """
+    The shared parser instances should give the same results when used from many threads at once
+    """
+    texts = []
+    for param in all_tests:
+        test = param.values[0]
+        with open(resource_filename("test", test.path)) as fp:
+            texts.append((test.cmd, fp.read()))
+
+    serial = [parse_help(cmd, text, cache=None) for cmd, text in texts]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        threaded = list(pool.map(lambda args: parse_help(*args, cache=None), texts * 2))
+
+    assert threaded == serial * 2
+
+
+def test_parse_batch():
+    """
+    Parsing many help texts at once should give the same results as parsing each separately
+    """
+    texts = []
+    for param in all_tests:
+        test = param.values[0]
+        with open(resource_filename("test", test.path)) as fp:
+            texts.append((test.cmd, fp.read()))
+
+    assert parse_help_batch(texts, cache=None) == [
+        parse_help(cmd, text, cache=None) for cmd, text in texts
+    ]
+
+
+def test_parse_batch_once(monkeypatch, bwamem_help, bwa_help):
+    """
+    If every description was guessed correctly, each help text should only be parsed for flags once
+    """
+    calls = []
+    find_flags = CliParser.find_flags
+
+    def counting_find_flags(self, cmd, sentences):
+        calls.append(cmd)
+        return find_flags(self, cmd, sentences)
+
+    monkeypatch.setattr(CliParser, "find_flags", counting_find_flags)
+    texts = [(["bwa"], bwa_help), (["bwa", "mem"], bwamem_help)]
+    parse_help_batch(texts, cache=None, sentence_backend=ConstantBackend(True))
+    assert calls == [bwa_help, bwamem_help]
+
+
+@pytest.mark.parametrize("test", all_tests, ids=all_ids)
+def test_scan_flags(test: HelpText):
+    """
+    Only trying to parse flags at the start of each block should find the same flags as trying at every character
+    """
+    with open(resource_filename("test", test.path)) as fp:
+        help_text = fp.read()
+
+    parser = CliParser()
+    with parser.stack.fresh():
+        expected = [list(block) for block in parser.flags.searchString(help_text)]
+    with parser.stack.fresh():
+        actual = [list(block) for block in parser.scan_flags(help_text)]
+    assert actual == expected
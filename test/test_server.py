@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+from http.client import HTTPConnection
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+import pytest
+
+from aclimatise import server as server_module
+from aclimatise.execution.local import LocalExecutor
+from aclimatise.model import Command
+from aclimatise.server import explore_endpoint, make_server
+from aclimatise.yaml import yaml
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = make_server(port=0, workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body):
+    """
+    Sends a JSON request, and returns the status and JSON response
+    """
+    try:
+        with urlopen(url, data=json.dumps(body).encode()) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_parse_and_save(server_url, htseq_help):
+    status, response = post(
+        server_url + "/parse_help", {"cmd": ["htseq-count"], "help": htseq_help}
+    )
+    assert status == 200
+    command = yaml.load(response["command"])
+    assert command.command == ["htseq-count"]
+
+    # The parsed command can be sent back to generate a wrapper
+    status, response = post(
+        server_url + "/save_to_string",
+        {"command": response["command"], "format": "wdl"},
+    )
+    assert status == 200
+    assert "task Htseqcount" in response["output"]
+
+
+@pytest.mark.parametrize(
+    "endpoint,body,status",
+    [
+        ("/parse_help", {"cmd": ["htseq-count"]}, 400),
+        ("/save_to_string", {"cmd": ["bwa"], "help": "", "format": "xml"}, 400),
+        ("/explore", {"cmd": ["bwa"]}, 403),
+        ("/unknown", {}, 404),
+    ],
+)
+def test_errors(server_url, endpoint, body, status):
+    assert post(server_url + endpoint, body)[0] == status
+
+
+def test_request_too_large(server_url):
+    """
+    The server should refuse a large request without reading it
+    """
+    connection = HTTPConnection(urlparse(server_url).netloc)
+    connection.putrequest("POST", "/parse_help")
+    connection.putheader("Content-Length", str(10 ** 9))
+    connection.endheaders()
+    assert connection.getresponse().status == 413
+    connection.close()
+
+
+def test_explore_depth(monkeypatch):
+    """
+    Clients shouldn't be able to explore deeper than the server allows
+    """
+    depths = []
+
+    def explore(self, cmd, max_depth):
+        depths.append(max_depth)
+        return Command(command=cmd)
+
+    monkeypatch.setattr(LocalExecutor, "explore", explore)
+    explore_endpoint({"cmd": ["bwa"], "depth": 1}, max_depth=2)
+    explore_endpoint({"cmd": ["bwa"], "depth": 100}, max_depth=2)
+    assert depths == [1, 2]
+
+
+def die(request):
+    os._exit(1)
+
+
+def test_worker_dies(server_url, monkeypatch):
+    """
+    If a worker dies, that request should fail, but the server should keep handling requests
+    """
+    monkeypatch.setitem(server_module.endpoints, "/die", die)
+    assert post(server_url + "/die", {})[0] == 503
+    status, response = post(server_url + "/parse_help", {"cmd": ["x"], "help": ""})
+    assert status == 200
@@ -1,7 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 
+import pytest
+from ruamel.yaml.comments import CommentedMap
+
+from aclimatise.converter.cwl import CwlGenerator
+from aclimatise.help_store import HelpRef, HelpStore
 from aclimatise.integration import parse_help
-from aclimatise.yaml import yaml
+from aclimatise.model import ChoiceFlagArg, Command, Flag
+from aclimatise.yaml import FastEmitter, UnsupportedData, fast_dump, yaml
+
+
+def dump_both(data):
+    """
+    Returns the YAML output of the round-trip dumper and the fast dumper
+    """
+    expected = StringIO()
+    yaml.dump(data, expected)
+    actual = StringIO()
+    fast_dump(data, actual)
+    return expected.getvalue(), actual.getvalue()
 
 
 def test_round_trip(bwamem_help):
@@ -17,3 +35,98 @@ def test_round_trip(bwamem_help):
 
     # Assert the round trip worked
     assert command == output
+
+
+def test_load_compact(samtools_cmd):
+    """
+    Loaded commands should use slots, plain lists and interned synonyms, to keep large registries small
+    """
+    sort = samtools_cmd["sort"]
+    flag = sort.named[0]
+    assert not hasattr(sort, "__dict__")
+    assert not hasattr(flag, "__dict__")
+    assert type(flag.synonyms) is list
+    assert type(sort.named) is list
+
+    # The same synonym in two different commands should be a single string
+    sort_threads = next(f for f in sort.named if "--threads" in f.synonyms)
+    view_threads = next(
+        f for f in samtools_cmd["view"].named if "--threads" in f.synonyms
+    )
+    assert next(s for s in sort_threads.synonyms if s == "--threads") is next(
+        s for s in view_threads.synonyms if s == "--threads"
+    )
+
+
+def test_fast_dump_tree(bedtools_cmd, samtools_cmd):
+    for cmd in [bedtools_cmd, samtools_cmd, samtools_cmd["sort"]]:
+        expected, actual = dump_both(cmd)
+        assert actual == expected
+
+
+def test_fast_dump_cwl(samtools_cmd):
+    for cmd in samtools_cmd.subcommands[:5]:
+        expected, actual = dump_both(CwlGenerator().command_to_tool(cmd).save())
+        assert actual == expected
+
+
+def test_fast_dump_shared(tmp_path):
+    """
+    Sets, tags, unicode, long lines, and objects that appear more than once should all be written identically
+    """
+    store = HelpStore(tmp_path)
+    ref = HelpRef(store.put("tool"), store)
+    synonyms = ["-m", "--mode"]
+    command = Command(
+        command=["tool"],
+        help_text=ref,
+        named=[
+            Flag(
+                synonyms=synonyms,
+                description="Mode, « fast » or 'slow'. " * 5,
+                args=ChoiceFlagArg({"fast", "slow"}),
+            ),
+            Flag(synonyms=synonyms, description="true", args=ChoiceFlagArg(set())),
+        ],
+        generated_using=["--help"],
+    )
+    command.subcommands = [
+        Command(command=["tool", "sub"], parent=command, help_text=ref)
+    ]
+    expected, actual = dump_both(command)
+    assert "*id" in expected
+    assert actual == expected
+
+
+def commented_map():
+    data = CommentedMap(a=1)
+    data.yaml_add_eol_comment("comment", "a")
+    return data
+
+
+@pytest.mark.parametrize(
+    "data",
+    [{"version": 1.5}, commented_map(), "just a string"],
+    ids=["float", "comment", "scalar"],
+)
+def test_fast_dump_fallback(data):
+    """
+    Data that the fast emitter doesn't handle should be written by the round-trip dumper instead
+    """
+    with pytest.raises(UnsupportedData):
+        FastEmitter(StringIO()).dump(data)
+    expected, actual = dump_both(data)
+    assert actual == expected
+
+
+def test_fast_dump_threads(bedtools_cmd, samtools_cmd):
+    trees = [bedtools_cmd, samtools_cmd] * 4
+    expected = [dump_both(tree)[0] for tree in trees]
+
+    def dump(tree):
+        buffer = StringIO()
+        fast_dump(tree, buffer)
+        return buffer.getvalue()
+
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(dump, trees)) == expected